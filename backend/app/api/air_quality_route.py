@@ -1,5 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
 from app.services.air_quality_service import get_air_quality_from_address
 
 router = APIRouter(
@@ -11,8 +14,11 @@ class AirQualityRequest(BaseModel):
     address: str
 
 @router.post("/air-quality-address")
-def air_quality_by_address(request: AirQualityRequest):
-    result = get_air_quality_from_address(request.address)
+def air_quality_by_address(
+    request: AirQualityRequest,
+    db: Session = Depends(get_db),
+):
+    result = get_air_quality_from_address(db, request.address)
     if not result:
         return {"error": "Unable to retrieve air quality for this address"}
 
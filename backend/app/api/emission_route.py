@@ -2,9 +2,9 @@ import logging
 from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.exceptions import MyclimateError, NotFoundError, ValidationError
 from app.schemas import (
     EmissionResponse,
@@ -24,24 +24,22 @@ router = APIRouter(
 
 
 @router.get("", response_model=EmissionResponse)
-def calculate_emission_stops(
+async def calculate_emission_stops(
     line_id: int = Query(..., description="ID da Linha (ex: 2607)"),
     stop_id_a: int = Query(..., description="ID da Parada de Origem"),
     stop_id_b: int = Query(..., description="ID da Parada de Destino"),
     vehicle_type: VehicleType = VehicleType.BUS,
-    db: Session = Depends(get_db),
 ):
     """
     Calculate the carbon emissions between two coordinate stops
     for the given `vehicle_type`.
     """
     try:
-        return emission_service.calculate_emission_stops(
+        return await emission_service.calculate_emission_stops(
             line_id=line_id,
             stop_id_a=stop_id_a,
             stop_id_b=stop_id_b,
             vehicle_type=vehicle_type,
-            db=db,
         )
     except NotFoundError as e:
         raise HTTPException(
@@ -61,11 +59,10 @@ def calculate_emission_stops(
 
 
 @router.get("/lines")
-def get_emission_lines_ranking(
+async def get_emission_lines_ranking(
     date: date,
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, le=100),
-    db: Session = Depends(get_db),
 ) -> LinesEmissionsResponse:
     """
     Return the ranking of the lines ordered by decreasing carbon emission.
@@ -76,11 +73,10 @@ def get_emission_lines_ranking(
        and the function will return the `page`-th block.
     """
     try:
-        return emission_service.get_emission_lines_ranking(
+        return await emission_service.get_emission_lines_ranking(
             date=date,
             page=page,
             page_size=page_size,
-            db=db,
         )
     except MyclimateError:
         logger.exception("Myclimate error")
@@ -90,10 +86,9 @@ def get_emission_lines_ranking(
 
 
 @router.get("/lines/statistics")
-def get_emission_statistics(
+async def get_emission_statistics(
     start_date: date,
     days_range: int = Query(le=100, ge=1),
-    db: Session = Depends(get_db),
 ) -> list[EmissionStatisticsReponse]:
     """
     Return the accumulated emissions of all the SPTrans lines for each date
@@ -101,8 +96,7 @@ def get_emission_statistics(
     will be ordered by date.
     """
     try:
-        return emission_service.get_emission_statistics(
-            db=db,
+        return await emission_service.get_emission_statistics(
             start_date=start_date,
             days_range=days_range,
         )
@@ -118,19 +112,17 @@ def get_emission_statistics(
 
 
 @router.get("/lines/{line_id}/statistics")
-def get_line_emission_statistics(
+async def get_line_emission_statistics(
     start_date: date,
     line_id: int,
     days_range: int = Query(le=100, ge=1),
-    db: Session = Depends(get_db),
 ) -> list[EmissionStatisticsReponse]:
     """
     Return the accumulated emissions of the given line for each date
     in the range from `start_date` to `days_range` after that.
     """
     try:
-        return emission_service.get_line_emission_statistics(
-            db=db,
+        return await emission_service.get_line_emission_statistics(
             start_date=start_date,
             days_range=days_range,
             line_id=line_id,
@@ -146,16 +138,16 @@ def get_line_emission_statistics(
         )
 
 @router.get("/lines/total", response_model=List[LineEmissionResponse]) 
-def get_total_line_emission(
+async def get_total_line_emission(
     line_number: str = Query(..., description="Número da linha (ex: 8055-51)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
 
     """
     Returns the carbon emissions of a total journey on a given line.
     """
     try:
-        return emission_service.calculate_total_emission_by_line_number(
+        return await emission_service.calculate_total_emission_by_line_number(
             db=db, 
             line_number=line_number, 
         )
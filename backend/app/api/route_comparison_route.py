@@ -12,7 +12,7 @@ router = APIRouter(
 )
 
 @router.post("/compare-bus-routes", response_model=RouteResponse)
-def compare_routes(
+async def compare_routes(
     request: RouteRequest,
     service: RouteComparisonService = Depends(RouteComparisonService)
 ):
@@ -20,7 +20,7 @@ def compare_routes(
     Calculates and compares CO2 emissions for bus routes
     between an origin and a destination.
     """
-    routes = service.calculate_bus_route_emissions(
+    routes = await service.calculate_bus_route_emissions(
         request.origin_address, 
         request.destination_address
     )
@@ -2,9 +2,9 @@ import logging
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.exceptions import ForbiddenError, MyclimateError, NotFoundError
 from app.models import UserModel
 from app.schemas import Route
@@ -19,18 +19,18 @@ router = APIRouter(
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-def create_route(
+async def create_route(
     line_id: int,
     departure_stop_id: int,
     arrival_stop_id: int,
     user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Route:
     """
     Save the route of the user with the given fields.
     """
     try:
-        return route_service.create_route(
+        return await route_service.create_route(
             user_id=user.id,
             line_id=line_id,
             departure_stop_id=departure_stop_id,
@@ -50,30 +50,30 @@ def create_route(
 
 
 @router.get("")
-def get_routes(
+async def get_routes(
     user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> list[Route]:
     """
     Return the routes of the user, ordered by decreasing created time.
     """
-    return route_service.get_routes(
+    return await route_service.get_routes(
         user_id=user.id,
         db=db,
     )
 
 
 @router.delete("/{route_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_route(
+async def delete_route(
     route_id: UUID,
     user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> None:
     """
     Delete the route of the given id.
     """
     try:
-        route_service.delete_route(
+        await route_service.delete_route(
             user_id=user.id,
             route_id=route_id,
             db=db,
@@ -0,0 +1,36 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.schemas import NearbyStop
+from app.services import stop_index_service
+
+router = APIRouter(prefix="/stops", tags=["Stops"])
+
+
+@router.get("/nearby", response_model=List[NearbyStop])
+def get_nearby_stops(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude do ponto"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude do ponto"),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de paradas"),
+    radius: float | None = Query(
+        None, gt=0, description="Distância máxima das paradas, em quilômetros"
+    ),
+    line_id: int | None = Query(
+        None, description="Se informado, considera apenas as paradas da linha"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Return the stops closest to the given point, sorted by distance.
+    """
+    return stop_index_service.find_nearby_stops(
+        db=db,
+        latitude=lat,
+        longitude=lon,
+        limit=limit,
+        radius=radius,
+        line_id=line_id,
+    )
@@ -1,4 +1,6 @@
 import logging
+from datetime import datetime, timedelta, timezone
+
 import requests
 from tenacity import (
     before_sleep_log,
@@ -7,27 +9,43 @@ from tenacity import (
     wait_random_exponential,
 )
 
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.geohash import get_geohash_cell
+from app.repositories.cache_entry_repository import DatabaseCacheBackend
 
 logger = logging.getLogger(__name__)
 
 AIR_QUALITY_API_URL = "https://airquality.googleapis.com/v1/currentConditions:lookup"
 
+# Last hourly reading of each grid cell, by geohash, see `fetch_air_quality`
+air_quality_cache: LRUCache[str, dict] = LRUCache(
+    name="air_quality",
+    max_size=settings.AIR_QUALITY_CACHE_MAX_SIZE,
+    ttl=timedelta(hours=1),
+    backend=DatabaseCacheBackend(namespace="air_quality"),
+)
+
+
+def _get_reading_hour(moment: datetime) -> str:
+    """
+    Return the UTC hour of the moment, which identifies its reading.
+    """
+    hour = moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return hour.isoformat(timespec="hours")
+
+
 @retry(
     reraise=True,
     before_sleep=before_sleep_log(logger, logging.INFO),
     stop=stop_after_attempt(max_attempt_number=3),
     wait=wait_random_exponential(multiplier=1, min=2, max=6),
 )
-def fetch_air_quality(lat: float, lon: float) -> dict:
+def _request_air_quality(lat: float, lon: float) -> dict:
     """
     Performs the HTTP request to the Google Air Quality API.
     Includes automatic retries in case of failure.
     """
-    if not settings.GOOGLE_API_KEY:
-        logger.warning("GOOGLE_API_KEY não configurada. Retornando dados vazios.")
-        return {}
-
     headers = {
         "Content-Type": "application/json"
     }
@@ -55,3 +73,28 @@ def fetch_air_quality(lat: float, lon: float) -> dict:
     except requests.exceptions.RequestException as e:
         logger.error(f"Erro ao buscar qualidade do ar: {e}")
         raise e
+
+
+def fetch_air_quality(lat: float, lon: float) -> dict:
+    """
+    Return the current air quality of the grid cell (see
+    `AIR_QUALITY_CACHE_GEOHASH_PRECISION`) of the coordinates. The reading of
+    the center of the cell is requested once per hour and shared by all the
+    coordinates in the cell. Each cell keeps only its last reading.
+    """
+    if not settings.GOOGLE_API_KEY:
+        logger.warning("GOOGLE_API_KEY não configurada. Retornando dados vazios.")
+        return {}
+
+    geohash, cell_lat, cell_lon = get_geohash_cell(
+        lat, lon, precision=settings.AIR_QUALITY_CACHE_GEOHASH_PRECISION
+    )
+    hour = _get_reading_hour(datetime.now(tz=timezone.utc))
+    cached_reading = air_quality_cache.get(geohash)
+    if cached_reading is not None and cached_reading["hour"] == hour:
+        return cached_reading["reading"]
+
+    reading = _request_air_quality(cell_lat, cell_lon)
+    if reading:
+        air_quality_cache.set(geohash, {"hour": hour, "reading": reading})
+    return reading
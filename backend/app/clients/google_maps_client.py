@@ -1,19 +1,98 @@
 import logging
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Optional
 
 import requests
+from app.constants import SAO_PAULO_ZONE
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.repositories.cache_entry_repository import DatabaseCacheBackend
 from requests.exceptions import HTTPError
 
 logger = logging.getLogger(__name__)
 
 GOOGLE_ROUTES_API_URL = "https://routes.googleapis.com/directions/v2:computeRoutes"
+GOOGLE_GEOCODING_API_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 GOOGLE_API_KEY = settings.GOOGLE_API_KEY 
 
+# Intervals of hours (in São Paulo time) in which the transit routes change
+# more often, so they are cached for less time
+PEAK_HOURS = ((6, 10), (16, 20))
+
+# Bus routes already computed by Google, see `_build_routes_cache_key`
+routes_cache: LRUCache[str, dict] = LRUCache(
+    name="google_routes",
+    max_size=settings.GOOGLE_ROUTES_CACHE_MAX_SIZE,
+    ttl=timedelta(
+        minutes=max(
+            settings.GOOGLE_ROUTES_CACHE_PEAK_TTL_MINUTES,
+            settings.GOOGLE_ROUTES_CACHE_OFF_PEAK_TTL_MINUTES,
+        )
+    ),
+    backend=(
+        DatabaseCacheBackend(namespace="google_routes")
+        if settings.ENABLE_GOOGLE_ROUTES_CACHE_BACKEND
+        else None
+    ),
+)
+
+
+def normalize_address(address: str) -> str:
+    """
+    Return the address in lower case, without accents, punctuation and
+    repeated spaces, so that the ways of typing it share the cache.
+    """
+    address = unicodedata.normalize("NFKD", address)
+    address = "".join(char for char in address if not unicodedata.combining(char))
+    address = re.sub(r"[^\w\s-]", " ", address.casefold())
+    return " ".join(address.split())
+
+
+def get_cache_window(moment: datetime) -> tuple[datetime, timedelta]:
+    """
+    Return the start and the duration of the window of the day (in São Paulo
+    time) which contains the moment. The windows last
+    `GOOGLE_ROUTES_CACHE_PEAK_TTL_MINUTES` in the `PEAK_HOURS` and
+    `GOOGLE_ROUTES_CACHE_OFF_PEAK_TTL_MINUTES` otherwise.
+    """
+    moment = moment.astimezone(SAO_PAULO_ZONE)
+    if any(start <= moment.hour < end for start, end in PEAK_HOURS):
+        window_minutes = settings.GOOGLE_ROUTES_CACHE_PEAK_TTL_MINUTES
+    else:
+        window_minutes = settings.GOOGLE_ROUTES_CACHE_OFF_PEAK_TTL_MINUTES
+    minutes = moment.hour * 60 + moment.minute
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(
+        minutes=minutes - minutes % window_minutes
+    )
+    return start, timedelta(minutes=window_minutes)
+
+
+def _build_routes_cache_key(origin_address: str, destination_address: str) -> str:
+    """
+    Return the key of the routes between the addresses: the normalized
+    addresses. The cached value is replaced when its window ends, so each pair
+    of addresses keeps a single stored value.
+    """
+    return (
+        f"{normalize_address(origin_address)}|"
+        f"{normalize_address(destination_address)}"
+    )
+
+
 def find_bus_routes(origin_address: str, destination_address: str) -> dict:
     """
-    Chama a API computeRoutes do Google para encontrar rotas de ônibus.
+    Chama a API computeRoutes do Google para encontrar rotas de ônibus. As
+    rotas ficam no cache `routes_cache` até o fim da janela do horário atual,
+    see `get_cache_window`.
     """
-    
+    cache_key = _build_routes_cache_key(origin_address, destination_address)
+    window_start, _ = get_cache_window(datetime.now(tz=SAO_PAULO_ZONE))
+    window = window_start.isoformat(timespec="minutes")
+    cached_routes = routes_cache.get(cache_key)
+    if cached_routes is not None and cached_routes["window_start"] == window:
+        return cached_routes["routes"]
     
     field_mask = (
         "routes.legs.steps.travelMode,"
@@ -67,38 +146,33 @@ def find_bus_routes(origin_address: str, destination_address: str) -> dict:
             logger.error(f"Resposta: {e.response.text}")
         logger.error("-----------------------------")
         raise e
-    return response.json()
-
-def get_coordinates_from_address(address: str):
-    field_mask = (
-        "routes.legs.startLocation.latLng.latitude,"
-        "routes.legs.startLocation.latLng.longitude"
-    )
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": GOOGLE_API_KEY,
-        "X-Goog-FieldMask": field_mask
-    }
+    routes = response.json()
+    routes_cache.set(cache_key, {"window_start": window, "routes": routes})
+    return routes
 
-    body = {
-        "origin": {"address": address},
-        "destination": {"address": address},  # <-- truque
-        "travelMode": "DRIVE"
+def get_coordinates_from_address(address: str) -> Optional[dict]:
+    """
+    Busca as coordenadas do endereço na API de Geocoding do Google, ou None
+    se o endereço não for encontrado.
+    """
+    params = {
+        "address": address,
+        "key": GOOGLE_API_KEY,
+        "language": "pt-BR",
+        "region": "br",
     }
 
-    response = requests.post(GOOGLE_ROUTES_API_URL, json=body, headers=headers)
+    response = requests.get(GOOGLE_GEOCODING_API_URL, params=params)
     response.raise_for_status()
 
     data = response.json()
 
     try:
-        loc = data["routes"][0]["legs"][0]["startLocation"]["latLng"]
+        loc = data["results"][0]["geometry"]["location"]
         return {
-            "latitude": loc["latitude"],
-            "longitude": loc["longitude"]
+            "latitude": loc["lat"],
+            "longitude": loc["lng"]
         }
     except (KeyError, IndexError, TypeError) as e:
         logger.warning(f"Erro ao extrair coordenadas da resposta: {e}")
         return None
-
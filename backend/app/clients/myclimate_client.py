@@ -1,7 +1,11 @@
+import json
 import logging
-from typing import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional, Sequence
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from tenacity import (
     before_sleep_log,
@@ -11,8 +15,10 @@ from tenacity import (
     wait_random_exponential,
 )
 
+from app.core.cache import LRUCache
 from app.core.config import settings
 from app.exceptions import MyclimateError
+from app.repositories.cache_entry_repository import DatabaseCacheBackend
 from app.schemas import (
     MyclimateBulkCarbonEmission,
     MyclimateCarbonEmission,
@@ -28,8 +34,39 @@ CARBON_EMISSION_URL = f"{settings.MYCLIMATE_PREFIX_URL}/v1/car_calculators.json"
 
 logger = logging.getLogger(__name__)
 
+# Shared session, so the calls (and the concurrent bulk chunks) reuse the
+# pooled keep-alive connections
+session = requests.Session()
+session.mount(
+    "https://",
+    HTTPAdapter(pool_maxsize=settings.MYCLIMATE_MAX_CONCURRENT_REQUESTS),
+)
+
+# Emissions already priced by MyClimate, see `_build_cache_key`
+emission_cache: LRUCache[str, float] = LRUCache(
+    name="myclimate",
+    max_size=settings.MYCLIMATE_CACHE_MAX_SIZE,
+    ttl=timedelta(days=settings.MYCLIMATE_CACHE_TTL_DAYS),
+    backend=DatabaseCacheBackend(namespace="myclimate"),
+)
+# Distances closer than this number of decimal places (in km) share the
+# cached emission
+CACHE_DISTANCE_DECIMALS = 3
+
+
+def _build_cache_key(payload: dict) -> str:
+    """
+    Return the key of the emission of the given trip payload: its fuel
+    parameters and its rounded distance.
+    """
+    parameters = {
+        key: value for key, value in payload.items() if key not in ("km", "id")
+    }
+    distance = f"{payload['km']:.{CACHE_DISTANCE_DECIMALS}f}"
+    return f"{json.dumps(parameters, sort_keys=True)}:{distance}"
 
-def _calculate_mock_emission(distance: float, vehicle_type: VehicleType) -> float:
+
+def calculate_fallback_emission(distance: float, vehicle_type: VehicleType) -> float:
     """Cálculo mock para fallback ou falta de credenciais."""
     logger.warning("Usando o fallback para o cálculo da emissão de carbono")
     if distance < 1:
@@ -51,7 +88,7 @@ def _calculate_mock_emission(distance: float, vehicle_type: VehicleType) -> floa
     retry_error_callback=(
         (
             lambda retry_state: (
-                (_calculate_mock_emission(*retry_state.args, **retry_state.kwargs))
+                (calculate_fallback_emission(*retry_state.args, **retry_state.kwargs))
             )
         )
         if settings.ENABLE_MYCLIMATE_FALLBACK
@@ -100,11 +137,16 @@ def calculate_carbon_emission(distance: float, vehicle_type: VehicleType) -> flo
     else:
         raise NotImplementedError(f"O tipo {vehicle_type} não foi implementado")
 
-    response = requests.post(
+    cache_key = _build_cache_key(payload)
+    cached_emission = emission_cache.get(cache_key)
+    if cached_emission is not None:
+        return cached_emission
+
+    response = session.post(
         CARBON_EMISSION_URL,
         auth=AUTH,
         json=payload,
-        timeout=5,
+        timeout=settings.MYCLIMATE_TIMEOUT,
     )
     try:
         response.raise_for_status()
@@ -115,7 +157,9 @@ def calculate_carbon_emission(distance: float, vehicle_type: VehicleType) -> flo
     if "errors" in json_response:
         raise MyclimateError(json_response["errors"])
 
-    return MyclimateCarbonEmission(**json_response).emission
+    emission = MyclimateCarbonEmission(**json_response).emission
+    emission_cache.set(cache_key, emission)
+    return emission
 
 
 BULK_CARBON_EMISSION_URL = (
@@ -130,15 +174,42 @@ BULK_CARBON_EMISSION_URL = (
     stop=stop_after_attempt(max_attempt_number=3),
     wait=wait_random_exponential(multiplier=1, min=2, max=6),
 )
+def _bulk_calculate_chunk(trips_payloads: Sequence[dict]) -> list[float]:
+    """
+    Send a single bulk request with the given trips payloads and return their
+    emissions, in the same order. The payloads must be sorted by `id`.
+    """
+    try:
+        response = session.post(
+            BULK_CARBON_EMISSION_URL,
+            auth=AUTH,
+            json={"trips": list(trips_payloads)},
+            timeout=settings.MYCLIMATE_TIMEOUT,
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise MyclimateError(e) from e
+
+    trips = MyclimateBulkCarbonEmission(**response.json()).trips
+    trips.sort(key=lambda e: e.id)
+    return [trip.emission for trip in trips]
+
+
 def bulk_calculate_carbon_emission(
-    distances: Sequence[float], vehicle_type: VehicleType
+    distances: Sequence[float], vehicle_type: VehicleType, use_cache: bool = True
 ) -> list[float]:
     """
     Calculate the carbon emission (in kg) for a given list of distances.
 
+    The distances that are not cached are sent in chunks of
+    `MYCLIMATE_BULK_CHUNK_SIZE` trips, up to `MYCLIMATE_MAX_CONCURRENT_REQUESTS`
+    at a time. Each chunk is retried on its own and the emissions of the
+    successful ones are cached even if another chunk fails.
+
     Parameters:
     - `distances`: Distances list in km.
     - `vehicle_type`: Bus or car type.
+    - `use_cache`: If False, all the distances are priced again by the API.
     """
     if len(distances) == 0:
         return []
@@ -153,40 +224,68 @@ def bulk_calculate_carbon_emission(
     else:
         raise NotImplementedError(f"O tipo {vehicle_type} não foi implementado")
 
-    payload = {
-        "trips": [
-            base_single_payload
-            | {
-                "km": max(
-                    MINIMUM_ACCEPTED_DISTANCE, min(distance, MAXIMUM_ACCEPTED_DISTANCE)
-                ),
-                "id": i,
-            }
-            for i, distance in enumerate(distances)
-        ]
-    }
-    response = requests.post(
-        BULK_CARBON_EMISSION_URL,
-        auth=AUTH,
-        json=payload,
-    )
-    try:
-        response.raise_for_status()
-    except Exception as e:
-        raise MyclimateError(e) from e
+    trips_payloads = [
+        base_single_payload
+        | {
+            "km": max(
+                MINIMUM_ACCEPTED_DISTANCE, min(distance, MAXIMUM_ACCEPTED_DISTANCE)
+            ),
+            "id": i,
+        }
+        for i, distance in enumerate(distances)
+    ]
+    cache_keys = [_build_cache_key(trip_payload) for trip_payload in trips_payloads]
+    cached_emissions = emission_cache.get_many(cache_keys) if use_cache else {}
 
-    trips = MyclimateBulkCarbonEmission(**response.json()).trips
-    trips.sort(key=lambda e: e.id)
+    # Only the trips that were never priced are sent, once per key
+    missing_payloads: dict[str, dict] = {}
+    for trip_payload, cache_key in zip(trips_payloads, cache_keys):
+        if cache_key not in cached_emissions:
+            missing_payloads.setdefault(cache_key, trip_payload)
 
-    emissions: list[float] = []
+    missing_items = list(missing_payloads.items())
+    chunk_size = settings.MYCLIMATE_BULK_CHUNK_SIZE
+    chunks = [
+        missing_items[start : start + chunk_size]
+        for start in range(0, len(missing_items), chunk_size)
+    ]
+    if len(chunks) > 0:
+        with ThreadPoolExecutor(
+            max_workers=min(len(chunks), settings.MYCLIMATE_MAX_CONCURRENT_REQUESTS)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _bulk_calculate_chunk, [trip_payload for _, trip_payload in chunk]
+                )
+                for chunk in chunks
+            ]
+
+        new_emissions: dict[str, float] = {}
+        error: Optional[MyclimateError] = None
+        for chunk, future in zip(chunks, futures, strict=True):
+            try:
+                chunk_emissions = future.result()
+            except MyclimateError as e:
+                error = error or e
+                continue
+            new_emissions |= {
+                cache_key: emission
+                for (cache_key, _), emission in zip(chunk, chunk_emissions, strict=True)
+            }
+        emission_cache.set_many(new_emissions)
+        if error is not None:
+            raise error
+        cached_emissions |= new_emissions
 
-    for trip, distance in zip(trips, distances, strict=True):
+    emissions: list[float] = []
+    for cache_key, distance in zip(cache_keys, distances, strict=True):
+        emission = cached_emissions[cache_key]
         if distance < 0:
             emissions.append(1)
         elif distance < MINIMUM_ACCEPTED_DISTANCE:
-            emissions.append(trip.emission * distance)
+            emissions.append(emission * distance)
         elif distance > MAXIMUM_ACCEPTED_DISTANCE:
-            emissions.append(trip.emission * distance / MAXIMUM_ACCEPTED_DISTANCE)
+            emissions.append(emission * distance / MAXIMUM_ACCEPTED_DISTANCE)
         else:
-            emissions.append(trip.emission)
+            emissions.append(emission)
     return emissions
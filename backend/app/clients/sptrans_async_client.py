@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import weakref
+
+import httpx
+from pydantic import TypeAdapter
+from tenacity import (
+    before_sleep_log,
+    retry,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.clients.sptrans_client import LINES_LOOK_UP_URL, LOGIN_URL
+from app.core.config import settings
+from app.schemas import SPTransLine
+
+logger = logging.getLogger(__name__)
+
+# An `AsyncClient` can not be shared between event loops, so each loop gets
+# its own client, which is discarded together with the loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the client of the running event loop, creating it if needed.
+
+    The client keeps a pool of keep-alive connections to the Olho Vivo API,
+    which is reused by all the calls made in the same loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.SPTRANS_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.SPTRANS_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SPTRANS_MAX_CONNECTIONS,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_client() -> None:
+    """
+    Close the client of the running event loop, if any.
+    """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _build_cookie_header(credentials: httpx.Cookies) -> dict[str, str]:
+    """
+    Return the header with the login cookies. The cookies are sent as a
+    header because the shared client must not keep them between calls.
+    """
+    return {
+        "Cookie": "; ".join(f"{name}={value}" for name, value in credentials.items())
+    }
+
+
+@retry(
+    reraise=True,
+    before_sleep=before_sleep_log(logger, logging.INFO),
+    stop=stop_after_attempt(max_attempt_number=3),
+    wait=wait_random_exponential(multiplier=1, min=2, max=6),
+)
+async def login() -> httpx.Cookies:
+    """
+    Login to Olho Vivo API and return the cookies to use in other endpoint calls.
+    """
+    response = await get_client().post(
+        LOGIN_URL, params={"token": settings.SPTRANS_API_TOKEN}
+    )
+    response.raise_for_status()
+    return response.cookies
+
+
+@retry(
+    reraise=True,
+    before_sleep=before_sleep_log(logger, logging.INFO),
+    stop=stop_after_attempt(max_attempt_number=3),
+    wait=wait_random_exponential(multiplier=1, min=2, max=6),
+)
+async def get_lines(credentials: httpx.Cookies, pattern: str) -> list[SPTransLine]:
+    """
+    Get all the lines that contains the given `pattern`.
+
+    Parameters:
+    - `pattern`: The pattern to look up.
+    """
+    response = await get_client().get(
+        LINES_LOOK_UP_URL,
+        params={"termosBusca": pattern},
+        headers=_build_cookie_header(credentials),
+    )
+    response.raise_for_status()
+    return TypeAdapter(list[SPTransLine]).validate_json(response.content)
@@ -14,6 +14,11 @@ from app.core.config import settings
 from app.schemas import SPTransLine, SPTransLinesVehiclesResponse
 
 logger = logging.getLogger(__name__)
+
+# Shared session, so the calls reuse the pooled keep-alive connections
+# instead of opening a new TCP+TLS connection each time
+session = requests.Session()
+
 LOGIN_URL = f"{settings.SPTRANS_PREFIX_URL}/Login/Autenticar"
 
 
@@ -27,7 +32,11 @@ def login() -> RequestsCookieJar:
     """
     Login to Olho Vivo API and return the cookies to use in other endpoint calls.
     """
-    response = requests.post(LOGIN_URL, params={"token": settings.SPTRANS_API_TOKEN})
+    response = session.post(
+        LOGIN_URL,
+        params={"token": settings.SPTRANS_API_TOKEN},
+        timeout=settings.SPTRANS_TIMEOUT,
+    )
     response.raise_for_status()
     return response.cookies
 
@@ -49,10 +58,11 @@ def get_lines(credentials: RequestsCookieJar, pattern: str) -> list[SPTransLine]
     Parameters:
     - `pattern`: The pattern to look up.
     """
-    response = requests.get(
+    response = session.get(
         LINES_LOOK_UP_URL,
         params={"termosBusca": pattern},
         cookies=credentials,
+        timeout=settings.SPTRANS_TIMEOUT,
     )
     response.raise_for_status()
     return TypeAdapter(list[SPTransLine]).validate_python(response.json())
@@ -73,12 +83,34 @@ def get_live_vehicles_positions(
     """
     Get the positions of all the vehicles that are currently moving.
     """
-    response = requests.get(
+    response = session.get(
         POSITION_URL,
         cookies=credentials,
+        timeout=settings.SPTRANS_TIMEOUT,
     )
     response.raise_for_status()
     json_response = response.json()
     if json_response is None:
         return SPTransLinesVehiclesResponse(l=[])
     return SPTransLinesVehiclesResponse(**json_response)
+
+
+@retry(
+    reraise=True,
+    before_sleep=before_sleep_log(logger, logging.INFO),
+    stop=stop_after_attempt(max_attempt_number=3),
+    wait=wait_random_exponential(multiplier=1, min=2, max=6),
+)
+def get_live_vehicles_positions_payload(credentials: RequestsCookieJar) -> bytes:
+    """
+    Get the raw JSON payload with the positions of all the vehicles that are
+    currently moving, to be decoded without building the response models.
+    See `vehicle_position_service.parse_live_positions`.
+    """
+    response = session.get(
+        POSITION_URL,
+        cookies=credentials,
+        timeout=settings.SPTRANS_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.content
@@ -0,0 +1,185 @@
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import pandas as pd
+
+from app.commands import gtfs_loader
+from app.commands.sptrans_static_data import SPTRANS_DATA_PATH
+from app.schemas import SPTransLineStop, SPTransShape
+
+# Approximate size of the SPTrans GTFS files
+SYNTHETIC_TRIPS = 2200
+SYNTHETIC_SHAPE_POINTS = 300
+SYNTHETIC_TRIP_STOPS = 40
+
+
+def write_synthetic_files(directory: str, seed: int = 0) -> None:
+    """
+    Write `shapes.txt` and `stop_times.txt` files with the size of the real
+    ones, used when they are not in the data path.
+    """
+    generator = random.Random(seed)
+    with open(os.path.join(directory, "shapes.txt"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            [
+                "shape_id",
+                "shape_pt_lat",
+                "shape_pt_lon",
+                "shape_pt_sequence",
+                "shape_dist_traveled",
+            ]
+        )
+        for shape_id in range(SYNTHETIC_TRIPS):
+            for sequence in range(1, SYNTHETIC_SHAPE_POINTS + 1):
+                writer.writerow(
+                    [
+                        shape_id,
+                        generator.uniform(-23.8, -23.4),
+                        generator.uniform(-46.8, -46.4),
+                        sequence,
+                        sequence * 50.0,
+                    ]
+                )
+
+    with open(os.path.join(directory, "stop_times.txt"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"]
+        )
+        for trip_id in range(SYNTHETIC_TRIPS):
+            for sequence in range(1, SYNTHETIC_TRIP_STOPS + 1):
+                writer.writerow(
+                    [
+                        f"{trip_id:04d}-10-0",
+                        "07:00:00",
+                        "07:00:00",
+                        generator.randint(1, 100000),
+                        sequence,
+                    ]
+                )
+
+
+def load_shapes_with_models(file_path: str) -> dict[str, list[SPTransShape]]:
+    """
+    The previous shapes loader: one `SPTransShape` per row of the file.
+    """
+    shapes: dict[str, list[SPTransShape]] = {}
+    with open(file_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            shapes.setdefault(row["shape_id"], []).append(
+                SPTransShape(
+                    latitude=float(row["shape_pt_lat"]),
+                    longitude=float(row["shape_pt_lon"]),
+                    sequence=int(row["shape_pt_sequence"]),
+                    distance=float(row["shape_dist_traveled"]) / 1000,
+                )
+            )
+    for shape_points in shapes.values():
+        shape_points.sort(key=lambda p: p.sequence)
+    return shapes
+
+
+def load_line_stops_with_models(file_path: str) -> list[SPTransLineStop]:
+    """
+    The previous line stops loader: one `SPTransLineStop` per row of the file.
+    """
+    df = pd.read_csv(
+        file_path,
+        usecols=["trip_id", "stop_id", "stop_sequence"],
+        dtype={"trip_id": str, "stop_id": int, "stop_sequence": int},
+    )
+    return [
+        SPTransLineStop(
+            trip_id=row["trip_id"],
+            stop_id=row["stop_id"],
+            stop_order=row["stop_sequence"],
+        )
+        for _, row in df.iterrows()
+    ]
+
+
+def measure(
+    load: Callable[[str], object], file_path: str, repeat: int
+) -> tuple[float, float]:
+    """
+    Return the best time (in seconds) and the peak of allocated memory (in MB)
+    of loading the file.
+    """
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        load(file_path)
+        times.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    load(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1024 / 1024
+
+
+def benchmark_gtfs_loader(data_path: str, repeat: int) -> None:
+    """
+    Compare the time and memory of the previous and the columnar loaders of
+    `shapes.txt` and `stop_times.txt`.
+
+    Parameters:
+    - `data_path`: Directory with the GTFS files. If they are missing, synthetic
+      ones will be used.
+    - `repeat`: Number of timed runs of each loader.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        shapes_path = os.path.join(data_path, "shapes.txt")
+        stop_times_path = os.path.join(data_path, "stop_times.txt")
+        if not os.path.exists(shapes_path) or not os.path.exists(stop_times_path):
+            print(f"Arquivos GTFS não encontrados em {data_path}, usando sintéticos")
+            write_synthetic_files(directory)
+            shapes_path = os.path.join(directory, "shapes.txt")
+            stop_times_path = os.path.join(directory, "stop_times.txt")
+
+        for file_path, loaders in [
+            (
+                shapes_path,
+                [
+                    ("DictReader + modelos", load_shapes_with_models),
+                    ("colunar", gtfs_loader.load_shapes),
+                ],
+            ),
+            (
+                stop_times_path,
+                [
+                    ("iterrows + modelos", load_line_stops_with_models),
+                    ("colunar", gtfs_loader.load_line_stops),
+                ],
+            ),
+        ]:
+            size = os.path.getsize(file_path) / 1024 / 1024
+            print(f"{os.path.basename(file_path)} ({size:.1f} MB)")
+            for name, load in loaders:
+                best_time, peak_memory = measure(load, file_path, repeat=repeat)
+                print(
+                    f"  {name}: {best_time * 1000:.1f} ms, "
+                    f"pico de {peak_memory:.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara os leitores dos arquivos GTFS do SPTrans"
+    )
+    parser.add_argument(
+        "--data-path",
+        default=SPTRANS_DATA_PATH,
+        help="Diretório com os arquivos shapes.txt e stop_times.txt",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+    benchmark_gtfs_loader(data_path=arguments.data_path, repeat=arguments.repeat)
@@ -0,0 +1,153 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from app.clients import sptrans_client
+from app.schemas import SPTransLinesVehiclesResponse
+from app.services.vehicle_position_service import (
+    VehiclePositions,
+    parse_live_positions,
+)
+
+# Approximate size of the São Paulo fleet in a weekday
+SYNTHETIC_LINES = 2200
+SYNTHETIC_VEHICLES_PER_LINE = 6
+
+
+def build_synthetic_payload(seed: int = 0) -> bytes:
+    """
+    Build a `/Posicao` payload with the size of a real one, used when no
+    recorded snapshot is given.
+    """
+    generator = random.Random(seed)
+    now = datetime.now(tz=timezone.utc).replace(microsecond=0)
+    vehicle_id = 10000
+    lines = []
+    for line_id in range(1, SYNTHETIC_LINES + 1):
+        vehicles = []
+        for _ in range(SYNTHETIC_VEHICLES_PER_LINE):
+            vehicle_id += 1
+            updated_at = now - timedelta(seconds=generator.randint(0, 120))
+            vehicles.append(
+                {
+                    "p": vehicle_id,
+                    "a": True,
+                    "ta": updated_at.isoformat().replace("+00:00", "Z"),
+                    "py": generator.uniform(-23.8, -23.4),
+                    "px": generator.uniform(-46.8, -46.4),
+                }
+            )
+        lines.append(
+            {
+                "c": f"{line_id:04d}-10",
+                "cl": line_id,
+                "sl": 1,
+                "lt0": "TERMINAL A",
+                "lt1": "TERMINAL B",
+                "qv": len(vehicles),
+                "vs": vehicles,
+            }
+        )
+    return json.dumps({"hr": now.strftime("%H:%M"), "l": lines}).encode()
+
+
+def record_snapshot(snapshot_path: str) -> None:
+    """
+    Save the current `/Posicao` payload, to be used in later benchmarks.
+    """
+    payload = sptrans_client.get_live_vehicles_positions_payload(
+        credentials=sptrans_client.login()
+    )
+    with open(snapshot_path, "wb") as file:
+        file.write(payload)
+    print(f"Resposta de /Posicao salva em {snapshot_path}")
+
+
+def parse_with_models(payload: bytes) -> VehiclePositions:
+    """
+    The previous decode path: whole JSON document into the response models.
+    """
+    response = SPTransLinesVehiclesResponse(**json.loads(payload))
+    return VehiclePositions.from_lines_vehicles(response.lines_vehicles)
+
+
+def parse_without_models(payload: bytes) -> VehiclePositions:
+    """
+    The columnar decode path, see `parse_live_positions`.
+    """
+    positions, _ = parse_live_positions(payload)
+    return positions
+
+
+def measure(
+    parse: Callable[[bytes], VehiclePositions], payload: bytes, repeat: int
+) -> tuple[float, float]:
+    """
+    Return the best time (in seconds) and the peak of allocated memory (in MB)
+    of parsing the payload.
+    """
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        parse(payload)
+        times.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    parse(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1024 / 1024
+
+
+def benchmark_position_parser(snapshot_path: str | None, repeat: int) -> None:
+    """
+    Compare the time and memory of the decode paths of the `/Posicao` payload.
+
+    Parameters:
+    - `snapshot_path`: A recorded `/Posicao` payload. If None, a synthetic one
+      will be used.
+    - `repeat`: Number of timed runs of each path.
+    """
+    if snapshot_path is None:
+        payload = build_synthetic_payload()
+    else:
+        with open(snapshot_path, "rb") as file:
+            payload = file.read()
+
+    vehicles_count = len(parse_without_models(payload))
+    print(
+        f"Payload com {len(payload) / 1024 / 1024:.1f} MB e {vehicles_count} veículos"
+    )
+    for name, parse in [
+        ("modelos pydantic", parse_with_models),
+        ("colunar", parse_without_models),
+    ]:
+        best_time, peak_memory = measure(parse, payload, repeat=repeat)
+        print(f"{name}: {best_time * 1000:.1f} ms, pico de {peak_memory:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara os parsers da resposta de /Posicao do Olho Vivo"
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=None,
+        help="Arquivo com uma resposta gravada de /Posicao",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Grava a resposta atual de /Posicao em --snapshot antes de comparar",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+    if arguments.record:
+        if arguments.snapshot is None:
+            parser.error("--record precisa de --snapshot")
+        record_snapshot(snapshot_path=arguments.snapshot)
+    benchmark_position_parser(snapshot_path=arguments.snapshot, repeat=arguments.repeat)
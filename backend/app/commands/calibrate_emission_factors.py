@@ -0,0 +1,22 @@
+import logging
+
+from app.services.emission_factor_service import (
+    emission_model,
+    get_emission_factors_path,
+)
+
+
+def calibrate_emission_factors() -> None:
+    """
+    Calibrate the local emission model with MyClimate, see `EmissionModel`.
+    """
+    factors = emission_model.recalibrate()
+    print(
+        f"{len(factors.factors)} fatores de emissão salvos em "
+        f"{get_emission_factors_path()}"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    calibrate_emission_factors()
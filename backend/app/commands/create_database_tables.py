@@ -1,6 +1,8 @@
 from app.core.database import Base, engine
 from app.models import (  # noqa: F401
+    cache_entry,
     daily_line_statistics,
+    gtfs_fingerprint,
     line,
     line_stop,
     stop,
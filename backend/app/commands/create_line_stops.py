@@ -1,82 +1,230 @@
-import csv
+import argparse
 import logging
 import os
-from uuid import UUID
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional
 
-import pandas as pd
-from geodistpy import geodist
-from sqlalchemy import select, update
+import numpy
+from numpy.typing import NDArray
 from tqdm import tqdm as progress_bar
 
-from app.commands.sptrans_static_data import SPTRANS_DATA_PATH
+from app.commands import gtfs_loader
 from app.core.database import SessionLocal
-from app.models import LineModel, LineStopModel, StopModel
-from app.schemas import Point, SPTransLineDirection, SPTransLineStop, SPTransShape
+from app.models import GTFSFingerprintKind, LineModel, LineStopModel
+from app.repositories import gtfs_fingerprint_repository, stop_repository
+from app.repositories.bulk_repository import bulk_upsert
+from app.repositories.line_stop_repository import LineStopRepository
+from app.schemas import SPTransLineDirection
 from app.services import distance_service
 
 logger = logging.getLogger(__name__)
-SHAPES_FILE = os.path.join(SPTRANS_DATA_PATH, "shapes.txt")
-TRIPS_FILE = os.path.join(SPTRANS_DATA_PATH, "trips.txt")
-STOPS_FILE = os.path.join(SPTRANS_DATA_PATH, "stop_times.txt")
-
-
-def load_trips() -> dict[str, str]:
-    mapping: dict[str, str] = {}
-    with open(TRIPS_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            trip_id = row["trip_id"].strip()
-            if trip_id not in mapping:
-                mapping[trip_id] = row["shape_id"]
-            else:
-                logger.warning(f"Trip {trip_id} tem multiples shapes")
-    return mapping
-
-
-def load_shapes() -> dict[str, list[SPTransShape]]:
-    shapes: dict[str, list[SPTransShape]] = {}
-    with open(SHAPES_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            shape_id = row["shape_id"]
-            shapes.setdefault(shape_id, []).append(
-                SPTransShape(
-                    latitude=float(row["shape_pt_lat"]),
-                    longitude=float(row["shape_pt_lon"]),
-                    sequence=int(row["shape_pt_sequence"]),
-                    distance=float(row["shape_dist_traveled"]) / 1000,
-                )
-            )
 
-    # ordenar
-    for sid in shapes:
-        shapes[sid].sort(key=lambda p: p.sequence)
 
-    return shapes
+@dataclass
+class ShapeCursor:
+    """
+    Position in a shape polyline: the segment between the points `segment`
+    and `segment + 1`, and the fraction `t` (between 0 and 1) of that segment.
+    """
+
+    segment: int = 0
+    t: float = 0.0
 
 
-def load_line_stops() -> list[SPTransLineStop]:
+def project_onto_segments(
+    shape_coordinates: NDArray[numpy.float64],
+    first_segment: int,
+    last_segment: int,
+    target: NDArray[numpy.float64],
+    cursor: ShapeCursor,
+) -> tuple[int, float, float]:
     """
-    Load line stops from txt tile and return the list of line stop data.
+    Project `target` onto the shape segments in [`first_segment`,
+    `last_segment`), in a local equirectangular plane around the target,
+    never going back from `cursor`.
+
+    Return the segment with the closest projection (the first one in case of
+    ties), the fraction `t` of the projection in that segment and its
+    distance (in km) to `target`.
     """
-    df = pd.read_csv(
-        STOPS_FILE,
-        usecols=["trip_id", "stop_id", "stop_sequence"],
-        dtype={"trip_id": str, "stop_id": int, "stop_sequence": int},
+    starts = shape_coordinates[first_segment:last_segment]
+    ends = shape_coordinates[first_segment + 1 : last_segment + 1]
+
+    scale = numpy.array([1, numpy.cos(numpy.radians(target[0]))])
+    planar_starts = starts * scale
+    segments = ends * scale - planar_starts
+    offsets = target * scale - planar_starts
+    lengths = numpy.einsum("ij,ij->i", segments, segments)
+    ts = numpy.divide(
+        numpy.einsum("ij,ij->i", offsets, segments),
+        lengths,
+        out=numpy.zeros(len(lengths)),
+        where=lengths > 0,
     )
-    return [
-        SPTransLineStop(
-            trip_id=row["trip_id"],
-            stop_id=row["stop_id"],
-            stop_order=row["stop_sequence"],
+    ts = numpy.clip(ts, 0, 1)
+    if first_segment == cursor.segment:
+        ts[0] = max(ts[0], cursor.t)
+
+    projections = starts * (1 - ts)[:, None] + ends * ts[:, None]
+    errors = distance_service.haversine_distances(projections, target)
+    closest_index = int(numpy.argmin(errors))
+    return (
+        first_segment + closest_index,
+        float(ts[closest_index]),
+        float(errors[closest_index]),
+    )
+
+
+def match_stops_to_shape(
+    shape_coordinates: NDArray[numpy.float64],
+    shape_distances: NDArray[numpy.float64],
+    stops_coordinates: NDArray[numpy.float64],
+    shapes_interval: int,
+    distance_tolerance: float,
+) -> tuple[NDArray[numpy.float64], NDArray[numpy.float64]]:
+    """
+    Walk the stops of a trip, in order, along the shape polyline, projecting
+    each one onto the shape segments ahead of the previous stop.
+
+    Return the distance traveled (in km) until each stop, interpolated in the
+    segment where it was projected, and the distance (in km) between each
+    stop and its projection.
+
+    Parameters:
+    - `shape_coordinates`: Array of shape (n, 2) with the shape points.
+    - `shape_distances`: The distance traveled until each shape point.
+    - `stops_coordinates`: Array of shape (m, 2) with the stops, in order.
+    - `shapes_interval` and `distance_tolerance`: See `create_line_stops`.
+    """
+    distances = numpy.empty(len(stops_coordinates), dtype=numpy.float64)
+    errors = numpy.empty(len(stops_coordinates), dtype=numpy.float64)
+    if len(shape_coordinates) == 1:
+        distances[:] = shape_distances[0]
+        errors[:] = distance_service.haversine_distances(
+            stops_coordinates, shape_coordinates[0]
         )
-        for _, row in df.iterrows()
-    ]
+        return distances, errors
+
+    segments_count = len(shape_coordinates) - 1
+    cursor = ShapeCursor()
+    for stop_index, target in enumerate(stops_coordinates):
+        # The window has `shapes_interval` points ahead of the cursor and only
+        # the new segments are projected when it is expanded
+        window_size = shapes_interval
+        first_segment = cursor.segment
+        best_error = numpy.inf
+        while True:
+            last_segment = min(
+                max(cursor.segment + window_size - 1, first_segment + 1),
+                segments_count,
+            )
+            segment, t, error = project_onto_segments(
+                shape_coordinates=shape_coordinates,
+                first_segment=first_segment,
+                last_segment=last_segment,
+                target=target,
+                cursor=cursor,
+            )
+            if error < best_error:
+                best_segment, best_t, best_error = segment, t, error
+            if best_error <= distance_tolerance or last_segment == segments_count:
+                break
+            first_segment = last_segment
+            window_size += shapes_interval
+
+        cursor = ShapeCursor(segment=best_segment, t=best_t)
+        distances[stop_index] = (
+            shape_distances[best_segment] * (1 - best_t)
+            + shape_distances[best_segment + 1] * best_t
+        )
+        errors[stop_index] = best_error
+    return distances, errors
+
+
+@dataclass(frozen=True)
+class TripLineStopsTask:
+    """
+    The data needed to create the line stops of a single trip, sent to the
+    worker processes.
+
+    - `stop_ids`, `stop_orders` and `stops_coordinates`: The stops of the
+      trip, sorted by stop order.
+    - `shape_coordinates` and `shape_distances`: The shape of the trip, if any.
+    """
+
+    line_id: int
+    stop_ids: NDArray[numpy.int64]
+    stop_orders: NDArray[numpy.int64]
+    stops_coordinates: NDArray[numpy.float64]
+    shape_coordinates: Optional[NDArray[numpy.float64]]
+    shape_distances: Optional[NDArray[numpy.float64]]
+    shapes_interval: int
+    distance_tolerance: float
+
+    def fingerprint(self) -> str:
+        """
+        Return a fingerprint of the data of the task, which only changes when
+        the line stops created by it can change.
+        """
+        return gtfs_loader.fingerprint_arrays(
+            numpy.array([self.line_id]),
+            self.stop_ids,
+            self.stop_orders,
+            self.stops_coordinates,
+            self.shape_coordinates,
+            self.shape_distances,
+            numpy.array([self.shapes_interval, self.distance_tolerance]),
+        )
+
+
+def create_trip_line_stops(task: TripLineStopsTask) -> tuple[list[dict], list[str]]:
+    """
+    Match the stops of a trip to its shape.
+
+    Return the line stop rows to be saved and the warnings to be logged by
+    the caller, since it can run in a worker process.
+    """
+    distances = numpy.zeros(len(task.stop_ids), dtype=numpy.float64)
+    warnings: list[str] = []
+    if task.shape_coordinates is not None and task.shape_distances is not None:
+        distances, errors = match_stops_to_shape(
+            shape_coordinates=task.shape_coordinates,
+            shape_distances=task.shape_distances,
+            stops_coordinates=task.stops_coordinates,
+            shapes_interval=task.shapes_interval,
+            distance_tolerance=task.distance_tolerance,
+        )
+        for stop_id, stop_order, error_distance in zip(
+            task.stop_ids.tolist(), task.stop_orders.tolist(), errors.tolist()
+        ):
+            if error_distance > task.distance_tolerance:
+                warnings.append(
+                    f"O ponto escolhido para representar a parada {stop_id} com "
+                    f"ordem {stop_order} para a linha {task.line_id} está a uma "
+                    f"distância de {error_distance} km dela"
+                )
+
+    # Keyed by the unique constraint, so that a batch never repeats a row
+    line_stops = {
+        stop_order: {
+            "line_id": task.line_id,
+            "stop_id": stop_id,
+            "stop_order": stop_order,
+            "distance_traveled": 0 if stop_order == 1 else distance,
+        }
+        for stop_id, stop_order, distance in zip(
+            task.stop_ids.tolist(), task.stop_orders.tolist(), distances.tolist()
+        )
+    }
+    return list(line_stops.values()), warnings
 
 
 def create_line_stops(
     shapes_interval: int = 30,
     distance_tolerance: float = 0.3,
+    processes: int = 1,
+    incremental: bool = False,
 ) -> None:
     """
     Create line stops from the static SPTrans data.
@@ -84,144 +232,170 @@ def create_line_stops(
     ## Strategy to find closest point on the SPTrans shape
     Every line has a shape related to it where SPTrans files have the tracked points
     of a vehicle when following the route of the line and also the traveled distance
-    until that point. For each stop of the line we would try to find the closest point
-    to our stop in the shape. However, some lines might traverse the same point
-    (or closed to it) in multiple times in a route. To calculate the correct
-    distance we would compare the stop with a consecutive slice of the shape.
-    The base size of this slice is controlled by the parameter `shapes_interval`.
-    Every time we find a closest point for our target stop, the slice would move
-    to the right.
+    until that point. The stops of each trip are walked in order along the shape
+    and each stop is projected onto the closest segment of the shape, interpolating
+    the traveled distance. However, some lines might traverse the same point
+    (or closed to it) in multiple times in a route, so each stop is only compared
+    with the segments ahead of the previous stop, in a window with
+    `shapes_interval` points. See `match_stops_to_shape`.
 
     The parameter `distance_tolerance` will control how much of an error we are
     willing to accept when finding the closest point. If the error is bigger than
-    the tolerance, the slice size will be temporarily increased by `shapes_interval`,
+    the tolerance, the window will be increased by `shapes_interval` points,
     until we find a better point.
+
+    ## Parallelism
+    The trips are independent, so if `processes` is greater than 1 they are
+    matched in a pool with that many worker processes. The results are streamed
+    back, as they are ready, to a single bulk writer.
+
+    ## Incremental import
+    The fingerprint of the data of each trip (its stops, their coordinates
+    and its shape) is stored. If `incremental` is True, only the trips whose
+    fingerprint changed since the last import are matched, replacing all the
+    line stops of their lines, and the line stops of the trips no longer in the
+    data are deleted.
     """
-    sptrans_line_stops = load_line_stops()
+    trips_line_stops = gtfs_loader.load_line_stops()
     session = SessionLocal()
 
-    trip_to_shape_map = load_trips()
-    shape_cache = load_shapes()
-    stop_rows = session.query(StopModel).all()
-    stop_points = {
-        s.id: Point(latitude=s.latitude, longitude=s.longitude) for s in stop_rows
-    }
+    trip_to_shape_map = gtfs_loader.load_trips()
+    shapes = gtfs_loader.load_shapes()
+    stops = stop_repository.get_stops_coordinates(session)
+    stop_ids = numpy.array([stop[0] for stop in stops], dtype=numpy.int64)
+    stops_coordinates = numpy.array(
+        [(stop[1], stop[2]) for stop in stops], dtype=numpy.float64
+    ).reshape(-1, 2)
+    stops_order = numpy.argsort(stop_ids)
+    stop_ids, stops_coordinates = stop_ids[stops_order], stops_coordinates[stops_order]
 
-    existing_line_stop_ids: dict[tuple[int, int], UUID] = {
-        (line_id, stop_order): line_stop_id
-        for line_stop_id, line_id, stop_order in session.execute(
-            select(
-                LineStopModel.id,
-                LineStopModel.line_id,
-                LineStopModel.stop_order,
-            )
-        ).all()
-    }
     existing_lines = session.query(LineModel).all()
     lines_by_trip_id: dict[str, LineModel] = {
         f"{line.name}-{SPTransLineDirection[line.direction].value - 1}": line
         for line in existing_lines
     }
 
-    existing_stop_ids = set(session.execute(select(StopModel.id)).scalars().all())
-
-    line_stops_to_create: list[LineStopModel] = []
-    line_stops_to_update: list[dict] = []
-    non_existing_lines: set[str] = set()
+    tasks_by_trip_id: dict[str, TripLineStopsTask] = {}
     non_existing_stops: set[int] = set()
-
-    for sptrans_line_stop in progress_bar(sptrans_line_stops):
-        trip_id = sptrans_line_stop.trip_id
-        stop_id = sptrans_line_stop.stop_id
-        stop_order = sptrans_line_stop.stop_order
+    for trip_id, trip_line_stops in trips_line_stops:
         if trip_id not in lines_by_trip_id:
-            if trip_id not in non_existing_lines:
-                logger.warning(f"A linha {trip_id} não existe na base de dados")
-                non_existing_lines.add(trip_id)
+            logger.warning(f"A linha {trip_id} não existe na base de dados")
             continue
 
-        line = lines_by_trip_id[trip_id]
-
-        if stop_id not in existing_stop_ids:
+        # Positions (in `stop_ids`) of the stops of the trip
+        trip_stop_ids = trip_line_stops["stop_id"]
+        positions = numpy.minimum(
+            numpy.searchsorted(stop_ids, trip_stop_ids), max(len(stop_ids) - 1, 0)
+        )
+        known = (
+            stop_ids[positions] == trip_stop_ids
+            if len(stop_ids) > 0
+            else numpy.zeros(len(trip_stop_ids), dtype=numpy.bool_)
+        )
+        for stop_id in trip_stop_ids[~known].tolist():
             if stop_id not in non_existing_stops:
                 logger.warning(f"A parada {stop_id} não existe na base de dados")
                 non_existing_stops.add(stop_id)
-            continue
-
-        # ----------- calculates the actual distance ---------------------
-        distance = 0.0
 
         shape_id = trip_to_shape_map.get(trip_id)
-
+        shape = shapes.get(shape_id) if shape_id is not None else None
         if shape_id is None:
             logger.warning(f"A linha {trip_id} não tem shape")
-        elif shape_id not in shape_cache:
+        elif shape is None:
             logger.warning(f"A linha {trip_id} tem uma shape {shape_id} sem dados")
-        else:
-            shape_points = shape_cache[shape_id]
-            target_point = stop_points[stop_id]
-
-            current_interval = shapes_interval
-            closest = None
-            while closest is None:
-                closest = distance_service.find_closest_point(
-                    shape_points[:current_interval], target_point
-                )
-                assert closest is not None
-                error_distance = geodist(
-                    closest.to_tuple(), target_point.to_tuple(), metric="km"
-                )
-                if (
-                    current_interval < len(shape_points)
-                    and error_distance > distance_tolerance
-                ):
-                    # Try again if we could still expand the interval
-                    closest = None
-                    current_interval += shapes_interval
-
-            distance = closest.distance
-            if error_distance > distance_tolerance:
-                logger.warning(
-                    f"O ponto escolhido para representar a parada {stop_id} com ordem "
-                    f"{stop_order} para a linha {line.id} está a "
-                    f"uma distância de {error_distance} km dela"
-                )
-            shape_cache[shape_id] = [
-                point for point in shape_points if point.sequence >= closest.sequence
-            ]
-
-            if stop_order == 1:
-                distance = 0
-
-        line_stop = LineStopModel(
-            line_id=line.id,
-            stop_id=stop_id,
-            stop_order=stop_order,
-            distance_traveled=distance,
+
+        tasks_by_trip_id[trip_id] = TripLineStopsTask(
+            line_id=lines_by_trip_id[trip_id].id,
+            stop_ids=trip_stop_ids[known],
+            stop_orders=trip_line_stops["stop_order"][known],
+            stops_coordinates=stops_coordinates[positions[known]],
+            shape_coordinates=shape["coordinates"] if shape is not None else None,
+            shape_distances=shape["distance"] if shape is not None else None,
+            shapes_interval=shapes_interval,
+            distance_tolerance=distance_tolerance,
         )
-        unique_constraint = (line.id, stop_order)
-        if unique_constraint not in existing_line_stop_ids:
-            line_stops_to_create.append(line_stop)
-        else:
-            line_stop.id = existing_line_stop_ids[unique_constraint]
-            line_stops_to_update.append(line_stop.dict())
-
-    logger.info(
-        f"Criando {len(line_stops_to_create)} paradas-linha na base de dados..."
-    )
 
-    if len(line_stops_to_create) > 0:
-        session.add_all(line_stops_to_create)
-        session.commit()
+    fingerprints = {
+        trip_id: task.fingerprint() for trip_id, task in tasks_by_trip_id.items()
+    }
+    removed_trip_ids: list[str] = []
+    if incremental:
+        diff = gtfs_loader.FingerprintsDiff.compare(
+            stored=gtfs_fingerprint_repository.get_fingerprints(
+                db=session, kind=GTFSFingerprintKind.TRIP
+            ),
+            current=fingerprints,
+        )
+        removed_trip_ids = diff.removed
+        tasks_by_trip_id = {
+            trip_id: tasks_by_trip_id[trip_id] for trip_id in diff.changed
+        }
+        logger.info(
+            f"{len(diff.changed)} viagens alteradas, {len(diff.removed)} removidas"
+        )
 
-    logger.info(
-        f"Atualizando {len(line_stops_to_update)} paradas-linha na base de dados..."
+        # Committed together with the new line stops
+        for task in tasks_by_trip_id.values():
+            LineStopRepository.delete_line_stops(
+                db=session,
+                line_id=task.line_id,
+                keep_stop_orders=task.stop_orders.tolist(),
+            )
+        for trip_id in removed_trip_ids:
+            if trip_id in lines_by_trip_id:
+                LineStopRepository.delete_line_stops(
+                    db=session, line_id=lines_by_trip_id[trip_id].id
+                )
+    tasks = list(tasks_by_trip_id.values())
+
+    def stream_line_stops(results: Iterable[tuple[list[dict], list[str]]]):
+        for line_stops, warnings in progress_bar(results, total=len(tasks)):
+            for warning in warnings:
+                logger.warning(warning)
+            yield from line_stops
+
+    executor = None
+    results: Iterable[tuple[list[dict], list[str]]]
+    if processes > 1:
+        logger.info(f"Processando {len(tasks)} viagens em {processes} processos...")
+        executor = ProcessPoolExecutor(max_workers=processes)
+        results = executor.map(create_trip_line_stops, tasks, chunksize=16)
+    else:
+        results = map(create_trip_line_stops, tasks)
+
+    try:
+        saved_line_stops = bulk_upsert(
+            db=session,
+            model=LineStopModel,
+            rows=stream_line_stops(results),
+            index_elements=["line_id", "stop_order"],
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    logger.info(f"{saved_line_stops} paradas-linha salvas na base de dados")
+
+    gtfs_fingerprint_repository.save_fingerprints(
+        db=session,
+        kind=GTFSFingerprintKind.TRIP,
+        fingerprints={trip_id: fingerprints[trip_id] for trip_id in tasks_by_trip_id},
+    )
+    gtfs_fingerprint_repository.delete_fingerprints(
+        db=session, kind=GTFSFingerprintKind.TRIP, keys=removed_trip_ids
     )
-    if len(line_stops_to_update) > 0:
-        session.execute(update(LineStopModel), line_stops_to_update)
-        session.commit()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cria as paradas-linha do SPTrans")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Processa apenas as viagens alteradas desde a última importação",
+    )
     logging.basicConfig(level=logging.INFO)
-    create_line_stops(shapes_interval=30, distance_tolerance=0.35)
+    create_line_stops(
+        shapes_interval=30,
+        distance_tolerance=0.35,
+        processes=os.cpu_count() or 1,
+        incremental=parser.parse_args().incremental,
+    )
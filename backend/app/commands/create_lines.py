@@ -1,47 +1,146 @@
-import os
+import argparse
+import asyncio
+from dataclasses import dataclass, field
 from typing import Optional
 
-import pandas as pd
-from sqlalchemy import select, update
+import httpx
+from pydantic import ValidationError
+from tenacity import RetryCallState
 from tqdm import tqdm as progress_bar
 
-from app.commands.sptrans_static_data import SPTRANS_DATA_PATH
+from app.commands import gtfs_loader
+from app.core.config import settings
 from app.core.database import SessionLocal
-from app.models import LineDirection, LineModel
-from app.clients import sptrans_client
-from app.schemas import SPTransLineDirection
+from app.core.rate_limiter import AsyncRateLimiter
+from app.models import GTFSFingerprintKind, LineDirection, LineModel
+from app.repositories import gtfs_fingerprint_repository
+from app.repositories.bulk_repository import bulk_upsert
+from app.clients import sptrans_async_client
+from app.schemas import SPTransLine, SPTransLineDirection
 
-FILE_LOCATION = os.path.join(SPTRANS_DATA_PATH, "fare_rules.txt")
 
+@dataclass
+class LinesLookUpReport:
+    """
+    Accounting of the line look ups made in the API.
 
-def create_lines(max_rows: Optional[int] = None) -> None:
+    - `empty_patterns`: Patterns without lines in the API.
+    - `failed_patterns`: Patterns whose look up failed (or whose response was
+      invalid) after all the retries.
+    - `retries`: Total number of retried calls.
     """
-    Create lines from the static SPTrans data.
+
+    empty_patterns: list[str] = field(default_factory=list)
+    failed_patterns: list[str] = field(default_factory=list)
+    retries: int = 0
+
+
+async def look_up_lines(
+    patterns: list[str],
+    max_concurrency: int,
+    max_requests_per_second: float,
+) -> tuple[list[list[SPTransLine]], LinesLookUpReport]:
     """
-    user = sptrans_client.login()
-    df = pd.read_csv(
-        FILE_LOCATION,
-        usecols=["route_id", "fare_id"],
-        dtype={"route_id": str, "fare_id": str},
-        nrows=max_rows,
-    ).fillna("")
-    df = df[df["fare_id"] == "Ônibus"]
+    Look up the lines of each pattern concurrently.
 
-    session = SessionLocal()
-    lines_to_create: list[LineModel] = []
-    lines_to_update: list[dict] = []
-    existing_ids = session.execute(select(LineModel.id)).scalars().all()
-    processed_line_ids: set[int] = set()
-    bar = progress_bar(total=df.shape[0])
-    for _, row in df.iterrows():
-        bar.update(1)
-        pattern: str = row["route_id"]
+    Return the lines found for each pattern, in the same order as `patterns`,
+    and the accounting of the look ups.
+
+    Parameters:
+    - `max_concurrency`: Maximum number of simultaneous calls to the API.
+    - `max_requests_per_second`: Maximum number of calls started per second.
+      If not positive, the rate is not limited.
+    """
+    credentials = await sptrans_async_client.login()
+    report = LinesLookUpReport()
+
+    def count_retry(retry_state: RetryCallState) -> None:
+        report.retries += 1
+
+    get_lines = sptrans_async_client.get_lines.retry_with(  # type: ignore[attr-defined]
+        before_sleep=count_retry
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+    rate_limiter = AsyncRateLimiter(max_per_second=max_requests_per_second)
+    bar = progress_bar(total=len(patterns))
+
+    async def look_up(pattern: str) -> list[SPTransLine]:
+        async with semaphore:
+            await rate_limiter.wait()
+            try:
+                lines = await get_lines(credentials=credentials, pattern=pattern)
+            except (httpx.HTTPError, ValidationError) as error:
+                print(f"Erro ao buscar a linha {pattern} na API do SPTrans: {error}")
+                report.failed_patterns.append(pattern)
+                return []
+            finally:
+                bar.update(1)
 
-        lines = sptrans_client.get_lines(credentials=user, pattern=pattern)
         if len(lines) == 0:
             print(f"A linha {pattern} não tem dados na API do SPTrans")
-            continue
+            report.empty_patterns.append(pattern)
+        return lines
+
+    try:
+        patterns_lines = await asyncio.gather(
+            *(look_up(pattern) for pattern in patterns)
+        )
+    finally:
+        bar.close()
+        await sptrans_async_client.close_client()
+    return patterns_lines, report
+
+
+def create_lines(
+    max_rows: Optional[int] = None,
+    max_concurrency: int = settings.SPTRANS_MAX_CONCURRENT_REQUESTS,
+    max_requests_per_second: float = settings.SPTRANS_MAX_REQUESTS_PER_SECOND,
+    incremental: bool = False,
+) -> None:
+    """
+    Create lines from the static SPTrans data.
+
+    The lines are looked up concurrently in the API, see `look_up_lines`.
 
+    The fingerprint of each route found in the API is stored, so that, if
+    `incremental` is True, only the new routes are looked up. The lines of
+    the routes no longer in the data are kept, since they are referenced by
+    the statistics and the user routes.
+    """
+    df = gtfs_loader.load_fare_rules(max_rows=max_rows)
+    df = df[df["fare_id"] == "Ônibus"]
+    fingerprints = dict(zip(df["route_id"].tolist(), gtfs_loader.fingerprint_rows(df)))
+    session = SessionLocal()
+    removed_patterns: list[str] = []
+    if incremental:
+        diff = gtfs_loader.FingerprintsDiff.compare(
+            stored=gtfs_fingerprint_repository.get_fingerprints(
+                db=session, kind=GTFSFingerprintKind.ROUTE
+            ),
+            current=fingerprints,
+        )
+        removed_patterns = diff.removed if max_rows is None else []
+        df = df[df["route_id"].isin(diff.changed)]
+        print(f"{len(diff.changed)} linhas novas, {len(removed_patterns)} removidas")
+
+    patterns = df["route_id"].tolist()
+    patterns_lines, report = asyncio.run(
+        look_up_lines(
+            patterns=patterns,
+            max_concurrency=max_concurrency,
+            max_requests_per_second=max_requests_per_second,
+        )
+    )
+    print(
+        f"{len(patterns_lines)} linhas buscadas: "
+        f"{len(report.empty_patterns)} sem dados, "
+        f"{len(report.failed_patterns)} com erro, "
+        f"{report.retries} novas tentativas"
+    )
+
+    lines_to_save: list[dict] = []
+    processed_line_ids: set[int] = set()
+    for lines in patterns_lines:
         for line in lines:
             line_name = f"{line.base_name}-{line.operation_mode}"
 
@@ -56,28 +155,37 @@ def create_lines(max_rows: Optional[int] = None) -> None:
                 continue
             processed_line_ids.add(line.id)
 
-            line_model = LineModel(
-                id=line.id,
-                name=line_name,
-                direction=LineDirection(line.direction.name),
-                description=line_desc,
+            lines_to_save.append(
+                {
+                    "id": line.id,
+                    "name": line_name,
+                    "direction": LineDirection(line.direction.name),
+                    "description": line_desc,
+                }
             )
-            if line.id in existing_ids:
-                lines_to_update.append(line_model.dict())
-            else:
-                lines_to_create.append(line_model)
-
-    print(f"Criando {len(lines_to_create)} linhas na base de dados...")
 
-    if len(lines_to_create) > 0:
-        session.add_all(lines_to_create)
-        session.commit()
+    print(f"Salvando {len(lines_to_save)} linhas na base de dados...")
+    bulk_upsert(db=session, model=LineModel, rows=lines_to_save, index_elements=["id"])
 
-    print(f"Atualizando {len(lines_to_update)} linhas na base de dados...")
-    if len(lines_to_update) > 0:
-        session.execute(update(LineModel), lines_to_update)
-        session.commit()
+    # The patterns without lines are looked up again in the next import
+    found_patterns = [
+        pattern for pattern, lines in zip(patterns, patterns_lines) if len(lines) > 0
+    ]
+    gtfs_fingerprint_repository.save_fingerprints(
+        db=session,
+        kind=GTFSFingerprintKind.ROUTE,
+        fingerprints={pattern: fingerprints[pattern] for pattern in found_patterns},
+    )
+    gtfs_fingerprint_repository.delete_fingerprints(
+        db=session, kind=GTFSFingerprintKind.ROUTE, keys=removed_patterns
+    )
 
 
 if __name__ == "__main__":
-    create_lines()
+    parser = argparse.ArgumentParser(description="Cria as linhas do SPTrans")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Busca apenas as linhas novas desde a última importação",
+    )
+    create_lines(incremental=parser.parse_args().incremental)
@@ -1,64 +1,65 @@
-import os
+import argparse
 from typing import Optional
 
-import pandas as pd
-from sqlalchemy import select, update
-from tqdm import tqdm as progress_bar
-
-from app.commands.sptrans_static_data import SPTRANS_DATA_PATH
+from app.commands import gtfs_loader
 from app.core.database import SessionLocal
-from app.models import StopModel
-
-FILE_LOCATION = os.path.join(SPTRANS_DATA_PATH, "stops.txt")
+from app.models import GTFSFingerprintKind, StopModel
+from app.repositories import gtfs_fingerprint_repository, stop_repository
+from app.repositories.bulk_repository import bulk_upsert
 
 
-def create_stops(max_rows: Optional[int] = None) -> None:
+def create_stops(max_rows: Optional[int] = None, incremental: bool = False) -> None:
     """
     Create stops from the static SPTrans data.
+
+    The fingerprint of each stop is stored, so that, if `incremental` is True,
+    only the stops that changed since the last import are saved and the stops
+    no longer in the data are deleted (except the ones of user routes).
+    Deletions are not detected when `max_rows` is given.
     """
-    df = pd.read_csv(
-        FILE_LOCATION,
-        dtype={
-            "stop_id": int,
-            "stop_name": str,
-            "stop_desc": str,
-            "stop_lat": float,
-            "stop_lon": float,
-        },
-        nrows=max_rows,
-    ).fillna("")
+    df = gtfs_loader.load_stops(max_rows=max_rows)
     session = SessionLocal()
-    existing_ids = session.execute(select(StopModel.id)).scalars().all()
-
-    stops_to_create: list[StopModel] = []
-    stops_to_update: list[dict] = []
-
-    bar = progress_bar(total=df.shape[0])
-    for _, row in df.iterrows():
-        bar.update(1)
-        stop = StopModel(
-            id=row["stop_id"],
-            name=row["stop_name"],
-            address=row["stop_desc"],
-            latitude=row["stop_lat"],
-            longitude=row["stop_lon"],
+    fingerprints = dict(
+        zip(df["id"].astype(str).tolist(), gtfs_loader.fingerprint_rows(df))
+    )
+    if incremental:
+        diff = gtfs_loader.FingerprintsDiff.compare(
+            stored=gtfs_fingerprint_repository.get_fingerprints(
+                db=session, kind=GTFSFingerprintKind.STOP
+            ),
+            current=fingerprints,
         )
-        if stop.id in existing_ids:
-            stops_to_update.append(stop.dict())
-        else:
-            stops_to_create.append(stop)
-
-    print(f"Criando {len(stops_to_create)} paradas na base de dados...")
+        changed_keys = diff.changed
+        removed_keys = diff.removed if max_rows is None else []
+        df = df[df["id"].isin([int(key) for key in changed_keys])]
+        print(f"{len(changed_keys)} paradas alteradas, {len(removed_keys)} removidas")
+    else:
+        changed_keys, removed_keys = list(fingerprints), []
 
-    if len(stops_to_create) > 0:
-        session.add_all(stops_to_create)
-        session.commit()
+    stops_to_save = df.to_dict("records")
+    print(f"Salvando {len(stops_to_save)} paradas na base de dados...")
+    bulk_upsert(db=session, model=StopModel, rows=stops_to_save, index_elements=["id"])
 
-    print(f"Atualizando {len(stops_to_update)} paradas na base de dados...")
-    if len(stops_to_update) > 0:
-        session.execute(update(StopModel), stops_to_update)
-        session.commit()
+    if len(removed_keys) > 0:
+        deleted_stop_ids = stop_repository.delete_stops(
+            db=session, stop_ids=[int(key) for key in removed_keys]
+        )
+        print(f"{len(deleted_stop_ids)} paradas removidas da base de dados")
+    gtfs_fingerprint_repository.save_fingerprints(
+        db=session,
+        kind=GTFSFingerprintKind.STOP,
+        fingerprints={key: fingerprints[key] for key in changed_keys},
+    )
+    gtfs_fingerprint_repository.delete_fingerprints(
+        db=session, kind=GTFSFingerprintKind.STOP, keys=removed_keys
+    )
 
 
 if __name__ == "__main__":
-    create_stops()
+    parser = argparse.ArgumentParser(description="Cria as paradas do SPTrans")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Salva apenas as paradas alteradas desde a última importação",
+    )
+    create_stops(incremental=parser.parse_args().incremental)
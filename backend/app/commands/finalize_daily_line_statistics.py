@@ -0,0 +1,60 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.constants import SAO_PAULO_ZONE
+from app.core.database import SessionLocal
+from app.repositories import daily_line_statistics_repository
+from app.schemas import VehicleType
+from app.services import emission_factor_service
+
+logger = logging.getLogger(__name__)
+
+
+def finalize_daily_line_statistics(
+    db: Session, maximum_date: Optional[date] = None
+) -> int:
+    """
+    Calculate and store the emission of the daily line statistics that are no
+    longer updated, so that the emission endpoints do not need to call
+    MyClimate for them. Return the number of finalized statistics.
+
+    Parameters:
+    - `maximum_date`: Last date to be finalized. If None, yesterday (in São
+      Paulo) will be used.
+    """
+    if maximum_date is None:
+        maximum_date = datetime.now(tz=SAO_PAULO_ZONE).date() - timedelta(days=1)
+
+    statistics = daily_line_statistics_repository.get_unfinalized_daily_line_statistics(
+        db=db, maximum_date=maximum_date
+    ).all()
+    if len(statistics) == 0:
+        logger.info("Nenhuma estatística diária para finalizar")
+        return 0
+
+    emissions = emission_factor_service.bulk_calculate_carbon_emission(
+        distances=[statistic.distance_traveled for statistic in statistics],
+        vehicle_type=VehicleType.BUS,
+    )
+    finalized = daily_line_statistics_repository.save_daily_line_emissions(
+        db=db,
+        statistics=(
+            {
+                "line_id": statistic.line_id,
+                "date": statistic.date,
+                "distance_traveled": statistic.distance_traveled,
+                "emission": emission,
+            }
+            for statistic, emission in zip(statistics, emissions, strict=True)
+        ),
+    )
+    logger.info(f"{finalized} estatísticas diárias finalizadas até {maximum_date}")
+    return finalized
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    finalize_daily_line_statistics(db=SessionLocal())
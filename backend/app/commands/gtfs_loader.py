@@ -0,0 +1,419 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Mapping, Optional
+
+import numpy
+import pandas as pd
+from numpy.typing import NDArray
+
+from app.commands.sptrans_static_data import SPTRANS_DATA_PATH
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+SHAPES_FILE = os.path.join(SPTRANS_DATA_PATH, "shapes.txt")
+TRIPS_FILE = os.path.join(SPTRANS_DATA_PATH, "trips.txt")
+STOPS_FILE = os.path.join(SPTRANS_DATA_PATH, "stops.txt")
+STOP_TIMES_FILE = os.path.join(SPTRANS_DATA_PATH, "stop_times.txt")
+FARE_RULES_FILE = os.path.join(SPTRANS_DATA_PATH, "fare_rules.txt")
+
+# Must be increased whenever the arrays stored in the snapshots change, so
+# that the snapshots of previous versions are not used
+SNAPSHOT_VERSION = 1
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Return the SHA-256 of the content of the file.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_snapshots_path(file_path: str) -> str:
+    """
+    Return the directory of the snapshots of the file.
+    """
+    return settings.GTFS_SNAPSHOTS_PATH or os.path.join(
+        os.path.dirname(file_path), ".gtfs_snapshots"
+    )
+
+
+def load_snapshot(
+    file_path: str, name: str, build: Callable[[], dict[str, NDArray]]
+) -> dict[str, NDArray]:
+    """
+    Return the arrays built by `build` from the file, using a snapshot.
+
+    The snapshot is a directory with a `.npy` file per array, keyed by the
+    hash of the content of the file, so it is only built again when the file
+    changes. The arrays of an existing snapshot are memory-mapped (read-only)
+    instead of read. Snapshots of other contents of the file are removed.
+
+    Parameters:
+    - `name`: Identifies the arrays among the snapshots of the directory.
+    - `build`: Parses the file. The arrays can not have the object dtype.
+    """
+    if not settings.ENABLE_GTFS_SNAPSHOTS:
+        return build()
+
+    snapshots_path = get_snapshots_path(file_path)
+    snapshot_name = f"{name}-v{SNAPSHOT_VERSION}-{file_digest(file_path)}"
+    snapshot_path = os.path.join(snapshots_path, snapshot_name)
+    if os.path.isdir(snapshot_path):
+        return {
+            file_name.removesuffix(".npy"): numpy.asarray(
+                numpy.load(os.path.join(snapshot_path, file_name), mmap_mode="r")
+            )
+            for file_name in os.listdir(snapshot_path)
+        }
+
+    arrays = build()
+    os.makedirs(snapshots_path, exist_ok=True)
+    # Written in a temporary directory and renamed, so that a concurrent
+    # import never reads a partial snapshot
+    temporary_path = tempfile.mkdtemp(prefix=".tmp-", dir=snapshots_path)
+    try:
+        for array_name, array in arrays.items():
+            numpy.save(
+                os.path.join(temporary_path, f"{array_name}.npy"),
+                array,
+                allow_pickle=False,
+            )
+        os.rename(temporary_path, snapshot_path)
+    except OSError:
+        # Another process saved the same snapshot first
+        shutil.rmtree(temporary_path, ignore_errors=True)
+    else:
+        logger.info(f"Snapshot {snapshot_name} salvo em {snapshots_path}")
+
+    for other_name in os.listdir(snapshots_path):
+        if other_name.startswith(f"{name}-v") and other_name != snapshot_name:
+            shutil.rmtree(os.path.join(snapshots_path, other_name), ignore_errors=True)
+    return arrays
+
+
+@dataclass(frozen=True)
+class GroupedColumns:
+    """
+    Columns of a GTFS file sorted by a key, so that the rows of each key are
+    a contiguous slice of every column. The groups are returned as views of
+    the columns, without copies.
+
+    - `keys`: The distinct keys, in sorted order.
+    - `offsets`: The rows of the i-th key are `offsets[i]:offsets[i + 1]`.
+    - `columns`: The columns, all with the same number of rows.
+    """
+
+    keys: NDArray[numpy.object_]
+    offsets: NDArray[numpy.int64]
+    columns: dict[str, NDArray]
+    _positions: dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self, "_positions", {key: index for index, key in enumerate(self.keys)}
+        )
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame, key: str, order_by: str) -> "GroupedColumns":
+        """
+        Group the rows of `df` by the `key` column, sorting each group by the
+        `order_by` column. The other columns are kept.
+        """
+        df = df.sort_values([key, order_by], kind="stable")
+        sorted_keys = df[key].to_numpy(dtype=numpy.object_)
+        boundaries = numpy.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        starts = numpy.concatenate(([0], boundaries)) if len(df) > 0 else boundaries
+        return GroupedColumns(
+            keys=sorted_keys[starts],
+            offsets=numpy.append(starts, len(df)).astype(numpy.int64),
+            columns={
+                column: df[column].to_numpy() for column in df.columns if column != key
+            },
+        )
+
+    def to_arrays(self) -> dict[str, NDArray]:
+        """
+        Return the arrays to be stored in a snapshot, see `from_arrays`.
+        """
+        return {
+            "keys": numpy.asarray(self.keys, dtype=numpy.str_),
+            "offsets": self.offsets,
+            **{f"column_{name}": column for name, column in self.columns.items()},
+        }
+
+    @staticmethod
+    def from_arrays(arrays: dict[str, NDArray]) -> "GroupedColumns":
+        """
+        Rebuild the columns from the arrays returned by `to_arrays`.
+        """
+        return GroupedColumns(
+            keys=arrays["keys"].astype(numpy.object_),
+            offsets=arrays["offsets"],
+            columns={
+                name.removeprefix("column_"): column
+                for name, column in arrays.items()
+                if name.startswith("column_")
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._positions
+
+    def get(self, key: str) -> Optional[dict[str, NDArray]]:
+        """
+        Return the columns of the given key, or None if it does not exist.
+        """
+        position = self._positions.get(key)
+        if position is None:
+            return None
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return {name: column[start:end] for name, column in self.columns.items()}
+
+    def __iter__(self) -> Iterator[tuple[str, dict[str, NDArray]]]:
+        for position, key in enumerate(self.keys):
+            start, end = self.offsets[position], self.offsets[position + 1]
+            yield key, {
+                name: column[start:end] for name, column in self.columns.items()
+            }
+
+
+def load_trips(file_path: str = TRIPS_FILE) -> dict[str, str]:
+    """
+    Return the shape id of each trip id.
+    """
+
+    def read_trips() -> dict[str, NDArray]:
+        df = pd.read_csv(
+            file_path,
+            usecols=["trip_id", "shape_id"],
+            dtype={"trip_id": str, "shape_id": str},
+        )
+        df["trip_id"] = df["trip_id"].str.strip()
+        duplicated = df["trip_id"].duplicated()
+        for trip_id in df.loc[duplicated, "trip_id"].unique():
+            logger.warning(f"Trip {trip_id} tem multiples shapes")
+        df = df[~duplicated]
+        return {
+            "trip_id": df["trip_id"].to_numpy(dtype=numpy.str_),
+            "shape_id": df["shape_id"].to_numpy(dtype=numpy.str_),
+        }
+
+    arrays = load_snapshot(file_path, name="trips", build=read_trips)
+    return dict(zip(arrays["trip_id"].tolist(), arrays["shape_id"].tolist()))
+
+
+def load_shapes(file_path: str = SHAPES_FILE) -> GroupedColumns:
+    """
+    Load the shapes, grouped by shape id and sorted by sequence.
+
+    The columns of each shape are:
+    - `coordinates`: Array of shape (n, 2) with the (latitude, longitude).
+    - `distance`: The distance traveled (in km) until each point.
+    - `sequence`: The sequence of each point.
+    """
+
+    def read_shapes() -> dict[str, NDArray]:
+        df = pd.read_csv(
+            file_path,
+            usecols=[
+                "shape_id",
+                "shape_pt_lat",
+                "shape_pt_lon",
+                "shape_pt_sequence",
+                "shape_dist_traveled",
+            ],
+            dtype={
+                "shape_id": str,
+                "shape_pt_lat": numpy.float64,
+                "shape_pt_lon": numpy.float64,
+                "shape_pt_sequence": numpy.int64,
+                "shape_dist_traveled": numpy.float64,
+            },
+        )
+        df = df.rename(
+            columns={
+                "shape_pt_lat": "latitude",
+                "shape_pt_lon": "longitude",
+                "shape_pt_sequence": "sequence",
+                "shape_dist_traveled": "distance",
+            }
+        )
+        df["distance"] /= 1000
+        return shapes_from_frame(df).to_arrays()
+
+    return GroupedColumns.from_arrays(
+        load_snapshot(file_path, name="shapes", build=read_shapes)
+    )
+
+
+def shapes_from_frame(df: pd.DataFrame) -> GroupedColumns:
+    """
+    Group the shape points of `df`, with the columns `shape_id`, `latitude`,
+    `longitude`, `sequence` and `distance` (in km). See `load_shapes`.
+    """
+    grouped = GroupedColumns.from_frame(df, key="shape_id", order_by="sequence")
+    return GroupedColumns(
+        keys=grouped.keys,
+        offsets=grouped.offsets,
+        columns={
+            "coordinates": numpy.column_stack(
+                (grouped.columns["latitude"], grouped.columns["longitude"])
+            ).astype(numpy.float64),
+            "distance": grouped.columns["distance"].astype(numpy.float64),
+            "sequence": grouped.columns["sequence"].astype(numpy.int64),
+        },
+    )
+
+
+def load_line_stops(file_path: str = STOP_TIMES_FILE) -> GroupedColumns:
+    """
+    Load the stops of each trip, grouped by trip id and sorted by stop order.
+
+    The columns of each trip are `stop_id` and `stop_order`.
+    """
+
+    def read_line_stops() -> dict[str, NDArray]:
+        df = pd.read_csv(
+            file_path,
+            usecols=["trip_id", "stop_id", "stop_sequence"],
+            dtype={
+                "trip_id": str,
+                "stop_id": numpy.int64,
+                "stop_sequence": numpy.int64,
+            },
+        ).rename(columns={"stop_sequence": "stop_order"})
+        return GroupedColumns.from_frame(
+            df, key="trip_id", order_by="stop_order"
+        ).to_arrays()
+
+    return GroupedColumns.from_arrays(
+        load_snapshot(file_path, name="line_stops", build=read_line_stops)
+    )
+
+
+def load_stops(
+    file_path: str = STOPS_FILE, max_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Load the stops, with the columns named as in `StopModel`.
+
+    Parameters:
+    - `max_rows`: If not None, only load the first `max_rows` stops.
+    """
+
+    def read_stops() -> dict[str, NDArray]:
+        df = pd.read_csv(
+            file_path,
+            dtype={
+                "stop_id": numpy.int64,
+                "stop_name": str,
+                "stop_desc": str,
+                "stop_lat": numpy.float64,
+                "stop_lon": numpy.float64,
+            },
+        ).fillna("")
+        return {
+            "id": df["stop_id"].to_numpy(),
+            "name": df["stop_name"].to_numpy(dtype=numpy.str_),
+            "address": df["stop_desc"].to_numpy(dtype=numpy.str_),
+            "latitude": df["stop_lat"].to_numpy(),
+            "longitude": df["stop_lon"].to_numpy(),
+        }
+
+    arrays = load_snapshot(file_path, name="stops", build=read_stops)
+    return pd.DataFrame(
+        {
+            column: arrays[column][:max_rows]
+            for column in ["id", "name", "address", "latitude", "longitude"]
+        }
+    )
+
+
+def load_fare_rules(
+    file_path: str = FARE_RULES_FILE, max_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Load the `route_id` and `fare_id` of the fare rules.
+
+    Parameters:
+    - `max_rows`: If not None, only load the first `max_rows` fare rules.
+    """
+
+    def read_fare_rules() -> dict[str, NDArray]:
+        df = pd.read_csv(
+            file_path,
+            usecols=["route_id", "fare_id"],
+            dtype={"route_id": str, "fare_id": str},
+        ).fillna("")
+        return {
+            "route_id": df["route_id"].to_numpy(dtype=numpy.str_),
+            "fare_id": df["fare_id"].to_numpy(dtype=numpy.str_),
+        }
+
+    arrays = load_snapshot(file_path, name="fare_rules", build=read_fare_rules)
+    return pd.DataFrame(
+        {column: arrays[column][:max_rows] for column in ["route_id", "fare_id"]}
+    )
+
+
+@dataclass(frozen=True)
+class FingerprintsDiff:
+    """
+    Keys of a GTFS file that changed since the last import.
+
+    - `changed`: Keys that are new or whose fingerprint changed.
+    - `removed`: Stored keys that are no longer in the file.
+    """
+
+    changed: list[str]
+    removed: list[str]
+
+    @staticmethod
+    def compare(
+        stored: Mapping[str, str], current: Mapping[str, str]
+    ) -> "FingerprintsDiff":
+        """
+        Compare the stored fingerprints with the ones of the current file.
+        """
+        return FingerprintsDiff(
+            changed=[
+                key
+                for key, fingerprint in current.items()
+                if stored.get(key) != fingerprint
+            ],
+            removed=[key for key in stored if key not in current],
+        )
+
+
+def fingerprint_rows(df: pd.DataFrame) -> list[str]:
+    """
+    Return a fingerprint of the content of each row of `df`.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return [f"{value:016x}" for value in hashes.tolist()]
+
+
+def fingerprint_arrays(*arrays: Optional[NDArray]) -> str:
+    """
+    Return a fingerprint of the content of the arrays.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        if array is None:
+            digest.update(b"None")
+            continue
+        array = numpy.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
@@ -1,123 +1,89 @@
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Sequence, cast
+from typing import Mapping, Optional
 
+import numpy
 import schedule
-from geodistpy import geodist
 from requests.cookies import RequestsCookieJar
-from sqlalchemy import update
-from tqdm import tqdm as progress_bar
 
 from app.constants import SAO_PAULO_ZONE
 from app.core.database import SessionLocal
-from app.models import DailyLineStatisticsModel, LineModel, VehicleModel
 from app.clients import sptrans_client
-from app.schemas import SPTransLineVehiclesResponse
+from app.commands.finalize_daily_line_statistics import (
+    finalize_daily_line_statistics,
+)
+from app.repositories import daily_line_statistics_repository
+from app.repositories.line_repository import line_id_cache
+from app.services import vehicle_position_service
+from app.services.vehicle_position_service import (
+    VehiclePositions,
+    VehiclePositionStore,
+)
 
 logger = logging.getLogger(__name__)
 
 MAXIMUM_ELAPSED_TIME_TO_UPDATE = timedelta(minutes=10)
+VEHICLES_FLUSH_INTERVAL = timedelta(minutes=1)
+FINALIZATION_INTERVAL = timedelta(hours=1)
 
 
 def update_vehicle_positions(
-    lines_vehicles: Sequence[SPTransLineVehiclesResponse],
+    positions: VehiclePositions,
+    line_names: Optional[Mapping[int, str]] = None,
+    store: Optional[VehiclePositionStore] = None,
 ) -> dict[int, float]:
     """
     Update the vehicle positions and return the difference in distance traveled
     for each line.
+
+    Parameters:
+    - `positions`: The current positions, in the order returned by the API.
+    - `line_names`: Names of the lines, only used in the logs.
+    - `store`: Resident store with the last known positions. If None, the
+      previous positions will be loaded from the database and the new ones
+      will be written back immediately.
     """
-    logger.info(f"Analisando {len(lines_vehicles)} linhas com veículos...")
+    line_ids = numpy.unique(positions.line_ids).tolist()
+    logger.info(f"Analisando {len(line_ids)} linhas com veículos...")
 
     session = SessionLocal()
-    vehicles_ids: list[int] = []
-
-    for line_vehicles in lines_vehicles:
-        vehicles_ids.extend(vehicle.id for vehicle in line_vehicles.vehicles)
+    unknown_line_ids = [
+        line_id
+        for line_id in line_ids
+        if not line_id_cache.contains(db=session, line_id=line_id)
+    ]
+    for line_id in unknown_line_ids:
+        line_name = (line_names or {}).get(line_id)
+        logger.info(
+            f"A linha {line_id} com nome {line_name} não existe "
+            "na base de dados. Seus veículos serão ignorados"
+        )
 
-    database_vehicles = {
-        vehicle.id: vehicle
-        for vehicle in session.query(VehicleModel).filter(
-            VehicleModel.id.in_(vehicles_ids)
+    raw_positions = positions.take(~numpy.isin(positions.line_ids, unknown_line_ids))
+    positions = vehicle_position_service.deduplicate_positions(raw_positions)
+    if len(positions) < len(raw_positions):
+        logger.warning(
+            f"{len(raw_positions) - len(positions)} ônibus apareceram duplicados "
+            "e foram ignorados"
         )
-    }
-
-    vehicles_to_create: list[VehicleModel] = []
-    vehicles_to_update: list[dict] = []
-    processed_vehicles: dict[int, VehicleModel] = {}
-    delta_distances: dict[int, float] = {}
-
-    for line_vehicles in progress_bar(lines_vehicles):
-        line_id = line_vehicles.line_id
-        if session.query(LineModel).filter_by(id=line_id).first() is None:
-            logger.info(
-                f"A linha {line_id} com nome {line_vehicles.line_name} não existe "
-                "na base de dados. Seus veículos serão ignorados"
-            )
-            continue
-
-        for vehicle in line_vehicles.vehicles:
-            vehicle_model = VehicleModel(
-                id=vehicle.id,
-                latitude=vehicle.latitude,
-                longitude=vehicle.longitude,
-                line_id=line_id,
-                updated_at=vehicle.updated_at,
-            )
-            if vehicle.id in processed_vehicles:
-                other_line_id = processed_vehicles[vehicle.id].line_id
-                if vehicle.id != other_line_id:
-                    logger.warning(
-                        f"O ônibus {vehicle.id} apareceu para a linha {other_line_id}. "
-                        f"Será ignorado para a linha {line_id}"
-                    )
-                    continue
-                else:
-                    logger.warning(
-                        f"O ônibus {vehicle.id} apareceu duplicado na linha {line_id}"
-                    )
-                    continue
-
-            processed_vehicles[vehicle.id] = vehicle_model
-
-            if vehicle.id not in database_vehicles:
-                vehicles_to_create.append(vehicle_model)
-            else:
-                previous_updated_at = database_vehicles[vehicle.id].updated_at
-                elapsed_time = vehicle.updated_at - previous_updated_at
-                if (
-                    elapsed_time <= MAXIMUM_ELAPSED_TIME_TO_UPDATE
-                    and previous_updated_at != vehicle.updated_at
-                    and line_id == database_vehicles[vehicle.id].line_id
-                ):
-                    if line_id not in delta_distances:
-                        delta_distances[line_id] = 0
-
-                    old_position = (
-                        database_vehicles[vehicle.id].latitude,
-                        database_vehicles[vehicle.id].longitude,
-                    )
-                    new_position = (vehicle.latitude, vehicle.longitude)
-                    delta_distances[line_id] += cast(
-                        float,
-                        geodist(
-                            old_position,
-                            new_position,
-                            metric="km",
-                        ),
-                    )
-                vehicles_to_update.append(vehicle_model.dict())
-
-    logger.info(f"Criando {len(vehicles_to_create)} veículos na base de dados...")
-
-    if len(vehicles_to_create) > 0:
-        session.add_all(vehicles_to_create)
-        session.commit()
-
-    logger.info(f"Atualizando {len(vehicles_to_update)} veículos na base de dados...")
-    if len(vehicles_to_update) > 0:
-        session.execute(update(VehicleModel), vehicles_to_update)
-        session.commit()
+
+    if store is None:
+        store = VehiclePositionStore(flush_interval=timedelta(0))
+        store.warm_up(db=session, vehicle_ids=positions.vehicle_ids.tolist())
+
+    previous_indexes = vehicle_position_service.match_previous_positions(
+        current=positions, previous=store.positions
+    )
+    delta_distances = vehicle_position_service.calculate_delta_distances(
+        current=positions,
+        previous=store.positions,
+        previous_indexes=previous_indexes,
+        maximum_elapsed_time=MAXIMUM_ELAPSED_TIME_TO_UPDATE,
+    )
+
+    store.update(positions)
+    store.flush(db=session)
 
     return delta_distances
 
@@ -125,57 +91,41 @@ def update_vehicle_positions(
 def update_daily_line_statistics(
     credentials: RequestsCookieJar,
     raise_exception: bool = True,
+    store: Optional[VehiclePositionStore] = None,
 ) -> None:
     """
     Update the daily line statistics of the vehicles currently moving.
+
+    Parameters:
+    - `store`: Resident store with the last known vehicle positions, see
+      `update_vehicle_positions`.
     """
     start_time = time.perf_counter()
     try:
-        lines_vehicles = sptrans_client.get_live_vehicles_positions(
+        payload = sptrans_client.get_live_vehicles_positions_payload(
             credentials=credentials
-        ).lines_vehicles
+        )
+        positions, line_names = vehicle_position_service.parse_live_positions(payload)
 
-        lines_statistics = update_vehicle_positions(lines_vehicles)
+        lines_statistics = update_vehicle_positions(
+            positions, line_names=line_names, store=store
+        )
 
         session = SessionLocal()
         today = datetime.now(tz=SAO_PAULO_ZONE).date()
 
-        database_statistics = {
-            line_statistics.line_id: line_statistics
-            for line_statistics in session.query(DailyLineStatisticsModel)
-            .filter_by(date=today)
-            .filter(DailyLineStatisticsModel.line_id.in_(lines_statistics.keys()))
-        }
-        statistics_to_create: list[VehicleModel] = []
-        statistics_to_update: list[dict] = []
-        for line_id, distance_traveled in lines_statistics.items():
-            if line_id in database_statistics:
-                distance_traveled += database_statistics[line_id].distance_traveled
-            statistics_model = DailyLineStatisticsModel(
-                line_id=line_id,
-                date=today,
-                distance_traveled=distance_traveled,
-            )
-
-            if line_id not in database_statistics:
-                statistics_to_create.append(statistics_model)
-            else:
-                statistics_to_update.append(statistics_model.dict())
+        statistics_to_increment = [
+            {"line_id": line_id, "date": today, "distance_traveled": distance}
+            for line_id, distance in lines_statistics.items()
+        ]
 
         logger.info(
-            f"Criando {len(statistics_to_create)} estatísticas na base de dados..."
+            f"Incrementando {len(statistics_to_increment)} estatísticas "
+            "na base de dados..."
         )
-
-        if len(statistics_to_create) > 0:
-            session.add_all(statistics_to_create)
-            session.commit()
-
-        logger.info(
-            f"Atualizando {len(statistics_to_update)} estatísticas na base de dados..."
+        daily_line_statistics_repository.increment_daily_line_statistics(
+            db=session, statistics=statistics_to_increment
         )
-        if len(statistics_to_update) > 0:
-            session.execute(update(DailyLineStatisticsModel), statistics_to_update)
-            session.commit()
 
         elapsed_time = time.perf_counter() - start_time
         logger.info(f"O cron terminou depois de {elapsed_time:.2f} segundos")
@@ -195,6 +145,12 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     MAIN_TAG = "main"
 
+    vehicle_position_store = VehiclePositionStore(
+        flush_interval=VEHICLES_FLUSH_INTERVAL
+    )
+    vehicle_position_store.warm_up(db=SessionLocal())
+    logger.info(f"{len(vehicle_position_store)} veículos carregados na memória")
+
     def reschedule_main_job() -> None:
         logger.info("Reagendando job com novas credenciais de SPTrans")
         schedule.clear(MAIN_TAG)
@@ -202,14 +158,28 @@ if __name__ == "__main__":
             update_daily_line_statistics,
             credentials=sptrans_client.login(),
             raise_exception=False,
+            store=vehicle_position_store,
         ).tag(MAIN_TAG)
 
+    def finalize_job() -> None:
+        try:
+            finalize_daily_line_statistics(db=SessionLocal())
+        except Exception:
+            logger.exception("A finalização das estatísticas diárias falhou")
+
     update_daily_line_statistics(
-        credentials=sptrans_client.login(), raise_exception=False
+        credentials=sptrans_client.login(),
+        raise_exception=False,
+        store=vehicle_position_store,
     )
     reschedule_main_job()
     schedule.every(10).minutes.do(reschedule_main_job)
+    finalize_job()
+    schedule.every(int(FINALIZATION_INTERVAL.total_seconds())).seconds.do(finalize_job)
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    try:
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    finally:
+        vehicle_position_store.flush(db=SessionLocal(), force=True)
@@ -1,3 +1,8 @@
+import os
 from zoneinfo import ZoneInfo
 
 SAO_PAULO_ZONE = ZoneInfo("America/Sao_Paulo")
+
+# Directory of the backend, against which the relative paths of the settings
+# are resolved
+BACKEND_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
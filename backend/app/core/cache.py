@@ -0,0 +1,223 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Callable,
+    Generic,
+    Hashable,
+    Iterable,
+    Mapping,
+    Optional,
+    Protocol,
+    TypeVar,
+)
+
+from sqlalchemy.orm import Session
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheMetrics:
+    """
+    Counters of the lookups of a cache.
+
+    - `hits`: Keys found in memory.
+    - `backend_hits`: Keys not in memory, but found in the backend.
+    - `misses`: Keys that were not found.
+    """
+
+    hits: int = 0
+    backend_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.backend_hits + self.misses
+        return (self.hits + self.backend_hits) / lookups if lookups > 0 else 0
+
+
+class CacheBackend(Protocol[K, V]):
+    """
+    Persistent tier of a `LRUCache`, shared between processes.
+    """
+
+    def get_many(
+        self, keys: Iterable[K], ttl: Optional[timedelta]
+    ) -> dict[K, tuple[V, datetime]]:
+        """
+        Return the stored value of each given key and when it was stored,
+        ignoring the ones older than `ttl`. The unknown keys are ignored.
+        """
+        ...
+
+    def set_many(self, items: Mapping[K, V], ttl: Optional[timedelta]) -> None:
+        """
+        Store the given values. The values older than `ttl` may be deleted.
+        """
+        ...
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe in-process cache, which keeps up to `max_size` values,
+    discarding the least recently used ones, and forgets the values older
+    than `ttl`. If a `backend` is given, the keys missing in memory are
+    looked up there and every value is stored there as well.
+
+    Every cache is registered by its `name`, see `get_caches_metrics`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        ttl: Optional[timedelta] = None,
+        backend: Optional[CacheBackend[K, V]] = None,
+    ) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self.metrics = CacheMetrics()
+        self._values: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def clear(self) -> None:
+        """
+        Forget all the values in memory and reset the metrics. The backend is
+        not changed.
+        """
+        with self._lock:
+            self._values.clear()
+            self.metrics = CacheMetrics()
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and (
+            time.monotonic() - stored_at >= self.ttl.total_seconds()
+        )
+
+    def _remember(self, key: K, value: V, stored_at: Optional[float] = None) -> None:
+        self._values[key] = (
+            value,
+            time.monotonic() if stored_at is None else stored_at,
+        )
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def get_many(self, keys: Iterable[K]) -> dict[K, V]:
+        """
+        Return the cached values of the given keys. The missing keys are
+        not in the result.
+        """
+        found: dict[K, V] = {}
+        missing: list[K] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                item = self._values.get(key)
+                if item is not None and not self._is_expired(item[1]):
+                    self._values.move_to_end(key)
+                    found[key] = item[0]
+                    self.metrics.hits += 1
+                else:
+                    self._values.pop(key, None)
+                    missing.append(key)
+
+        entries: dict[K, tuple[V, datetime]] = {}
+        if self.backend is not None and len(missing) > 0:
+            entries = self.backend.get_many(missing, ttl=self.ttl)
+        stored: dict[K, V] = {}
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for key, (value, created_at) in entries.items():
+                # The value keeps its age in the backend, so that it expires
+                # together with the stored one
+                stored_at = time.monotonic() - (now - created_at).total_seconds()
+                if not self._is_expired(stored_at):
+                    self._remember(key, value, stored_at=stored_at)
+                    stored[key] = value
+            self.metrics.backend_hits += len(stored)
+            self.metrics.misses += len(missing) - len(stored)
+        return found | stored
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Return the cached value of the key, or None if it is missing.
+        """
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Mapping[K, V]) -> None:
+        """
+        Cache the given values.
+        """
+        if len(items) == 0:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+        if self.backend is not None:
+            self.backend.set_many(items, ttl=self.ttl)
+
+    def set(self, key: K, value: V) -> None:
+        """
+        Cache the value of the key.
+        """
+        self.set_many({key: value})
+
+
+caches: dict[str, LRUCache] = {}
+
+
+class ResidentCache(Generic[V]):
+    """
+    Value kept in the process (e.g. an index), built from the database by
+    `builder` and built again when it is older than `ttl`, so that the changes
+    made by other processes are eventually seen.
+    """
+
+    def __init__(self, builder: Callable[[Session], V], ttl: timedelta) -> None:
+        self.builder = builder
+        self.ttl = ttl
+        self._value: Optional[V] = None
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """
+        Forget the built value, forcing a rebuild on the next lookup.
+        """
+        with self._lock:
+            self._value = None
+            self._built_at = None
+
+    def get(self, db: Session) -> V:
+        """
+        Return the value, building it if needed.
+        """
+        with self._lock:
+            if (
+                self._value is None
+                or self._built_at is None
+                or time.monotonic() - self._built_at >= self.ttl.total_seconds()
+            ):
+                self._value = self.builder(db)
+                self._built_at = time.monotonic()
+            return self._value
+
+
+def get_caches_metrics() -> dict[str, dict]:
+    """
+    Return the size and the metrics of every cache, by name.
+    """
+    return {
+        name: {"size": len(cache), **asdict(cache.metrics)}
+        for name, cache in caches.items()
+    }
@@ -5,18 +5,44 @@ class Settings(BaseSettings):
     # Olho Vivo
     SPTRANS_PREFIX_URL: str = ""
     SPTRANS_API_TOKEN: str = ""
+    SPTRANS_TIMEOUT: float = 10
+    SPTRANS_MAX_CONNECTIONS: int = 20
+    SPTRANS_MAX_CONCURRENT_REQUESTS: int = 10
+    SPTRANS_MAX_REQUESTS_PER_SECOND: float = 20
+
+    # GTFS
+    ENABLE_GTFS_SNAPSHOTS: bool = True
+    GTFS_SNAPSHOTS_PATH: str = ""
 
     # MyClimate
     MYCLIMATE_USERNAME: str = ""
     MYCLIMATE_PASSWORD: str = ""
     MYCLIMATE_PREFIX_URL: str = ""
     ENABLE_MYCLIMATE_FALLBACK: bool = True
+    MYCLIMATE_TIMEOUT: float = 10
+    MYCLIMATE_BULK_CHUNK_SIZE: int = 200
+    MYCLIMATE_MAX_CONCURRENT_REQUESTS: int = 4
+    MYCLIMATE_CACHE_MAX_SIZE: int = 10000
+    MYCLIMATE_CACHE_TTL_DAYS: float = 30
+    ENABLE_LOCAL_EMISSION_MODEL: bool = False
+    EMISSION_FACTORS_PATH: str = ".emission_factors.json"
 
     # Database
     DATABASE_URL: str = ""
-    
+    BULK_UPSERT_BATCH_SIZE: int = 1000
+    CACHE_PURGE_INTERVAL_MINUTES: float = 60
+
     # Google
     GOOGLE_API_KEY: str = ""
+    GOOGLE_ROUTES_CACHE_MAX_SIZE: int = 1000
+    GOOGLE_ROUTES_CACHE_PEAK_TTL_MINUTES: int = 15
+    GOOGLE_ROUTES_CACHE_OFF_PEAK_TTL_MINUTES: int = 60
+    ENABLE_GOOGLE_ROUTES_CACHE_BACKEND: bool = True
+    AIR_QUALITY_CACHE_MAX_SIZE: int = 1000
+    AIR_QUALITY_CACHE_GEOHASH_PRECISION: int = 6
+    GEOCODING_CACHE_MAX_SIZE: int = 10000
+    GEOCODING_CACHE_TTL_DAYS: float = 30
+    GEOCODING_MIN_SIMILARITY: float = 0.6
 
     # Security
     SECRET_KEY: str = ""
@@ -1,10 +1,28 @@
 # app/core/database.py
 
-from sqlalchemy import StaticPool, create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import asyncio
+from typing import Callable, TypeVar
+
+from sqlalchemy import NullPool, StaticPool, create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.core.config import settings
 
+T = TypeVar("T")
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def get_async_database_url(database_url: str) -> URL:
+    """
+    Return the given database URL with the async driver of its database.
+    """
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
 # Cria o engine e a sessão
 if "sqlite" in settings.DATABASE_URL:
     # Test database
@@ -13,10 +31,19 @@ if "sqlite" in settings.DATABASE_URL:
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+    # Every async connection opens the database again, so it must be a
+    # shared in-memory database to see the data of `engine`
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL), poolclass=NullPool
+    )
 else:
     engine = create_engine(settings.DATABASE_URL)
+    async_engine = create_async_engine(get_async_database_url(settings.DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 # Base para os modelos
 Base = declarative_base()
@@ -31,6 +58,25 @@ def get_db():
         db.close()
 
 
+# Dependência usada nas rotas assíncronas
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_in_session(function: Callable[[Session], T]) -> T:
+    """
+    Run the blocking `function` with a new sync session in a worker thread,
+    so that the event loop is not blocked by it.
+    """
+
+    def run() -> T:
+        with SessionLocal() as db:
+            return function(db)
+
+    return await asyncio.to_thread(run)
+
+
 try:
     # pylint: disable=unused-import
     import app.models  # só para garantir importação dos módulos de modelo
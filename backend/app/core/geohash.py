@@ -0,0 +1,58 @@
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _get_geohash_bounds(
+    latitude: float, longitude: float, precision: int
+) -> tuple[str, tuple[float, float], tuple[float, float]]:
+    """
+    Return the geohash of the coordinates, with the given number of
+    characters, and the latitude and longitude intervals of its cell.
+    """
+    latitude_interval = [-90.0, 90.0]
+    longitude_interval = [-180.0, 180.0]
+    characters: list[str] = []
+    bits = 0
+    value = 0
+    is_longitude = True
+    while len(characters) < precision:
+        interval, coordinate = (
+            (longitude_interval, longitude)
+            if is_longitude
+            else (latitude_interval, latitude)
+        )
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        is_longitude = not is_longitude
+        bits += 1
+        if bits == 5:
+            characters.append(BASE32[value])
+            bits = 0
+            value = 0
+    return (
+        "".join(characters),
+        (latitude_interval[0], latitude_interval[1]),
+        (longitude_interval[0], longitude_interval[1]),
+    )
+
+
+def get_geohash_cell(
+    latitude: float, longitude: float, precision: int
+) -> tuple[str, float, float]:
+    """
+    Return the geohash of the coordinates with the given number of characters,
+    shared by the nearby coordinates in the same grid cell, and the latitude
+    and longitude of the center of the cell.
+    """
+    geohash, latitude_interval, longitude_interval = _get_geohash_bounds(
+        latitude, longitude, precision
+    )
+    return (
+        geohash,
+        (latitude_interval[0] + latitude_interval[1]) / 2,
+        (longitude_interval[0] + longitude_interval[1]) / 2,
+    )
@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Limit the rate of concurrent operations by spacing their starts evenly.
+
+    Parameters:
+    - `max_per_second`: Maximum number of operations started per second. If
+      not positive, the rate is not limited.
+    """
+
+    def __init__(self, max_per_second: float) -> None:
+        self.interval = 1 / max_per_second if max_per_second > 0 else 0
+        self._next_start_time = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """
+        Wait until the next operation can be started.
+        """
+        if self.interval == 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            start_time = max(now, self._next_start_time)
+            self._next_start_time = start_time + self.interval
+        await asyncio.sleep(start_time - now)
@@ -0,0 +1,77 @@
+import asyncio
+import functools
+import inspect
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Generic,
+    Hashable,
+    ParamSpec,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+P = ParamSpec("P")
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Coalesce concurrent coroutine calls with the same key: while a call is in
+    flight, the other calls with its key wait for its task and share its
+    result (or its exception) instead of running again. Nothing is kept after
+    the call ends.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[K, asyncio.Task[V]] = {}
+
+    async def do(self, key: K, function: Callable[[], Awaitable[V]]) -> V:
+        """
+        Return the result of `function`, or the result of the call in flight
+        with the same key.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(function())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # A cancelled caller must not cancel the others
+        return await asyncio.shield(task)
+
+
+def single_flight(
+    *key_arguments: str,
+) -> Callable[
+    [Callable[P, Coroutine[Any, Any, V]]], Callable[P, Coroutine[Any, Any, V]]
+]:
+    """
+    Coalesce the concurrent calls of the decorated coroutine function that
+    have the same values of the `key_arguments`, see `SingleFlight`.
+
+    The shared call outlives a cancelled caller, so it must not use resources
+    owned by the callers, such as their database sessions.
+    """
+
+    def decorator(
+        function: Callable[P, Coroutine[Any, Any, V]],
+    ) -> Callable[P, Coroutine[Any, Any, V]]:
+        signature = inspect.signature(function)
+        flight: SingleFlight[tuple, V] = SingleFlight()
+
+        def get_key(*args: P.args, **kwargs: P.kwargs) -> tuple:
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            return tuple(arguments.arguments[name] for name in key_arguments)
+
+        @functools.wraps(function)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> V:
+            return await flight.do(
+                get_key(*args, **kwargs), lambda: function(*args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
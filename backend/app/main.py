@@ -2,6 +2,7 @@ import logging
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.cache import get_caches_metrics
 from app.core.config import settings
 
 from app.api import (
@@ -12,6 +13,7 @@ from app.api import (
     user_route,  # importa a rota de cadastro
     route_comparison_route,
     air_quality_route,
+    stop_route,
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +41,12 @@ def health_check():
     return {"status": "API funcionando"}
 
 
+# Métricas dos caches em memória
+@app.get("/metrics/caches", tags=["Health Check"])
+def caches_metrics():
+    return get_caches_metrics()
+
+
 # Inclui as rotas
 app.include_router(login_route.router)  # registra o endpoint /login
 app.include_router(user_route.router)  # registra o endpoint
@@ -47,4 +55,5 @@ app.include_router(emission_route.router) # registra o endpoint /emission
 app.include_router(route_route.router)
 app.include_router(route_comparison_route.router) 
 app.include_router(air_quality_route.router)
+app.include_router(stop_route.router)  # registra o endpoint /stops
 
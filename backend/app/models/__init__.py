@@ -1,7 +1,10 @@
 # flake8: noqa: F401
+from app.models.cache_entry import CacheEntry as CacheEntryModel
 from app.models.daily_line_statistics import (
     DailyLineStatistics as DailyLineStatisticsModel,
 )
+from app.models.gtfs_fingerprint import GTFSFingerprint as GTFSFingerprintModel
+from app.models.gtfs_fingerprint import GTFSFingerprintKind
 from app.models.line import Line as LineModel
 from app.models.line import LineDirection
 from app.models.line_stop import LineStop as LineStopModel
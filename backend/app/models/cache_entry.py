@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy_utc import UtcDateTime, utcnow
+
+from app.models.base import SerializableBase
+
+
+class CacheEntry(SerializableBase):
+    __tablename__ = "cache_entry"
+
+    namespace: Mapped[str] = mapped_column(primary_key=True)
+    key: Mapped[str] = mapped_column(primary_key=True)
+    value: Mapped[Any] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        UtcDateTime,
+        nullable=False,
+        index=True,
+        server_default=utcnow(),
+    )
@@ -1,4 +1,5 @@
 import datetime
+from typing import Optional
 
 from sqlalchemy import Date, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -22,3 +23,6 @@ class DailyLineStatistics(SerializableBase):
         Date, index=True, primary_key=True, nullable=False
     )
     distance_traveled: Mapped[float] = mapped_column(nullable=False)
+    # Carbon emission (in kg) of `distance_traveled`, stored when the day is
+    # finalized, see `finalize_daily_line_statistics`
+    emission: Mapped[Optional[float]] = mapped_column(nullable=True)
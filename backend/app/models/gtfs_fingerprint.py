@@ -0,0 +1,19 @@
+from enum import Enum
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import SerializableBase
+
+
+class GTFSFingerprintKind(str, Enum):
+    ROUTE = "ROUTE"
+    STOP = "STOP"
+    TRIP = "TRIP"
+
+
+class GTFSFingerprint(SerializableBase):
+    __tablename__ = "gtfs_fingerprint"
+
+    kind: Mapped[GTFSFingerprintKind] = mapped_column(primary_key=True)
+    key: Mapped[str] = mapped_column(primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(nullable=False)
@@ -0,0 +1,78 @@
+from itertools import islice
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.base import SerializableBase
+
+
+def _build_insert(db: Session, model: type[SerializableBase]):
+    """
+    Return the dialect specific insert, which supports `ON CONFLICT`.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upsert não implementado para o banco {dialect}")
+
+
+def bulk_upsert(
+    db: Session,
+    model: type[SerializableBase],
+    rows: Iterable[dict],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    increment_columns: Sequence[str] = (),
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Insert the given rows, updating the existing ones, with a single
+    `INSERT ... ON CONFLICT DO UPDATE` statement per batch. The rows are
+    consumed lazily and no ORM instances are created.
+
+    Return the number of processed rows.
+
+    Parameters:
+    - `index_elements`: Columns of the primary key or unique constraint used
+      to detect the existing rows.
+    - `update_columns`: Columns to overwrite on existing rows. If None, all
+      the columns of the row that are not in `index_elements` nor in
+      `increment_columns` will be used.
+    - `increment_columns`: Columns whose values will be added to the stored
+      ones on existing rows (`column = column + excluded.column`), which makes
+      concurrent accumulations safe.
+    - `batch_size`: Number of rows sent per statement. If None, the
+      `BULK_UPSERT_BATCH_SIZE` setting will be used.
+    """
+    batch_size = batch_size or settings.BULK_UPSERT_BATCH_SIZE
+    iterator = iter(rows)
+    processed_rows = 0
+    statement = None
+    while batch := list(islice(iterator, batch_size)):
+        if statement is None:
+            if update_columns is None:
+                update_columns = [
+                    column
+                    for column in batch[0]
+                    if column not in index_elements and column not in increment_columns
+                ]
+            insert = _build_insert(db=db, model=model)
+            set_ = {column: insert.excluded[column] for column in update_columns} | {
+                column: getattr(model, column) + insert.excluded[column]
+                for column in increment_columns
+            }
+            if len(set_) == 0:
+                statement = insert.on_conflict_do_nothing(index_elements=index_elements)
+            else:
+                statement = insert.on_conflict_do_update(
+                    index_elements=index_elements, set_=set_
+                )
+        db.execute(statement, batch)
+        processed_rows += len(batch)
+
+    db.commit()
+    return processed_rows
@@ -0,0 +1,142 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Iterable, Mapping, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import CacheEntryModel
+from app.repositories.bulk_repository import bulk_upsert
+
+logger = logging.getLogger(__name__)
+
+
+def get_entries(
+    db: Session,
+    namespace: str,
+    keys: Iterable[str],
+    minimum_created_at: Optional[datetime] = None,
+) -> dict[str, tuple[Any, datetime]]:
+    """
+    Return the stored value of each given key of the namespace and when it
+    was stored. The unknown keys are ignored.
+
+    Parameters:
+    - `minimum_created_at`: If not None, ignore the values stored before it.
+    """
+    values: dict[str, tuple[Any, datetime]] = {}
+    iterator = iter(keys)
+    while batch := list(islice(iterator, settings.BULK_UPSERT_BATCH_SIZE)):
+        query = select(
+            CacheEntryModel.key, CacheEntryModel.value, CacheEntryModel.created_at
+        ).where(CacheEntryModel.namespace == namespace, CacheEntryModel.key.in_(batch))
+        if minimum_created_at is not None:
+            query = query.where(CacheEntryModel.created_at >= minimum_created_at)
+        values |= {
+            key: (value, created_at)
+            for key, value, created_at in db.execute(query).all()
+        }
+    return values
+
+
+def save_entries(db: Session, namespace: str, entries: Mapping[str, Any]) -> int:
+    """
+    Store the value of each key of the namespace, replacing the existing ones.
+    Return the number of stored values.
+    """
+    created_at = datetime.now(timezone.utc)
+    return bulk_upsert(
+        db=db,
+        model=CacheEntryModel,
+        rows=(
+            {
+                "namespace": namespace,
+                "key": key,
+                "value": value,
+                "created_at": created_at,
+            }
+            for key, value in entries.items()
+        ),
+        index_elements=["namespace", "key"],
+    )
+
+
+def delete_expired_entries(db: Session, namespace: str, ttl: timedelta) -> int:
+    """
+    Delete the values of the namespace stored before `ttl` ago. Return the
+    number of deleted values.
+    """
+    result = db.execute(
+        delete(CacheEntryModel).where(
+            CacheEntryModel.namespace == namespace,
+            CacheEntryModel.created_at < datetime.now(timezone.utc) - ttl,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+class DatabaseCacheBackend:
+    """
+    Tier of a `LRUCache` stored in the `cache_entry` table, under the given
+    namespace. The values must be JSON serializable.
+
+    A failure of the database is logged and handled as a miss, so that the
+    cache never breaks the caller. The expired values are deleted when values
+    are stored, at most once every `CACHE_PURGE_INTERVAL_MINUTES`.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self._purged_at: Optional[float] = None
+
+    def _should_purge(self) -> bool:
+        return (
+            self._purged_at is None
+            or time.monotonic() - self._purged_at
+            >= settings.CACHE_PURGE_INTERVAL_MINUTES * 60
+        )
+
+    def get_many(
+        self, keys: Iterable[str], ttl: Optional[timedelta]
+    ) -> dict[str, tuple[Any, datetime]]:
+        session = SessionLocal()
+        try:
+            return get_entries(
+                db=session,
+                namespace=self.namespace,
+                keys=keys,
+                minimum_created_at=(
+                    datetime.now(timezone.utc) - ttl if ttl is not None else None
+                ),
+            )
+        except SQLAlchemyError as error:
+            logger.warning(f"Erro ao ler o cache {self.namespace}: {error}")
+            return {}
+        finally:
+            session.close()
+
+    def set_many(self, items: Mapping[str, Any], ttl: Optional[timedelta]) -> None:
+        session = SessionLocal()
+        try:
+            if ttl is not None and self._should_purge():
+                self._purged_at = time.monotonic()
+                deleted = delete_expired_entries(
+                    db=session, namespace=self.namespace, ttl=ttl
+                )
+                if deleted > 0:
+                    logger.info(
+                        f"{deleted} valores expirados removidos do cache "
+                        f"{self.namespace}"
+                    )
+            save_entries(db=session, namespace=self.namespace, entries=items)
+        except SQLAlchemyError as error:
+            session.rollback()
+            logger.warning(f"Erro ao salvar o cache {self.namespace}: {error}")
+        finally:
+            session.close()
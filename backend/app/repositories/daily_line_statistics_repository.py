@@ -1,11 +1,13 @@
 from datetime import date
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
-from sqlalchemy import func
-from sqlalchemy.orm import Query, Session
+from sqlalchemy import Row, Select, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, joinedload
 from sqlalchemy.orm.query import RowReturningQuery
 
 from app.models import DailyLineStatisticsModel
+from app.repositories.bulk_repository import bulk_upsert
 
 
 def get_daily_line_statistics(
@@ -34,14 +36,30 @@ def get_daily_line_statistics(
     return query
 
 
+# Columns of the accumulated daily statistics: date, distance traveled and
+# emission, which is None if any statistics of the date is not finalized
+DAILY_STATISTICS_COLUMNS = (
+    DailyLineStatisticsModel.date,
+    func.sum(DailyLineStatisticsModel.distance_traveled),
+    case(
+        (
+            func.count(DailyLineStatisticsModel.emission) == func.count(),
+            func.sum(DailyLineStatisticsModel.emission),
+        ),
+        else_=None,
+    ),
+)
+
+
 def get_daily_statistics(
     db: Session,
     minimum_date: Optional[date] = None,
     maximum_date: Optional[date] = None,
-) -> RowReturningQuery[tuple[date, float]]:
+) -> RowReturningQuery[tuple[date, float, Optional[float]]]:
     """
     Return the accumulated daily statistics along all the lines grouped and ordered
-    by date.
+    by date, as tuples (date, distance traveled, emission). The emission is None
+    if any statistics of the date is not finalized.
 
     Filter parameters (will be ignored if they are None):
     - `minimum_date`: Filter objects that have date greater than or equal to
@@ -55,10 +73,7 @@ def get_daily_statistics(
             minimum_date=minimum_date,
             maximum_date=maximum_date,
         )
-        .with_entities(
-            DailyLineStatisticsModel.date,
-            func.sum(DailyLineStatisticsModel.distance_traveled),
-        )
+        .with_entities(*DAILY_STATISTICS_COLUMNS)
         .group_by(DailyLineStatisticsModel.date)
         .order_by(DailyLineStatisticsModel.date)
     )
@@ -78,3 +93,133 @@ def get_ordered_daily_line_statistics(
         minimum_date=date,
         maximum_date=date,
     ).order_by(DailyLineStatisticsModel.distance_traveled.desc())
+
+
+def increment_daily_line_statistics(db: Session, statistics: Iterable[dict]) -> int:
+    """
+    Add the `distance_traveled` of the given rows to the stored daily line
+    statistics, identified by their `line_id` and `date`, creating the missing
+    ones. The accumulation is done by the database, so it is safe to be called
+    from parallel processes. Return the number of processed rows.
+    """
+    return bulk_upsert(
+        db=db,
+        model=DailyLineStatisticsModel,
+        rows=statistics,
+        index_elements=["line_id", "date"],
+        increment_columns=["distance_traveled"],
+    )
+
+
+def _filter_daily_line_statistics(
+    query: Select,
+    line_id: Optional[int] = None,
+    minimum_date: Optional[date] = None,
+    maximum_date: Optional[date] = None,
+) -> Select:
+    """
+    Apply the filters of `get_daily_line_statistics` to a select statement.
+    """
+    if minimum_date is not None:
+        query = query.where(DailyLineStatisticsModel.date >= minimum_date)
+    if maximum_date is not None:
+        query = query.where(DailyLineStatisticsModel.date <= maximum_date)
+    if line_id is not None:
+        query = query.where(DailyLineStatisticsModel.line_id == line_id)
+    return query
+
+
+async def get_daily_line_statistics_async(
+    db: AsyncSession,
+    line_id: Optional[int] = None,
+    minimum_date: Optional[date] = None,
+    maximum_date: Optional[date] = None,
+) -> Sequence[DailyLineStatisticsModel]:
+    """
+    Async version of `get_daily_line_statistics`, with their lines loaded.
+    """
+    query = _filter_daily_line_statistics(
+        select(DailyLineStatisticsModel).options(
+            joinedload(DailyLineStatisticsModel.line)
+        ),
+        line_id=line_id,
+        minimum_date=minimum_date,
+        maximum_date=maximum_date,
+    )
+    return (await db.execute(query)).scalars().all()
+
+
+async def get_daily_statistics_async(
+    db: AsyncSession,
+    minimum_date: Optional[date] = None,
+    maximum_date: Optional[date] = None,
+) -> Sequence[Row[tuple[date, float, Optional[float]]]]:
+    """
+    Async version of `get_daily_statistics`.
+    """
+    query = _filter_daily_line_statistics(
+        select(*DAILY_STATISTICS_COLUMNS),
+        minimum_date=minimum_date,
+        maximum_date=maximum_date,
+    )
+    query = query.group_by(DailyLineStatisticsModel.date).order_by(
+        DailyLineStatisticsModel.date
+    )
+    return (await db.execute(query)).all()
+
+
+async def get_ordered_daily_line_statistics_async(
+    db: AsyncSession, date: date, page: int, page_size: int
+) -> tuple[Sequence[DailyLineStatisticsModel], int]:
+    """
+    Return the `page`-th block of `page_size` daily line statistics of the
+    given `date`, ordered by decreasing `distance_traveled` and with their
+    lines loaded, and the total number of statistics of the date.
+    """
+    total_count = await db.scalar(
+        _filter_daily_line_statistics(
+            select(func.count()).select_from(DailyLineStatisticsModel),
+            minimum_date=date,
+            maximum_date=date,
+        )
+    )
+    query = (
+        _filter_daily_line_statistics(
+            select(DailyLineStatisticsModel).options(
+                joinedload(DailyLineStatisticsModel.line)
+            ),
+            minimum_date=date,
+            maximum_date=date,
+        )
+        .order_by(DailyLineStatisticsModel.distance_traveled.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    return (await db.execute(query)).scalars().all(), total_count or 0
+
+
+def get_unfinalized_daily_line_statistics(
+    db: Session, maximum_date: date
+) -> Query[DailyLineStatisticsModel]:
+    """
+    Return the daily line statistics up to `maximum_date` (inclusive) whose
+    emission was not stored yet.
+    """
+    return get_daily_line_statistics(db=db, maximum_date=maximum_date).filter(
+        DailyLineStatisticsModel.emission.is_(None)
+    )
+
+
+def save_daily_line_emissions(db: Session, statistics: Iterable[dict]) -> int:
+    """
+    Store the `emission` of the given daily line statistics rows, identified by
+    their `line_id` and `date`. The other columns are only used if the row does
+    not exist. Return the number of processed rows.
+    """
+    return bulk_upsert(
+        db=db,
+        model=DailyLineStatisticsModel,
+        rows=statistics,
+        index_elements=["line_id", "date"],
+        update_columns=["emission"],
+    )
@@ -0,0 +1,57 @@
+from itertools import islice
+from typing import Iterable, Mapping
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import GTFSFingerprintKind, GTFSFingerprintModel
+from app.repositories.bulk_repository import bulk_upsert
+
+
+def get_fingerprints(db: Session, kind: GTFSFingerprintKind) -> dict[str, str]:
+    """
+    Return the stored fingerprint of each key of the given kind.
+    """
+    return {
+        key: fingerprint
+        for key, fingerprint in db.execute(
+            select(GTFSFingerprintModel.key, GTFSFingerprintModel.fingerprint).where(
+                GTFSFingerprintModel.kind == kind
+            )
+        ).all()
+    }
+
+
+def save_fingerprints(
+    db: Session, kind: GTFSFingerprintKind, fingerprints: Mapping[str, str]
+) -> int:
+    """
+    Store the fingerprint of each key of the given kind, replacing the
+    existing ones. Return the number of stored fingerprints.
+    """
+    return bulk_upsert(
+        db=db,
+        model=GTFSFingerprintModel,
+        rows=(
+            {"kind": kind, "key": key, "fingerprint": fingerprint}
+            for key, fingerprint in fingerprints.items()
+        ),
+        index_elements=["kind", "key"],
+    )
+
+
+def delete_fingerprints(
+    db: Session, kind: GTFSFingerprintKind, keys: Iterable[str]
+) -> None:
+    """
+    Delete the fingerprints of the given keys of the given kind.
+    """
+    iterator = iter(keys)
+    while batch := list(islice(iterator, settings.BULK_UPSERT_BATCH_SIZE)):
+        db.execute(
+            delete(GTFSFingerprintModel).where(
+                GTFSFingerprintModel.kind == kind, GTFSFingerprintModel.key.in_(batch)
+            )
+        )
+    db.commit()
@@ -1,5 +1,10 @@
-from sqlalchemy import select
+import time
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import Select, select
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.exceptions import NotFoundError
@@ -18,14 +23,35 @@ class LineRepository:
             raise NotFoundError(f"A linha {line_id} não existe") from e
 
     @staticmethod
-    def search(db: Session, term: str | None):
+    def get_line_ids(db: Session) -> set[int]:
+        """
+        Return the ids of all the lines.
+        """
+        return set(db.execute(select(LineModel.id)).scalars().all())
+
+    @staticmethod
+    def _build_search_query(term: str | None) -> Select[tuple[LineModel]]:
         query = select(LineModel)
         if term:
             query = query.where(LineModel.name.contains(term))
-        return db.execute(query).scalars().all()
+        return query
 
     @staticmethod
-    def find_by_term_and_direction(db: Session, term: str, sentido: int | None):
+    def search(db: Session, term: str | None):
+        return db.execute(LineRepository._build_search_query(term)).scalars().all()
+
+    @staticmethod
+    async def search_async(db: AsyncSession, term: str | None) -> Sequence[LineModel]:
+        """
+        Async version of `search`.
+        """
+        result = await db.execute(LineRepository._build_search_query(term))
+        return result.scalars().all()
+
+    @staticmethod
+    def _build_term_and_direction_query(
+        term: str, sentido: int | None
+    ) -> Optional[Select[tuple[LineModel]]]:
         query = select(LineModel).where(LineModel.name.contains(term))
 
         if sentido:
@@ -35,4 +61,90 @@ class LineRepository:
             except ValueError:
                 return None
 
+        return query
+
+    @staticmethod
+    def find_by_term_and_direction(db: Session, term: str, sentido: int | None):
+        query = LineRepository._build_term_and_direction_query(term, sentido)
+        if query is None:
+            return None
         return db.execute(query).scalars().first()
+
+    @staticmethod
+    async def find_by_term_and_direction_async(
+        db: AsyncSession, term: str, sentido: int | None
+    ) -> Optional[LineModel]:
+        """
+        Async version of `find_by_term_and_direction`.
+        """
+        query = LineRepository._build_term_and_direction_query(term, sentido)
+        if query is None:
+            return None
+        return (await db.execute(query)).scalars().first()
+
+    @staticmethod
+    async def get_lines_by_name_async(
+        db: AsyncSession, name: str
+    ) -> Sequence[LineModel]:
+        """
+        Return the lines (one per direction) with the given name.
+        """
+        result = await db.execute(select(LineModel).where(LineModel.name == name))
+        return result.scalars().all()
+
+
+class LineIdCache:
+    """
+    In-memory set with the ids of the lines stored in database, to answer
+    line membership checks without a query.
+
+    The set is reloaded when it is older than `ttl` or when an unknown id is
+    looked up, at most once every `minimum_refresh_interval`, so that lines
+    created by other processes are eventually seen.
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta = timedelta(minutes=10),
+        minimum_refresh_interval: timedelta = timedelta(minutes=1),
+    ) -> None:
+        self.ttl = ttl
+        self.minimum_refresh_interval = minimum_refresh_interval
+        self._line_ids: frozenset[int] = frozenset()
+        self._refreshed_at: Optional[float] = None
+
+    def refresh(self, db: Session) -> None:
+        """
+        Reload the line ids from the database.
+        """
+        self._line_ids = frozenset(LineRepository.get_line_ids(db))
+        self._refreshed_at = time.monotonic()
+
+    def clear(self) -> None:
+        """
+        Forget the loaded ids, forcing a reload on the next lookup.
+        """
+        self._line_ids = frozenset()
+        self._refreshed_at = None
+
+    def _elapsed_since_refresh(self) -> Optional[float]:
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+
+    def contains(self, db: Session, line_id: int) -> bool:
+        """
+        Return whether the line with the given id exists.
+        """
+        elapsed_time = self._elapsed_since_refresh()
+        if elapsed_time is None or elapsed_time >= self.ttl.total_seconds():
+            self.refresh(db)
+        elif (
+            line_id not in self._line_ids
+            and elapsed_time >= self.minimum_refresh_interval.total_seconds()
+        ):
+            self.refresh(db)
+        return line_id in self._line_ids
+
+
+line_id_cache = LineIdCache()
@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, Select, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models import StopModel
@@ -10,15 +11,36 @@ from sqlalchemy import desc
 class LineStopRepository:
 
     @staticmethod
-    def get_stops_for_line(db: Session, line_id: int):
-        query = (
+    def _build_stops_for_line_query(line_id: int) -> Select[tuple[StopModel]]:
+        return (
             select(StopModel)
             .join(LineStop, StopModel.id == LineStop.stop_id)
             .where(LineStop.line_id == line_id)
             .order_by(LineStop.stop_order)
         )
+
+    @staticmethod
+    def get_stops_for_line(db: Session, line_id: int):
+        query = LineStopRepository._build_stops_for_line_query(line_id)
         return db.execute(query).scalars().all()
 
+    @staticmethod
+    async def get_stops_for_line_async(
+        db: AsyncSession, line_id: int
+    ) -> Sequence[StopModel]:
+        """
+        Async version of `get_stops_for_line`.
+        """
+        query = LineStopRepository._build_stops_for_line_query(line_id)
+        return (await db.execute(query)).scalars().all()
+
+    @staticmethod
+    def get_line_stop_ids(db: Session) -> Sequence[Row[tuple[int, int]]]:
+        """
+        Return the (line_id, stop_id) of all the line stops.
+        """
+        return db.execute(select(LineStop.line_id, LineStop.stop_id)).all()
+
     @staticmethod
     def get_first_line_stop(
         db: Session,
@@ -51,3 +73,33 @@ class LineStopRepository:
             .order_by(desc(LineStop.stop_order))
             .first()
         )
+
+    @staticmethod
+    async def get_last_stop_async(
+        db: AsyncSession, line_id: int
+    ) -> Optional[LineStop]:
+        """
+        Async version of `get_last_stop`.
+        """
+        query = (
+            select(LineStop)
+            .where(LineStop.line_id == line_id)
+            .order_by(desc(LineStop.stop_order))
+            .limit(1)
+        )
+        return (await db.execute(query)).scalars().first()
+
+    @staticmethod
+    def delete_line_stops(
+        db: Session, line_id: int, keep_stop_orders: Sequence[int] = ()
+    ) -> int:
+        """
+        Delete the line stops of the given line, except the ones whose stop
+        order is in `keep_stop_orders`. Return the number of deleted line stops.
+
+        The deletion is only committed with the session.
+        """
+        query = delete(LineStop).where(LineStop.line_id == line_id)
+        if len(keep_stop_orders) > 0:
+            query = query.where(LineStop.stop_order.not_in(keep_stop_orders))
+        return db.execute(query).rowcount
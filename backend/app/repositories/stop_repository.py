@@ -1,8 +1,13 @@
+from itertools import islice
+from typing import Sequence
+
+from sqlalchemy import Row, delete, or_, select
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.exceptions import NotFoundError
-from app.models import StopModel
+from app.models import LineStopModel, StopModel, UserRouteModel
 
 
 def get_stop(db: Session, stop_id: int) -> StopModel:
@@ -13,3 +18,71 @@ def get_stop(db: Session, stop_id: int) -> StopModel:
         return db.query(StopModel).filter_by(id=stop_id).one()
     except NoResultFound as e:
         raise NotFoundError(f"A parada {stop_id} não existe") from e
+
+
+def get_stops(db: Session, stop_ids: Sequence[int]) -> list[StopModel]:
+    """
+    Return the stops of the given ids, in the same order as `stop_ids`.
+    The unknown ids are ignored.
+    """
+    stops_by_id = {
+        stop.id: stop
+        for stop in db.execute(select(StopModel).where(StopModel.id.in_(stop_ids)))
+        .scalars()
+        .all()
+    }
+    return [stops_by_id[stop_id] for stop_id in stop_ids if stop_id in stops_by_id]
+
+
+def get_stops_coordinates(db: Session) -> Sequence[Row[tuple[int, float, float]]]:
+    """
+    Return the (id, latitude, longitude) of all the stops.
+    """
+    return db.execute(
+        select(StopModel.id, StopModel.latitude, StopModel.longitude)
+    ).all()
+
+
+def get_stops_addresses(
+    db: Session,
+) -> Sequence[Row[tuple[str, str, float, float]]]:
+    """
+    Return the (name, address, latitude, longitude) of all the stops.
+    """
+    return db.execute(
+        select(
+            StopModel.name, StopModel.address, StopModel.latitude, StopModel.longitude
+        )
+    ).all()
+
+
+def delete_stops(db: Session, stop_ids: Sequence[int]) -> list[int]:
+    """
+    Delete the stops of the given ids, together with their line stops. The
+    stops of user routes are kept.
+
+    Return the ids of the deleted stops.
+    """
+    deleted_stop_ids: list[int] = []
+    iterator = iter(stop_ids)
+    while batch := list(islice(iterator, settings.BULK_UPSERT_BATCH_SIZE)):
+        used_stop_ids = {
+            stop_id
+            for user_route_stop_ids in db.execute(
+                select(
+                    UserRouteModel.departure_stop_id, UserRouteModel.arrival_stop_id
+                ).where(
+                    or_(
+                        UserRouteModel.departure_stop_id.in_(batch),
+                        UserRouteModel.arrival_stop_id.in_(batch),
+                    )
+                )
+            ).all()
+            for stop_id in user_route_stop_ids
+        }
+        batch = [stop_id for stop_id in batch if stop_id not in used_stop_ids]
+        db.execute(delete(LineStopModel).where(LineStopModel.stop_id.in_(batch)))
+        db.execute(delete(StopModel).where(StopModel.id.in_(batch)))
+        deleted_stop_ids.extend(batch)
+    db.commit()
+    return deleted_stop_ids
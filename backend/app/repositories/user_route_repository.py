@@ -1,11 +1,22 @@
+from typing import Sequence
 from uuid import UUID
 
+from sqlalchemy import select
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Query, Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, joinedload
 
 from app.exceptions import NotFoundError
 from app.models import UserRouteModel
 
+# Relationships of the user routes returned by the async functions, since
+# they cannot be lazy loaded
+USER_ROUTE_RELATIONSHIPS = (
+    joinedload(UserRouteModel.line),
+    joinedload(UserRouteModel.departure_stop),
+    joinedload(UserRouteModel.arrival_stop),
+)
+
 
 def create_user_route(db: Session, user_route: UserRouteModel) -> UserRouteModel:
     """
@@ -17,6 +28,17 @@ def create_user_route(db: Session, user_route: UserRouteModel) -> UserRouteModel
     return user_route
 
 
+async def create_user_route_async(
+    db: AsyncSession, user_route: UserRouteModel
+) -> UserRouteModel:
+    """
+    Async version of `create_user_route`.
+    """
+    db.add(user_route)
+    await db.commit()
+    return await get_user_route_async(db=db, user_route_id=user_route.id)
+
+
 def get_user_routes(db: Session, user_id: int) -> Query[UserRouteModel]:
     """
     Return the routes of the given user, ordered by decreasing created time.
@@ -28,6 +50,21 @@ def get_user_routes(db: Session, user_id: int) -> Query[UserRouteModel]:
     )
 
 
+async def get_user_routes_async(
+    db: AsyncSession, user_id: int
+) -> Sequence[UserRouteModel]:
+    """
+    Async version of `get_user_routes`.
+    """
+    query = (
+        select(UserRouteModel)
+        .options(*USER_ROUTE_RELATIONSHIPS)
+        .where(UserRouteModel.user_id == user_id)
+        .order_by(UserRouteModel.created_at.desc())
+    )
+    return (await db.execute(query)).scalars().all()
+
+
 def get_user_route(db: Session, user_route_id: UUID) -> UserRouteModel:
     """
     Return the user route with the given id.
@@ -38,9 +75,32 @@ def get_user_route(db: Session, user_route_id: UUID) -> UserRouteModel:
         raise NotFoundError(f"A rota de usuário {user_route_id} não existe")
 
 
+async def get_user_route_async(db: AsyncSession, user_route_id: UUID) -> UserRouteModel:
+    """
+    Async version of `get_user_route`.
+    """
+    query = (
+        select(UserRouteModel)
+        .options(*USER_ROUTE_RELATIONSHIPS)
+        .where(UserRouteModel.id == user_route_id)
+    )
+    try:
+        return (await db.execute(query)).scalars().one()
+    except NoResultFound:
+        raise NotFoundError(f"A rota de usuário {user_route_id} não existe")
+
+
 def delete_user_route(db: Session, user_route: UserRouteModel) -> None:
     """
     Delete the given user route.
     """
     db.delete(user_route)
     db.commit()
+
+
+async def delete_user_route_async(db: AsyncSession, user_route: UserRouteModel) -> None:
+    """
+    Async version of `delete_user_route`.
+    """
+    await db.delete(user_route)
+    await db.commit()
@@ -0,0 +1,29 @@
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy.orm import Query, Session
+
+from app.models import VehicleModel
+from app.repositories.bulk_repository import bulk_upsert
+
+
+def get_vehicles(
+    db: Session, vehicle_ids: Optional[Sequence[int]] = None
+) -> Query[VehicleModel]:
+    """
+    Return the vehicles stored in database.
+
+    Filter parameters (will be ignored if they are None):
+    - `vehicle_ids`: Filter by the given vehicles.
+    """
+    query = db.query(VehicleModel)
+    if vehicle_ids is not None:
+        query = query.filter(VehicleModel.id.in_(vehicle_ids))
+    return query
+
+
+def upsert_vehicles(db: Session, vehicles: Iterable[dict]) -> int:
+    """
+    Create or update the given vehicle rows, identified by their `id`.
+    Return the number of processed rows.
+    """
+    return bulk_upsert(db=db, model=VehicleModel, rows=vehicles, index_elements=["id"])
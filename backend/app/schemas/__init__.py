@@ -1,5 +1,6 @@
 # flake8: noqa: F401
 from app.schemas.carbon_emission import (
+    EmissionFactors,
     EmissionResponse,
     EmissionStatisticsReponse,
     LineEmissionResponse,
@@ -23,6 +24,6 @@ from app.schemas.sptrans.vehicle import (
     SPTransLineVehiclesResponse,
     SPTransVehicle,
 )
-from app.schemas.stop import Stop
+from app.schemas.stop import NearbyStop, Stop
 from app.schemas.user_schema import LoginResponse
 from app.schemas.vehicle_type import VehicleType
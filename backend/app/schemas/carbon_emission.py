@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Annotated
 
 from pydantic import BaseModel, Field
@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 from app.schemas.line import Line
 from app.schemas.pagination import PaginationResponse
 from app.schemas.validators import DefaultRoundedFloat, round_to
+from app.schemas.vehicle_type import VehicleType
 
 
 class EmissionResponse(BaseModel):
@@ -33,3 +34,10 @@ class EmissionStatisticsReponse(BaseModel):
     total_emission: DefaultRoundedFloat = Field(description="emission in kg of CO2")
     total_distance: DefaultRoundedFloat = Field(description="distance in km")
     date: date
+
+
+class EmissionFactors(BaseModel):
+    factors: dict[VehicleType, float] = Field(
+        description="emission in kg of CO2 per km of each vehicle type"
+    )
+    calibrated_at: datetime
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -9,5 +10,6 @@ class DailyLineStatistics(BaseModel):
     line: Line
     date: date
     distance_traveled: float
+    emission: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -15,3 +15,11 @@ class Stop(Point):
     longitude: float
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class NearbyStop(Stop):
+    """
+    A stop and its distance (in km) to a given point.
+    """
+
+    distance: float
@@ -1,9 +1,11 @@
 import logging
 from typing import Optional
 
+from sqlalchemy.orm import Session
+
 from app.clients import air_quality_client
 from app.schemas.air_quality import AirQualityResponse, AirQualityIndex
-from app.clients import google_maps_client
+from app.services import geocoding_service
 
 logger = logging.getLogger(__name__)
 
@@ -42,8 +44,8 @@ def get_air_quality_by_coords(lat: float, lon: float) -> Optional[AirQualityResp
         logger.error(f"Erro no serviço de qualidade do ar: {e}")
         return None
 
-def get_air_quality_from_address(address: str):
-    coords = google_maps_client.get_coordinates_from_address(address)
+def get_air_quality_from_address(db: Session, address: str):
+    coords = geocoding_service.geocode_address(db, address)
 
     if not coords:
         return None 
@@ -1,5 +1,3 @@
-from typing import Optional, TypeVar, cast
-
 import numpy
 from geodistpy import geodist
 from numpy.typing import NDArray
@@ -7,9 +5,8 @@ from sqlalchemy.orm import Session
 
 from app.exceptions import NotFoundError
 from app.repositories import stop_repository
-from app.repositories.line_repository import LineRepository
+from app.repositories.line_repository import LineRepository, line_id_cache
 from app.repositories.line_stop_repository import LineStopRepository
-from app.schemas import Point
 
 
 def calculate_distance_between_stops(
@@ -21,13 +18,15 @@ def calculate_distance_between_stops(
 
     distance = dist(stopB) - dist(stopA)
     """
-    line = LineRepository.get_line(db=db, line_id=line_id)
+    if not line_id_cache.contains(db=db, line_id=line_id):
+        raise NotFoundError(f"A linha {line_id} não existe")
     stop_a = stop_repository.get_stop(db=db, stop_id=stop_a_id)
     stop_b = stop_repository.get_stop(db=db, stop_id=stop_b_id)
     line_stop_a = LineStopRepository.get_first_line_stop(
         db=db, line_id=line_id, stop_id=stop_a_id
     )
     if line_stop_a is None:
+        line = LineRepository.get_line(db=db, line_id=line_id)
         raise NotFoundError(f"A parada {stop_a.name} não pertence à linha {line.name}")
 
     line_stop_b = LineStopRepository.get_first_line_stop(
@@ -37,6 +36,7 @@ def calculate_distance_between_stops(
         minimum_stop_order=line_stop_a.stop_order,
     )
     if line_stop_b is None:
+        line = LineRepository.get_line(db=db, line_id=line_id)
         raise NotFoundError(
             f"A parada {stop_b.name} não está depois da parada {stop_a.name} "
             f"na linha {line.name}"
@@ -46,24 +46,62 @@ def calculate_distance_between_stops(
     return line_stop_b.distance_traveled - line_stop_a.distance_traveled
 
 
-T = TypeVar("T", bound=Point)
+def calculate_distances(
+    origins: NDArray[numpy.float64],
+    destinations: NDArray[numpy.float64],
+) -> NDArray[numpy.float64]:
+    """
+    Calculate the distance (in kilometers) between each pair of points in a
+    single batched call.
+
+    Parameters:
+    - `origins` and `destinations`: Arrays of shape (n, 2) with the
+      (latitude, longitude) of each point. The i-th origin will be compared
+      with the i-th destination.
+    """
+    if len(origins) == 0:
+        return numpy.empty(0, dtype=numpy.float64)
+    if len(origins) == 1:
+        # geodist only accepts a single pair as a 1-dimensional array
+        return numpy.array(
+            [geodist(origins[0], destinations[0], metric="km")],
+            dtype=numpy.float64,
+        )
+    return numpy.asarray(
+        geodist(origins, destinations, metric="km"), dtype=numpy.float64
+    )
 
 
-def find_closest_point(points: list[T], target_point: Point) -> Optional[T]:
+# Mean radius of the Earth, in kilometers
+EARTH_RADIUS = 6371.0088
+
+
+def haversine_distances(
+    origins: NDArray[numpy.float64],
+    destinations: NDArray[numpy.float64],
+) -> NDArray[numpy.float64]:
     """
-    Find the nearest point to `target_point` from the list of `points`.
+    Calculate the great-circle distance (in kilometers) between the points,
+    with the haversine formula.
+
+    Parameters:
+    - `origins` and `destinations`: Arrays whose last dimension has the
+      (latitude, longitude) of each point. They are broadcast against each
+      other, so a single target of shape (2,) can be compared with the points
+      of shape (n, 2), and targets of shape (m, 1, 2) with the points, giving
+      an (m, n) array.
     """
-    if len(points) == 0:
-        return None
-    elif len(points) == 1:
-        return points[0]
-
-    distances = cast(
-        NDArray[numpy.float64],
-        geodist(
-            [point.to_tuple() for point in points],
-            [target_point.to_tuple()] * len(points),
-            metric="km",
-        ),
+    origins = numpy.radians(origins)
+    destinations = numpy.radians(destinations)
+    origin_latitudes, origin_longitudes = origins[..., 0], origins[..., 1]
+    destination_latitudes = destinations[..., 0]
+    destination_longitudes = destinations[..., 1]
+
+    a = (
+        numpy.sin((destination_latitudes - origin_latitudes) / 2) ** 2
+        + numpy.cos(origin_latitudes)
+        * numpy.cos(destination_latitudes)
+        * numpy.sin((destination_longitudes - origin_longitudes) / 2) ** 2
     )
-    return points[numpy.argmin(distances)]
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1)))
+
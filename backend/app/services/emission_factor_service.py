@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import numpy
+from numpy.typing import ArrayLike, NDArray
+
+from app.clients import myclimate_client
+from app.constants import BACKEND_PATH
+from app.core.config import settings
+from app.schemas import EmissionFactors, VehicleType
+
+logger = logging.getLogger(__name__)
+
+# Distances (in km) sent to MyClimate to calibrate the emission factors
+REFERENCE_DISTANCES = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+def fit_emission_factor(
+    distances: Sequence[float], emissions: Sequence[float]
+) -> float:
+    """
+    Return the emission (in kg of CO2) per km that best fits the reference
+    emissions, by least squares.
+    """
+    distances_array = numpy.asarray(distances, dtype=numpy.float64)
+    emissions_array = numpy.asarray(emissions, dtype=numpy.float64)
+    return float(
+        numpy.dot(distances_array, emissions_array)
+        / numpy.dot(distances_array, distances_array)
+    )
+
+
+def calibrate_emission_factors() -> EmissionFactors:
+    """
+    Fit the emission factor of each vehicle type with a single bulk call to
+    MyClimate with the `REFERENCE_DISTANCES`.
+    """
+    factors: dict[VehicleType, float] = {}
+    for vehicle_type in VehicleType:
+        emissions = myclimate_client.bulk_calculate_carbon_emission(
+            distances=REFERENCE_DISTANCES, vehicle_type=vehicle_type, use_cache=False
+        )
+        factors[vehicle_type] = fit_emission_factor(REFERENCE_DISTANCES, emissions)
+        logger.info(
+            f"Fator de emissão de {vehicle_type.value}: "
+            f"{factors[vehicle_type]:.4f} kg/km"
+        )
+    return EmissionFactors(factors=factors, calibrated_at=datetime.now(timezone.utc))
+
+
+def get_emission_factors_path() -> str:
+    """
+    Return the path of the `EMISSION_FACTORS_PATH` file, resolving a relative
+    one against the backend directory.
+    """
+    return os.path.join(BACKEND_PATH, settings.EMISSION_FACTORS_PATH)
+
+
+class EmissionModel:
+    """
+    Emission factors calibrated with MyClimate and persisted in the
+    `EMISSION_FACTORS_PATH` file, so that the emissions are computed in the
+    process. MyClimate is only called by `recalibrate`, see the
+    `calibrate_emission_factors` command.
+    """
+
+    def __init__(self) -> None:
+        self._factors: Optional[EmissionFactors] = None
+        self._lock = threading.Lock()
+        self._warned_missing = False
+
+    def clear(self) -> None:
+        """
+        Forget the loaded factors, forcing them to be read again.
+        """
+        self._factors = None
+        self._warned_missing = False
+
+    def recalibrate(self) -> EmissionFactors:
+        """
+        Calibrate the factors with MyClimate and store them.
+        """
+        factors = calibrate_emission_factors()
+        path = get_emission_factors_path()
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(factors.model_dump_json(indent=2))
+        os.replace(temporary_path, path)
+        self._factors = factors
+        return factors
+
+    def get_factors(self) -> Optional[EmissionFactors]:
+        """
+        Return the stored factors, or None if they were not calibrated yet.
+        """
+        if self._factors is None:
+            with self._lock:
+                path = get_emission_factors_path()
+                if self._factors is None and os.path.exists(path):
+                    with open(path, encoding="utf-8") as file:
+                        self._factors = EmissionFactors.model_validate_json(file.read())
+                elif self._factors is None and not self._warned_missing:
+                    logger.warning(
+                        f"Fatores de emissão não encontrados em {path}, usando o "
+                        "MyClimate. Execute `make calibrate-emission-factors`."
+                    )
+                    self._warned_missing = True
+        return self._factors
+
+    def estimate_emissions(
+        self, distances: ArrayLike, vehicle_type: VehicleType
+    ) -> Optional[NDArray[numpy.float64]]:
+        """
+        Return the carbon emission (in kg) of each distance (in km), or None
+        if there are no stored factors.
+        """
+        factors = self.get_factors()
+        if factors is None:
+            return None
+        factor = factors.factors[vehicle_type]
+        return factor * numpy.maximum(numpy.asarray(distances, dtype=numpy.float64), 0)
+
+
+emission_model = EmissionModel()
+
+
+def calculate_carbon_emission(distance: float, vehicle_type: VehicleType) -> float:
+    """
+    Calculate the carbon emission (in kg) for a given distance (in km), with
+    the local emission model if `ENABLE_LOCAL_EMISSION_MODEL` is set and its
+    factors are stored, or with MyClimate otherwise.
+    """
+    if settings.ENABLE_LOCAL_EMISSION_MODEL:
+        emissions = emission_model.estimate_emissions([distance], vehicle_type)
+        if emissions is not None:
+            return float(emissions[0])
+    return myclimate_client.calculate_carbon_emission(
+        distance=distance, vehicle_type=vehicle_type
+    )
+
+
+def bulk_calculate_carbon_emission(
+    distances: Sequence[float], vehicle_type: VehicleType
+) -> list[float]:
+    """
+    Calculate the carbon emission (in kg) for each distance (in km), see
+    `calculate_carbon_emission`.
+    """
+    if settings.ENABLE_LOCAL_EMISSION_MODEL:
+        emissions = emission_model.estimate_emissions(distances, vehicle_type)
+        if emissions is not None:
+            return emissions.tolist()
+    return myclimate_client.bulk_calculate_carbon_emission(
+        distances=distances, vehicle_type=vehicle_type
+    )
+
+
+def calculate_fallback_emissions(
+    distances: Sequence[float], vehicle_type: VehicleType
+) -> list[float]:
+    """
+    Estimate the carbon emission (in kg) for each distance (in km) with the
+    fixed fallback factors, for when the emission could not be calculated.
+    """
+    return [
+        myclimate_client.calculate_fallback_emission(
+            distance=distance, vehicle_type=vehicle_type
+        )
+        for distance in distances
+    ]
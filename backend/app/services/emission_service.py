@@ -1,16 +1,18 @@
+import asyncio
 import datetime
+import math
 from datetime import timedelta
-from typing import List
+from typing import List, Optional, Sequence
 
-from paginate_sqlalchemy import SqlalchemyOrmPage
 from pydantic import TypeAdapter
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.constants import SAO_PAULO_ZONE
+from app.core.database import AsyncSessionLocal, run_in_session
+from app.core.single_flight import single_flight
 from app.exceptions import NotFoundError, ValidationError
-from app.models import LineModel
 from app.repositories import daily_line_statistics_repository
-from app.clients import myclimate_client
+from app.repositories.line_repository import LineRepository
 from app.repositories.line_stop_repository import LineStopRepository
 from app.schemas import (
     DailyLineStatistics,
@@ -21,36 +23,71 @@ from app.schemas import (
     PaginationResponse,
     VehicleType,
 )
-from app.services import distance_service
+from app.services import distance_service, emission_factor_service
 
 
-def get_emission_lines_ranking(
+async def _complete_emissions(
+    distances: Sequence[float], emissions: Sequence[Optional[float]]
+) -> list[float]:
+    """
+    Return the given bus emissions, calculating the missing (None) ones with
+    their distances. The stored emissions are used as they are, so nothing is
+    calculated for finalized statistics. The blocking calculation runs in a
+    worker thread.
+    """
+    missing_distances = [
+        distance
+        for distance, emission in zip(distances, emissions, strict=True)
+        if emission is None
+    ]
+    calculated = iter(
+        await asyncio.to_thread(
+            emission_factor_service.bulk_calculate_carbon_emission,
+            distances=missing_distances,
+            vehicle_type=VehicleType.BUS,
+        )
+        if len(missing_distances) > 0
+        else []
+    )
+    return [
+        emission if emission is not None else next(calculated) for emission in emissions
+    ]
+
+
+@single_flight("date", "page", "page_size")
+async def get_emission_lines_ranking(
     date: datetime.date,
     page: int,
     page_size: int,
-    db: Session,
 ) -> LinesEmissionsResponse:
     """
     Return the ranking of the lines ordered by decreasing carbon emission.
+    Concurrent calls with the same arguments share a single computation, which
+    opens its own database session, so it does not depend on any caller.
 
     Parameters:
     - `date`: To filter results by this date.
     - `page_size` and `page`: results will be divided in blocks of `page_size`
        and the function will return the `page`-th block.
     """
-    queryset = daily_line_statistics_repository.get_ordered_daily_line_statistics(
-        date=date,
-        db=db,
-    )
-    paginated_results = SqlalchemyOrmPage(queryset, items_per_page=page_size, page=page)
-    lines_statistics = TypeAdapter(list[DailyLineStatistics]).validate_python(
-        paginated_results.items
-    )
-    emissions = myclimate_client.bulk_calculate_carbon_emission(
+    async with AsyncSessionLocal() as db:
+        get_ranking_page = (
+            daily_line_statistics_repository.get_ordered_daily_line_statistics_async
+        )
+        results, total_count = await get_ranking_page(
+            date=date,
+            page=page,
+            page_size=page_size,
+            db=db,
+        )
+        lines_statistics = TypeAdapter(list[DailyLineStatistics]).validate_python(
+            results
+        )
+    emissions = await _complete_emissions(
         distances=[
             line_statistics.distance_traveled for line_statistics in lines_statistics
         ],
-        vehicle_type=VehicleType.BUS,
+        emissions=[line_statistics.emission for line_statistics in lines_statistics],
     )
     return LinesEmissionsResponse(
         lines_emissions=[
@@ -64,21 +101,23 @@ def get_emission_lines_ranking(
             )
         ],
         pagination=PaginationResponse(
-            total_count=paginated_results.item_count,
-            page_count=paginated_results.page_count,
+            total_count=total_count,
+            page_count=math.ceil(total_count / page_size),
         ),
     )
 
 
-def get_line_emission_statistics(
-    db: Session,
+@single_flight("start_date", "days_range", "line_id")
+async def get_line_emission_statistics(
     start_date: datetime.date,
     days_range: int,
     line_id: int,
 ) -> list[EmissionStatisticsReponse]:
     """
     Return the accumulate emissions of the given line for each date
-    in the range from `start_date` to `days_range` after that.
+    in the range from `start_date` to `days_range` after that. Concurrent calls
+    with the same arguments share a single computation, see
+    `get_emission_lines_ranking`.
     """
     today = datetime.datetime.now(tz=SAO_PAULO_ZONE).date()
     if start_date > today:
@@ -87,22 +126,27 @@ def get_line_emission_statistics(
     end_date = start_date + timedelta(days=days_range - 1)
     end_date = min(end_date, today)
 
-    queryset = daily_line_statistics_repository.get_daily_line_statistics(
-        db=db,
-        minimum_date=start_date,
-        maximum_date=end_date,
-        line_id=line_id,
-    )
-    daily_lines_statistics = TypeAdapter(list[DailyLineStatistics]).validate_python(
-        queryset
-    )
+    async with AsyncSessionLocal() as db:
+        queryset = (
+            await daily_line_statistics_repository.get_daily_line_statistics_async(
+                db=db,
+                minimum_date=start_date,
+                maximum_date=end_date,
+                line_id=line_id,
+            )
+        )
+        daily_lines_statistics = TypeAdapter(list[DailyLineStatistics]).validate_python(
+            queryset
+        )
 
-    emissions = myclimate_client.bulk_calculate_carbon_emission(
+    emissions = await _complete_emissions(
         distances=[
             line_statistics.distance_traveled
             for line_statistics in daily_lines_statistics
         ],
-        vehicle_type=VehicleType.BUS,
+        emissions=[
+            line_statistics.emission for line_statistics in daily_lines_statistics
+        ],
     )
 
     return [
@@ -117,15 +161,16 @@ def get_line_emission_statistics(
     ]
 
 
-def get_emission_statistics(
+@single_flight("start_date", "days_range")
+async def get_emission_statistics(
     start_date: datetime.date,
     days_range: int,
-    db: Session,
 ) -> list[EmissionStatisticsReponse]:
     """
     Return the accumulated emissions of all the SPTrans lines for each date
     in the range from `start_date` to `days_range` after that. The results
-    will be ordered by date.
+    will be ordered by date. Concurrent calls with the same arguments share a
+    single computation, see `get_emission_lines_ranking`.
     """
     today = datetime.datetime.now(tz=SAO_PAULO_ZONE).date()
     if start_date > today:
@@ -134,13 +179,16 @@ def get_emission_statistics(
     end_date = start_date + timedelta(days=days_range - 1)
     end_date = min(end_date, today)
 
-    raw_distance_statistics = daily_line_statistics_repository.get_daily_statistics(
-        db=db, minimum_date=start_date, maximum_date=end_date
-    ).all()
+    async with AsyncSessionLocal() as db:
+        raw_distance_statistics = (
+            await daily_line_statistics_repository.get_daily_statistics_async(
+                db=db, minimum_date=start_date, maximum_date=end_date
+            )
+        )
 
-    emissions = myclimate_client.bulk_calculate_carbon_emission(
-        distances=[distance for _, distance in raw_distance_statistics],
-        vehicle_type=VehicleType.BUS,
+    emissions = await _complete_emissions(
+        distances=[distance for _, distance, _ in raw_distance_statistics],
+        emissions=[emission for _, _, emission in raw_distance_statistics],
     )
 
     return [
@@ -149,7 +197,7 @@ def get_emission_statistics(
             total_emission=emission,
             total_distance=distance,
         )
-        for (date, distance), emission in zip(
+        for (date, distance, _), emission in zip(
             raw_distance_statistics, emissions, strict=True
         )
     ]
@@ -158,26 +206,27 @@ def get_emission_statistics(
 AVERAGE_PASSENGERS_PER_BUS = 30
 
 
-def calculate_emission_stops(
+async def calculate_emission_stops(
     line_id: int,
     stop_id_a: int,
     stop_id_b: int,
     vehicle_type: VehicleType,
-    db: Session,
 ) -> EmissionResponse:
     """
     Calculate the carbon emissions between two coordinate stops
     for the given `vehicle_type`.
     """
-    distance_ab_km = distance_service.calculate_distance_between_stops(
-        db=db,
-        line_id=line_id,
-        stop_a_id=stop_id_a,
-        stop_b_id=stop_id_b,
+    distance_ab_km = await run_in_session(
+        lambda session: distance_service.calculate_distance_between_stops(
+            db=session,
+            line_id=line_id,
+            stop_a_id=stop_id_a,
+            stop_b_id=stop_id_b,
+        )
     )
 
-    # Chama o serviço MyClimate
-    emission_calculate_kg = myclimate_client.calculate_carbon_emission(
+    emission_calculate_kg = await asyncio.to_thread(
+        emission_factor_service.calculate_carbon_emission,
         distance=distance_ab_km,
         vehicle_type=vehicle_type,
     )
@@ -190,15 +239,15 @@ def calculate_emission_stops(
     )
 
 
-def calculate_total_emission_by_line_number(
-    db: Session,
+async def calculate_total_emission_by_line_number(
+    db: AsyncSession,
     line_number: str,
 ) -> List[LineEmissionResponse]:
     """
     Calculates the total carbon emission for all directions of a given line number.
     """
 
-    lines = db.query(LineModel).filter(LineModel.name == line_number).all()
+    lines = await LineRepository.get_lines_by_name_async(db, line_number)
 
     if not lines:
         raise NotFoundError(f"Linha {line_number} não encontrada.")
@@ -207,11 +256,13 @@ def calculate_total_emission_by_line_number(
 
     for line in lines:
 
-        last_stop = LineStopRepository.get_last_stop(db, line.id)
+        last_stop = await LineStopRepository.get_last_stop_async(db, line.id)
         total_distance = last_stop.distance_traveled if last_stop else 0.0
 
-        emission = myclimate_client.calculate_carbon_emission(
-            distance=total_distance, vehicle_type=VehicleType.BUS
+        emission = await asyncio.to_thread(
+            emission_factor_service.calculate_carbon_emission,
+            distance=total_distance,
+            vehicle_type=VehicleType.BUS,
         )
 
         results.append(
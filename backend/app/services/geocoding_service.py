@@ -0,0 +1,194 @@
+import logging
+import re
+from datetime import timedelta
+from typing import Optional, Sequence
+
+import numpy
+from numpy.typing import NDArray
+from sqlalchemy.orm import Session
+
+from app.clients import google_maps_client
+from app.clients.google_maps_client import normalize_address
+from app.core.cache import LRUCache, ResidentCache
+from app.core.config import settings
+from app.repositories import stop_repository
+from app.repositories.cache_entry_repository import DatabaseCacheBackend
+
+logger = logging.getLogger(__name__)
+
+# Coordinates of the addresses already geocoded, by normalized address
+geocoding_cache: LRUCache[str, dict] = LRUCache(
+    name="geocoding",
+    max_size=settings.GEOCODING_CACHE_MAX_SIZE,
+    ttl=timedelta(days=settings.GEOCODING_CACHE_TTL_DAYS),
+    backend=DatabaseCacheBackend(namespace="geocoding"),
+)
+
+
+def get_trigrams(text: str) -> set[str]:
+    """
+    Return the trigrams of the normalized text (see `normalize_address`),
+    padded with spaces so that the start and the end of the words count.
+    """
+    return {
+        trigram
+        for word in normalize_address(text).split()
+        for trigram in (f"  {word} "[i : i + 3] for i in range(len(word) + 1))
+    }
+
+
+def get_numbers(text: str) -> frozenset[str]:
+    """
+    Return the numbers (e.g. the house number) written in the text.
+    """
+    return frozenset(str(int(number)) for number in re.findall(r"\d+", text))
+
+
+class AddressIndex:
+    """
+    Trigram index over the names and the addresses of the stops, which finds
+    the stop whose text is the most similar to a searched address.
+
+    The trigrams ignore how far apart the numbers are (a street is several km
+    long), so a text only matches an address with the same numbers, or, if
+    the address has no number, a stop name equal to it.
+    """
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        are_names: Sequence[bool],
+        latitudes: NDArray[numpy.float64],
+        longitudes: NDArray[numpy.float64],
+    ) -> None:
+        """
+        Parameters:
+        - `texts`, `latitudes` and `longitudes`: The texts to be searched and
+          the coordinates of each one.
+        - `are_names`: If each text is the name of a stop, not an address.
+        """
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self._numbers = [get_numbers(text) for text in texts]
+        self._names = [
+            normalize_address(text) if is_name else None
+            for text, is_name in zip(texts, are_names, strict=True)
+        ]
+        postings: dict[str, list[int]] = {}
+        trigrams_counts: list[int] = []
+        for position, text in enumerate(texts):
+            trigrams = get_trigrams(text)
+            trigrams_counts.append(len(trigrams))
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(position)
+        self._trigrams_counts = numpy.array(trigrams_counts, dtype=numpy.int64)
+        self._postings = {
+            trigram: numpy.array(positions, dtype=numpy.intp)
+            for trigram, positions in postings.items()
+        }
+
+    @staticmethod
+    def from_database(db: Session) -> "AddressIndex":
+        """
+        Build the index with the names and the addresses of the stops stored
+        in database.
+        """
+        texts: list[str] = []
+        are_names: list[bool] = []
+        latitudes: list[float] = []
+        longitudes: list[float] = []
+        for name, address, latitude, longitude in stop_repository.get_stops_addresses(
+            db
+        ):
+            for text, is_name in ((name, True), (address, False)):
+                if text:
+                    texts.append(text)
+                    are_names.append(is_name)
+                    latitudes.append(latitude)
+                    longitudes.append(longitude)
+        return AddressIndex(
+            texts=texts,
+            are_names=are_names,
+            latitudes=numpy.array(latitudes, dtype=numpy.float64),
+            longitudes=numpy.array(longitudes, dtype=numpy.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self._trigrams_counts)
+
+    def search(
+        self, address: str, min_similarity: float
+    ) -> Optional[tuple[float, float, float]]:
+        """
+        Return the (latitude, longitude, similarity) of the text most similar
+        to the address that is a valid match of it (see `AddressIndex`), or
+        None if no similarity reaches `min_similarity`. The similarity is the
+        ratio between the shared trigrams and all the trigrams of both texts.
+        """
+        trigrams = get_trigrams(address)
+        positions = [
+            self._postings[trigram] for trigram in trigrams if trigram in self._postings
+        ]
+        if len(positions) == 0:
+            return None
+
+        shared_counts = numpy.bincount(
+            numpy.concatenate(positions), minlength=len(self)
+        )
+        similarities = shared_counts / (
+            len(trigrams) + self._trigrams_counts - shared_counts
+        )
+        candidates = numpy.flatnonzero(similarities >= min_similarity)
+        numbers = get_numbers(address)
+        normalized_address = normalize_address(address)
+        for position in candidates[
+            numpy.argsort(-similarities[candidates], kind="stable")
+        ].tolist():
+            if (
+                numbers == self._numbers[position]
+                if len(numbers) > 0
+                else normalized_address == self._names[position]
+            ):
+                return (
+                    float(self.latitudes[position]),
+                    float(self.longitudes[position]),
+                    float(similarities[position]),
+                )
+        return None
+
+
+address_index_cache: ResidentCache[AddressIndex] = ResidentCache(
+    builder=AddressIndex.from_database, ttl=timedelta(hours=1)
+)
+
+
+def geocode_address(db: Session, address: str) -> Optional[dict]:
+    """
+    Return the coordinates (latitude and longitude) of the address, or None if
+    it is not found. The address is looked up in `geocoding_cache`, then
+    among the stops (see `AddressIndex`) and, only if it is still not found,
+    in the Google Geocoding API.
+    """
+    cache_key = normalize_address(address)
+    if not cache_key:
+        return None
+    cached_coordinates = geocoding_cache.get(cache_key)
+    if cached_coordinates is not None:
+        return cached_coordinates
+
+    match = address_index_cache.get(db).search(
+        cache_key, min_similarity=settings.GEOCODING_MIN_SIMILARITY
+    )
+    if match is not None:
+        latitude, longitude, similarity = match
+        logger.info(
+            f"Endereço '{address}' encontrado nas paradas "
+            f"(similaridade {similarity:.2f})"
+        )
+        coordinates: Optional[dict] = {"latitude": latitude, "longitude": longitude}
+    else:
+        coordinates = google_maps_client.get_coordinates_from_address(address)
+
+    if coordinates is not None:
+        geocoding_cache.set(cache_key, coordinates)
+    return coordinates
@@ -1,41 +1,45 @@
 from typing import Optional
 
-from pydantic import TypeAdapter
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import run_in_session
 from app.repositories.line_repository import LineRepository
 from app.repositories.line_stop_repository import LineStopRepository
-from app.schemas import Point, Stop
-from app.services import distance_service
+from app.schemas import Stop
+from app.services import stop_index_service
 
 
 class LineService:
 
     @staticmethod
-    def search_lines(db: Session, term: Optional[str]):
-        return LineRepository.search(db, term)
+    async def search_lines(db: AsyncSession, term: Optional[str]):
+        return await LineRepository.search_async(db, term)
 
     @staticmethod
-    def get_stops_for_line(db: Session, line_id: int):
-        return LineStopRepository.get_stops_for_line(db, line_id)
+    async def get_stops_for_line(db: AsyncSession, line_id: int):
+        return await LineStopRepository.get_stops_for_line_async(db, line_id)
 
     @staticmethod
-    def search_stops_by_line_term(db: Session, term: str, sentido: Optional[int]):
-        line = LineRepository.find_by_term_and_direction(db, term, sentido)
+    async def search_stops_by_line_term(
+        db: AsyncSession, term: str, sentido: Optional[int]
+    ):
+        line = await LineRepository.find_by_term_and_direction_async(db, term, sentido)
         if not line:
             return None
 
-        return LineStopRepository.get_stops_for_line(db, line.id)
+        return await LineStopRepository.get_stops_for_line_async(db, line.id)
 
     @staticmethod
-    def get_nearest_stop(
-        db: Session,
+    async def get_nearest_stop(
         line_id: int,
         lat: float,
         lon: float,
     ) -> Optional[Stop]:
-        stops = LineStopRepository.get_stops_for_line(db, line_id)
-        return distance_service.find_closest_point(
-            TypeAdapter(list[Stop]).validate_python(stops),
-            Point(latitude=lat, longitude=lon),
+        nearby_stops = await run_in_session(
+            lambda session: stop_index_service.find_nearby_stops(
+                db=session, latitude=lat, longitude=lon, limit=1, line_id=line_id
+            )
         )
+        if len(nearby_stops) == 0:
+            return None
+        return nearby_stops[0]
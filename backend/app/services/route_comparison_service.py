@@ -1,8 +1,12 @@
+import asyncio
 import logging
+from typing import Optional
 
 from app.clients import google_maps_client
+from app.core.config import settings
+from app.schemas.air_quality import AirQualityResponse
 from app.schemas.vehicle_type import VehicleType
-from app.clients import myclimate_client
+from app.services import emission_factor_service
 from app.services import air_quality_service
 
 logger = logging.getLogger(__name__)
@@ -22,51 +26,80 @@ class RouteComparisonService:
         points = poly_obj.get("encodedPolyline") or poly_obj.get("points") or ""
         return {"encodedPolyline": points}
         
-    def calculate_bus_route_emissions(self, origin: str, destination: str) -> dict:
+    async def _get_air_quality(self, location: dict) -> Optional[AirQualityResponse]:
         """
-         Calculation of emissions for multiple bus routes.
+        Busca a qualidade do ar nas coordenadas (latLng) do Google, em uma
+        thread, ou retorna None se elas estiverem incompletas.
         """
-        
-        # Buscar rotas na API do Google
-        google_response = google_maps_client.find_bus_routes(origin, destination)
-        
-        origin_aqi = None
-        destination_aqi = None
+        if location.get("latitude") is None or location.get("longitude") is None:
+            return None
+        return await asyncio.to_thread(
+            air_quality_service.get_air_quality_by_coords,
+            location["latitude"],
+            location["longitude"],
+        )
 
-        if "routes" in google_response and len(google_response["routes"]) > 0:
-            #  Extrair coordenadas da primeira rota encontrada para buscar qualidade do ar
-            try:
-                first_route = google_response["routes"][0]
-                legs = first_route.get("legs", [])
-                
-                if legs:         
-                    start_loc = legs[0].get("startLocation", {}).get("latLng", {})
-                    end_loc = legs[-1].get("endLocation", {}).get("latLng", {})
-                    
-                    # Buscar Qualidade do Ar na Origem
-                    if start_loc.get("latitude") is not None and start_loc.get("longitude") is not None:
-                        origin_aqi = air_quality_service.get_air_quality_by_coords(
-                            start_loc["latitude"], start_loc["longitude"]
-                        )
-                    
-                    # Buscar Qualidade do Ar no Destino
-                    if end_loc.get("latitude") is not None and end_loc.get("longitude") is not None:
-                        destination_aqi = air_quality_service.get_air_quality_by_coords(
-                            end_loc["latitude"], end_loc["longitude"]
-                        )
-            except Exception as e:
-                logger.error(f"Erro ao extrair coordenadas ou buscar qualidade do ar: {e}")
-        
+    async def _get_route_air_quality(
+        self, google_response: dict
+    ) -> tuple[Optional[AirQualityResponse], Optional[AirQualityResponse]]:
+        """
+        Busca, em paralelo, a qualidade do ar na origem e no destino da
+        primeira rota encontrada.
+        """
+        try:
+            legs = google_response["routes"][0].get("legs", [])
+            if not legs:
+                return None, None
+            start_loc = legs[0].get("startLocation", {}).get("latLng", {})
+            end_loc = legs[-1].get("endLocation", {}).get("latLng", {})
+            origin_aqi, destination_aqi = await asyncio.gather(
+                self._get_air_quality(start_loc), self._get_air_quality(end_loc)
+            )
+            return origin_aqi, destination_aqi
+        except Exception as e:
+            logger.error(f"Erro ao extrair coordenadas ou buscar qualidade do ar: {e}")
+            return None, None
 
-        unique_routes_map = {}
-        
-        if "routes" not in google_response:
+    async def calculate_bus_route_emissions(
+        self, origin: str, destination: str
+    ) -> dict:
+        """
+        Calculate the emissions of the bus routes between the origin and the
+        destination. After the Google call, the air quality lookups run
+        concurrently with the emissions of the routes, which are calculated
+        with a single bulk call.
+        """
+
+        # Buscar rotas na API do Google
+        google_response = await asyncio.to_thread(
+            google_maps_client.find_bus_routes, origin, destination
+        )
+
+        if "routes" not in google_response or len(google_response["routes"]) == 0:
             return {
-                "origin_air_quality": origin_aqi,
-                "destination_air_quality": destination_aqi,
+                "origin_air_quality": None,
+                "destination_air_quality": None,
                 "routes": []
             }
 
+        (origin_aqi, destination_aqi), sorted_routes = await asyncio.gather(
+            self._get_route_air_quality(google_response),
+            self._calculate_routes(google_response),
+        )
+
+        return {
+            "origin_air_quality": origin_aqi,
+            "destination_air_quality": destination_aqi,
+            "routes": sorted_routes
+        }
+
+    async def _calculate_routes(self, google_response: dict) -> list[dict]:
+        """
+        Agrupa as rotas alternativas do Google pelas linhas usadas e calcula as
+        suas emissões, ordenando-as da menor emissão para a maior.
+        """
+        unique_routes_map = {}
+        
         # Iterar sobre cada rota alternativa que o Google retornou
         for route in google_response.get("routes", []):
             total_bus_distance_meters = 0
@@ -143,37 +176,39 @@ class RouteComparisonService:
             
             ordered_lines_display = list(dict.fromkeys(line_names))
             
-            # Calcular a emissão de carbono com o MyClimate
-            try:
-                emission_kg = myclimate_client.calculate_carbon_emission(
-                    distance=distance_km,
-                    vehicle_type=VehicleType.BUS
-                )
-            except Exception as e:
-                # Indica falha
-                emission_kg = -1 
-                
             polyline_data = route.get("polyline", {"encodedPolyline": ""})
             
             route_obj = {
                 "description": f"Rota via {', '.join(ordered_lines_display)}", # ex: Rota via 8000-10, 8022-10
                 "distance_km": round(distance_km, 2),
-                "emission_kg_co2": round(emission_kg, 2),
+                "emission_kg_co2": -1,
                 "polyline": polyline_data,
                 "segments": segments 
             }
             
-            unique_routes_map[route_signature] = route_obj
-        #Ordenar a lista da menor emissão para a maior
-        calculated_routes = list(unique_routes_map.values())
-        
-        sorted_routes = sorted(calculated_routes, key=lambda x: x["emission_kg_co2"])
-        
-        return {
-            "origin_air_quality": origin_aqi,
-            "destination_air_quality": destination_aqi,
-            "routes": sorted_routes
-        
-        } 
+            unique_routes_map[route_signature] = (distance_km, route_obj)
 
+        # Calcular a emissão de carbono de todas as rotas de uma vez
+        distances = [distance_km for distance_km, _ in unique_routes_map.values()]
+        calculated_routes = [route_obj for _, route_obj in unique_routes_map.values()]
+        if distances:
+            try:
+                emissions = await asyncio.to_thread(
+                    emission_factor_service.bulk_calculate_carbon_emission,
+                    distances=distances,
+                    vehicle_type=VehicleType.BUS,
+                )
+            except Exception as e:
+                logger.error(f"Erro ao calcular a emissão das rotas: {e}")
+                if settings.ENABLE_MYCLIMATE_FALLBACK:
+                    emissions = emission_factor_service.calculate_fallback_emissions(
+                        distances=distances, vehicle_type=VehicleType.BUS
+                    )
+                else:
+                    # Mantém -1, que indica falha
+                    emissions = []
+            for route_obj, emission_kg in zip(calculated_routes, emissions):
+                route_obj["emission_kg_co2"] = round(emission_kg, 2)
 
+        #Ordenar a lista da menor emissão para a maior
+        return sorted(calculated_routes, key=lambda x: x["emission_kg_co2"])
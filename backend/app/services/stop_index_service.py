@@ -0,0 +1,240 @@
+from datetime import timedelta
+from typing import Optional
+
+import numpy
+from numpy.typing import NDArray
+from scipy.spatial import cKDTree
+from sqlalchemy.orm import Session
+
+from app.core.cache import ResidentCache
+from app.repositories import stop_repository
+from app.repositories.line_stop_repository import LineStopRepository
+from app.schemas import NearbyStop, Stop
+from app.services.distance_service import EARTH_RADIUS
+
+
+def to_unit_vectors(
+    latitudes: NDArray[numpy.float64], longitudes: NDArray[numpy.float64]
+) -> NDArray[numpy.float64]:
+    """
+    Project the coordinates (in degrees) onto the unit sphere, returning an
+    array of shape (n, 3). The euclidean distance between the projected
+    points (the chord) grows with the great-circle distance, so it can be
+    used in the KD-tree queries.
+    """
+    latitudes = numpy.radians(latitudes)
+    longitudes = numpy.radians(longitudes)
+    cos_latitudes = numpy.cos(latitudes)
+    return numpy.column_stack(
+        (
+            cos_latitudes * numpy.cos(longitudes),
+            cos_latitudes * numpy.sin(longitudes),
+            numpy.sin(latitudes),
+        )
+    )
+
+
+def _chords_to_distances(chords: NDArray[numpy.float64]) -> NDArray[numpy.float64]:
+    """
+    Convert chords of the unit sphere to great-circle distances (in km).
+    """
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.minimum(chords / 2, 1))
+
+
+def _distance_to_chord(distance: float) -> float:
+    """
+    Convert a great-circle distance (in km) to a chord of the unit sphere.
+    """
+    return 2 * numpy.sin(min(distance / (2 * EARTH_RADIUS), numpy.pi / 2))
+
+
+class StopIndex:
+    """
+    Spatial index over the stops, with a KD-tree over all of them and a
+    KD-tree per line, built on the first query for that line.
+
+    The queries return lists of (stop id, distance in km), sorted by distance.
+    """
+
+    def __init__(
+        self,
+        stop_ids: NDArray[numpy.int64],
+        latitudes: NDArray[numpy.float64],
+        longitudes: NDArray[numpy.float64],
+        line_ids: NDArray[numpy.int64],
+        line_stop_ids: NDArray[numpy.int64],
+    ) -> None:
+        """
+        Parameters:
+        - `stop_ids`, `latitudes` and `longitudes`: The stops.
+        - `line_ids` and `line_stop_ids`: The pairs (line id, stop id) of the
+          line stops.
+        """
+        order = numpy.argsort(stop_ids)
+        self.stop_ids = stop_ids[order]
+        self._vectors = to_unit_vectors(latitudes[order], longitudes[order])
+        self._tree = cKDTree(self._vectors)
+
+        # Positions (in `stop_ids`) of the stops of each line
+        positions = numpy.searchsorted(self.stop_ids, line_stop_ids)
+        positions = numpy.minimum(positions, max(len(self.stop_ids) - 1, 0))
+        known = (
+            self.stop_ids[positions] == line_stop_ids
+            if len(self.stop_ids) > 0
+            else numpy.zeros(len(line_stop_ids), dtype=numpy.bool_)
+        )
+        line_ids, positions = line_ids[known], positions[known]
+        lines_order = numpy.argsort(line_ids, kind="stable")
+        unique_line_ids, first_indexes = numpy.unique(
+            line_ids[lines_order], return_index=True
+        )
+        self._line_positions: dict[int, NDArray[numpy.intp]] = {
+            line_id: numpy.unique(line_positions)
+            for line_id, line_positions in zip(
+                unique_line_ids.tolist(),
+                numpy.split(positions[lines_order], first_indexes[1:]),
+            )
+        }
+        self._line_trees: dict[int, cKDTree] = {}
+
+    @staticmethod
+    def from_database(db: Session) -> "StopIndex":
+        """
+        Build the index with the stops and line stops stored in database.
+        """
+        stops = stop_repository.get_stops_coordinates(db)
+        line_stops = LineStopRepository.get_line_stop_ids(db)
+        return StopIndex(
+            stop_ids=numpy.array([stop[0] for stop in stops], dtype=numpy.int64),
+            latitudes=numpy.array([stop[1] for stop in stops], dtype=numpy.float64),
+            longitudes=numpy.array([stop[2] for stop in stops], dtype=numpy.float64),
+            line_ids=numpy.array(
+                [line_stop[0] for line_stop in line_stops], dtype=numpy.int64
+            ),
+            line_stop_ids=numpy.array(
+                [line_stop[1] for line_stop in line_stops], dtype=numpy.int64
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.stop_ids)
+
+    def _get_tree(
+        self, line_id: Optional[int]
+    ) -> tuple[Optional[cKDTree], Optional[NDArray[numpy.intp]]]:
+        """
+        Return the tree to be queried and the positions (in `stop_ids`) of its
+        points, which are None for the tree of all the stops.
+        """
+        if line_id is None:
+            return self._tree, None
+
+        positions = self._line_positions.get(line_id)
+        if positions is None:
+            return None, None
+        if line_id not in self._line_trees:
+            self._line_trees[line_id] = cKDTree(self._vectors[positions])
+        return self._line_trees[line_id], positions
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        line_id: Optional[int] = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Return the `k` stops closest to the given point.
+
+        Parameters:
+        - `line_id`: If not None, only consider the stops of this line.
+        """
+        tree, positions = self._get_tree(line_id)
+        if tree is None or tree.n == 0 or k <= 0:
+            return []
+
+        target = to_unit_vectors(numpy.array([latitude]), numpy.array([longitude]))
+        chords, indexes = tree.query(target[0], k=list(range(1, min(k, tree.n) + 1)))
+        if positions is not None:
+            indexes = positions[indexes]
+        return list(
+            zip(
+                self.stop_ids[indexes].tolist(),
+                _chords_to_distances(chords).tolist(),
+            )
+        )
+
+    def within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        line_id: Optional[int] = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Return the stops whose distance to the given point is not greater than
+        `radius` (in km).
+
+        Parameters:
+        - `line_id`: If not None, only consider the stops of this line.
+        """
+        tree, positions = self._get_tree(line_id)
+        if tree is None or tree.n == 0:
+            return []
+
+        target = to_unit_vectors(numpy.array([latitude]), numpy.array([longitude]))[0]
+        indexes = numpy.array(
+            tree.query_ball_point(target, r=_distance_to_chord(radius)),
+            dtype=numpy.intp,
+        )
+        if positions is not None:
+            indexes = positions[indexes]
+        chords = numpy.linalg.norm(self._vectors[indexes] - target, axis=1)
+        order = numpy.argsort(chords, kind="stable")
+        return list(
+            zip(
+                self.stop_ids[indexes[order]].tolist(),
+                _chords_to_distances(chords[order]).tolist(),
+            )
+        )
+
+
+stop_index_cache: ResidentCache[StopIndex] = ResidentCache(
+    builder=StopIndex.from_database, ttl=timedelta(minutes=10)
+)
+
+
+def find_nearby_stops(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    limit: int = 10,
+    radius: Optional[float] = None,
+    line_id: Optional[int] = None,
+) -> list[NearbyStop]:
+    """
+    Return the stops closest to the given point, sorted by distance.
+
+    Parameters:
+    - `limit`: Maximum number of stops to return.
+    - `radius`: If not None, only return the stops within this distance (in km).
+    - `line_id`: If not None, only consider the stops of this line.
+    """
+    index = stop_index_cache.get(db)
+    if radius is None:
+        results = index.nearest(
+            latitude=latitude, longitude=longitude, k=limit, line_id=line_id
+        )
+    else:
+        results = index.within_radius(
+            latitude=latitude, longitude=longitude, radius=radius, line_id=line_id
+        )[:limit]
+
+    distances = dict(results)
+    stops = stop_repository.get_stops(db=db, stop_ids=list(distances))
+    return [
+        NearbyStop(
+            **Stop.model_validate(stop).model_dump(), distance=distances[stop.id]
+        )
+        for stop in stops
+    ]
@@ -0,0 +1,427 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Sequence
+
+import numpy
+from numpy.typing import NDArray
+from sqlalchemy.orm import Session
+
+from app.models import VehicleModel
+from app.repositories import vehicle_repository
+from app.schemas import SPTransLineVehiclesResponse
+from app.services import distance_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VehiclePositions:
+    """
+    Columnar snapshot of vehicle positions. The i-th element of each array
+    refers to the same vehicle.
+
+    - `timestamps`: POSIX timestamps (in seconds) of `updated_ats`, used for
+      the vectorized comparisons.
+    - `updated_ats`: The original datetimes, used to persist the positions.
+    """
+
+    vehicle_ids: NDArray[numpy.int64]
+    line_ids: NDArray[numpy.int64]
+    latitudes: NDArray[numpy.float64]
+    longitudes: NDArray[numpy.float64]
+    timestamps: NDArray[numpy.float64]
+    updated_ats: NDArray[numpy.object_]
+
+    def __len__(self) -> int:
+        return len(self.vehicle_ids)
+
+    @staticmethod
+    def empty() -> "VehiclePositions":
+        """
+        Return a snapshot without vehicles.
+        """
+        return VehiclePositions(
+            vehicle_ids=numpy.empty(0, dtype=numpy.int64),
+            line_ids=numpy.empty(0, dtype=numpy.int64),
+            latitudes=numpy.empty(0, dtype=numpy.float64),
+            longitudes=numpy.empty(0, dtype=numpy.float64),
+            timestamps=numpy.empty(0, dtype=numpy.float64),
+            updated_ats=numpy.empty(0, dtype=numpy.object_),
+        )
+
+    @staticmethod
+    def from_lines_vehicles(
+        lines_vehicles: Sequence[SPTransLineVehiclesResponse],
+    ) -> "VehiclePositions":
+        """
+        Flatten the Olho Vivo response into a columnar snapshot, keeping the
+        order in which the vehicles appear.
+        """
+        vehicles = [
+            (line_vehicles.line_id, vehicle)
+            for line_vehicles in lines_vehicles
+            for vehicle in line_vehicles.vehicles
+        ]
+        updated_ats = numpy.empty(len(vehicles), dtype=numpy.object_)
+        updated_ats[:] = [vehicle.updated_at for _, vehicle in vehicles]
+        return VehiclePositions(
+            vehicle_ids=numpy.fromiter(
+                (vehicle.id for _, vehicle in vehicles),
+                dtype=numpy.int64,
+                count=len(vehicles),
+            ),
+            line_ids=numpy.fromiter(
+                (line_id for line_id, _ in vehicles),
+                dtype=numpy.int64,
+                count=len(vehicles),
+            ),
+            latitudes=numpy.fromiter(
+                (vehicle.latitude for _, vehicle in vehicles),
+                dtype=numpy.float64,
+                count=len(vehicles),
+            ),
+            longitudes=numpy.fromiter(
+                (vehicle.longitude for _, vehicle in vehicles),
+                dtype=numpy.float64,
+                count=len(vehicles),
+            ),
+            timestamps=numpy.fromiter(
+                (vehicle.updated_at.timestamp() for _, vehicle in vehicles),
+                dtype=numpy.float64,
+                count=len(vehicles),
+            ),
+            updated_ats=updated_ats,
+        )
+
+    @staticmethod
+    def from_models(vehicles: Iterable[VehicleModel]) -> "VehiclePositions":
+        """
+        Build a columnar snapshot from the vehicles stored in database.
+        """
+        rows = [
+            (
+                vehicle.id,
+                vehicle.line_id,
+                vehicle.latitude,
+                vehicle.longitude,
+                vehicle.updated_at,
+            )
+            for vehicle in vehicles
+        ]
+        if len(rows) == 0:
+            return VehiclePositions.empty()
+
+        ids, line_ids, latitudes, longitudes, updated_ats = zip(*rows)
+        updated_ats_array = numpy.empty(len(rows), dtype=numpy.object_)
+        updated_ats_array[:] = updated_ats
+        return VehiclePositions(
+            vehicle_ids=numpy.array(ids, dtype=numpy.int64),
+            line_ids=numpy.array(line_ids, dtype=numpy.int64),
+            latitudes=numpy.array(latitudes, dtype=numpy.float64),
+            longitudes=numpy.array(longitudes, dtype=numpy.float64),
+            timestamps=numpy.array(
+                [updated_at.timestamp() for updated_at in updated_ats],
+                dtype=numpy.float64,
+            ),
+            updated_ats=updated_ats_array,
+        )
+
+    @staticmethod
+    def concatenate(snapshots: Sequence["VehiclePositions"]) -> "VehiclePositions":
+        """
+        Join the given snapshots, one after the other.
+        """
+        return VehiclePositions(
+            **{
+                field.name: numpy.concatenate(
+                    [getattr(snapshot, field.name) for snapshot in snapshots]
+                )
+                for field in fields(VehiclePositions)
+            }
+        )
+
+    def take(self, indexes: NDArray) -> "VehiclePositions":
+        """
+        Return a new snapshot with the rows selected by `indexes`, which can be
+        either an array of positions or a boolean mask.
+        """
+        return VehiclePositions(
+            vehicle_ids=self.vehicle_ids[indexes],
+            line_ids=self.line_ids[indexes],
+            latitudes=self.latitudes[indexes],
+            longitudes=self.longitudes[indexes],
+            timestamps=self.timestamps[indexes],
+            updated_ats=self.updated_ats[indexes],
+        )
+
+    def coordinates(self) -> NDArray[numpy.float64]:
+        """
+        Return an array of shape (n, 2) with the (latitude, longitude) of
+        each vehicle.
+        """
+        return numpy.column_stack((self.latitudes, self.longitudes))
+
+    def to_dicts(self) -> list[dict]:
+        """
+        Convert the snapshot to a list of `VehicleModel` rows, ready to be used
+        in bulk inserts and updates.
+        """
+        return [
+            {
+                "id": vehicle_id,
+                "line_id": line_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "updated_at": updated_at,
+            }
+            for vehicle_id, line_id, latitude, longitude, updated_at in zip(
+                self.vehicle_ids.tolist(),
+                self.line_ids.tolist(),
+                self.latitudes.tolist(),
+                self.longitudes.tolist(),
+                self.updated_ats,
+            )
+        ]
+
+
+def parse_live_positions(
+    payload: bytes,
+) -> tuple[VehiclePositions, dict[int, str]]:
+    """
+    Decode the Olho Vivo `/Posicao` payload directly into a columnar snapshot,
+    without building a model for each vehicle.
+
+    Return the snapshot, with the vehicles in the order in which they appear,
+    and the name of each line in the payload.
+    """
+    response = json.loads(payload) or {}
+    lines = response.get("l") or []
+
+    line_names: dict[int, str] = {}
+    line_ids: list[int] = []
+    lines_vehicles_count: list[int] = []
+    vehicles: list[dict] = []
+    for line in lines:
+        line_vehicles = line.get("vs") or []
+        line_id = int(line["cl"])
+        line_names[line_id] = line["c"]
+        line_ids.append(line_id)
+        lines_vehicles_count.append(len(line_vehicles))
+        vehicles.extend(line_vehicles)
+
+    # Many vehicles share the same update time, so each one is parsed once
+    updated_ats_by_text = {
+        text: datetime.fromisoformat(text)
+        for text in {vehicle["ta"] for vehicle in vehicles}
+    }
+    timestamps_by_text = {
+        text: updated_at.timestamp() for text, updated_at in updated_ats_by_text.items()
+    }
+    updated_ats = numpy.empty(len(vehicles), dtype=numpy.object_)
+    updated_ats[:] = [updated_ats_by_text[vehicle["ta"]] for vehicle in vehicles]
+
+    positions = VehiclePositions(
+        vehicle_ids=numpy.array(
+            [vehicle["p"] for vehicle in vehicles], dtype=numpy.int64
+        ),
+        line_ids=numpy.repeat(
+            numpy.array(line_ids, dtype=numpy.int64), lines_vehicles_count
+        ),
+        latitudes=numpy.fromiter(
+            (vehicle["py"] for vehicle in vehicles),
+            dtype=numpy.float64,
+            count=len(vehicles),
+        ),
+        longitudes=numpy.fromiter(
+            (vehicle["px"] for vehicle in vehicles),
+            dtype=numpy.float64,
+            count=len(vehicles),
+        ),
+        timestamps=numpy.fromiter(
+            (timestamps_by_text[vehicle["ta"]] for vehicle in vehicles),
+            dtype=numpy.float64,
+            count=len(vehicles),
+        ),
+        updated_ats=updated_ats,
+    )
+    return positions, line_names
+
+
+def deduplicate_positions(positions: VehiclePositions) -> VehiclePositions:
+    """
+    Remove the repeated vehicles from the snapshot, keeping only the first
+    occurrence of each one.
+    """
+    _, first_indexes = numpy.unique(positions.vehicle_ids, return_index=True)
+    if len(first_indexes) == len(positions):
+        return positions
+    return positions.take(numpy.sort(first_indexes))
+
+
+def match_previous_positions(
+    current: VehiclePositions,
+    previous: VehiclePositions,
+) -> NDArray[numpy.int64]:
+    """
+    Join the current snapshot with the previous one by vehicle id.
+
+    Return an array where the i-th element is the index in `previous` of the
+    i-th vehicle of `current`, or -1 if the vehicle is not in `previous`.
+    """
+    if len(previous) == 0 or len(current) == 0:
+        return numpy.full(len(current), -1, dtype=numpy.int64)
+
+    order = numpy.argsort(previous.vehicle_ids, kind="stable")
+    sorted_ids = previous.vehicle_ids[order]
+    positions = numpy.searchsorted(sorted_ids, current.vehicle_ids)
+    positions = numpy.minimum(positions, len(sorted_ids) - 1)
+    found = sorted_ids[positions] == current.vehicle_ids
+    return numpy.where(found, order[positions], -1).astype(numpy.int64)
+
+
+def calculate_delta_distances(
+    current: VehiclePositions,
+    previous: VehiclePositions,
+    previous_indexes: NDArray[numpy.int64],
+    maximum_elapsed_time: timedelta,
+) -> dict[int, float]:
+    """
+    Return the distance (in km) traveled by the vehicles of each line since
+    their previous positions.
+
+    A vehicle is only considered if its previous position is known, it was
+    updated and the elapsed time is not greater than `maximum_elapsed_time`,
+    and it kept the same line.
+
+    Parameters:
+    - `previous_indexes`: The result of `match_previous_positions`.
+    """
+    found = previous_indexes >= 0
+    current = current.take(found)
+    previous = previous.take(previous_indexes[found])
+
+    elapsed_time = current.timestamps - previous.timestamps
+    moved = (
+        (elapsed_time <= maximum_elapsed_time.total_seconds())
+        & (current.timestamps != previous.timestamps)
+        & (current.line_ids == previous.line_ids)
+    )
+    current = current.take(moved)
+    previous = previous.take(moved)
+    if len(current) == 0:
+        return {}
+
+    distances = distance_service.calculate_distances(
+        previous.coordinates(), current.coordinates()
+    )
+    line_ids, line_indexes = numpy.unique(current.line_ids, return_inverse=True)
+    line_distances = numpy.bincount(line_indexes, weights=distances)
+    return dict(zip(line_ids.tolist(), line_distances.tolist()))
+
+
+class VehiclePositionStore:
+    """
+    Resident store with the last known position of each vehicle, kept sorted
+    by vehicle id.
+
+    The store is meant to live as long as the tracker process: it is warmed
+    up once from the database and then serves the previous positions from
+    memory. The changed positions are only written back to the database
+    when `flush` is called and `flush_interval` has elapsed since the
+    last flush (write-behind).
+    """
+
+    def __init__(self, flush_interval: timedelta = timedelta(minutes=1)) -> None:
+        self.flush_interval = flush_interval
+        self._positions = VehiclePositions.empty()
+        # Rows changed since the last flush
+        self._dirty = numpy.empty(0, dtype=numpy.bool_)
+        self._last_flush_time = time.monotonic()
+
+    @property
+    def positions(self) -> VehiclePositions:
+        """
+        The last known positions, sorted by vehicle id.
+        """
+        return self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def warm_up(self, db: Session, vehicle_ids: Optional[Sequence[int]] = None) -> None:
+        """
+        Load the positions stored in database, replacing the ones in memory.
+
+        Parameters:
+        - `vehicle_ids`: If not None, only load these vehicles.
+        """
+        positions = VehiclePositions.from_models(
+            vehicle_repository.get_vehicles(db=db, vehicle_ids=vehicle_ids)
+        )
+        order = numpy.argsort(positions.vehicle_ids, kind="stable")
+        self._positions = positions.take(order)
+        self._dirty = numpy.zeros(len(positions), dtype=numpy.bool_)
+        self._last_flush_time = time.monotonic()
+
+    def update(self, positions: VehiclePositions) -> None:
+        """
+        Replace the known positions of the given vehicles, adding the vehicles
+        that were not known yet. Only the vehicles whose timestamp changed are
+        written by the next flush. The vehicles must not be repeated.
+        """
+        indexes = match_previous_positions(current=positions, previous=self._positions)
+        found = indexes >= 0
+
+        existing_indexes = indexes[found]
+        existing_positions = positions.take(found)
+        changed = (
+            self._positions.timestamps[existing_indexes]
+            != existing_positions.timestamps
+        )
+        existing_indexes = existing_indexes[changed]
+        existing_positions = existing_positions.take(changed)
+        for field in fields(VehiclePositions):
+            getattr(self._positions, field.name)[existing_indexes] = getattr(
+                existing_positions, field.name
+            )
+        self._dirty[existing_indexes] = True
+
+        new_positions = positions.take(~found)
+        if len(new_positions) == 0:
+            return
+
+        merged_positions = VehiclePositions.concatenate(
+            [self._positions, new_positions]
+        )
+        order = numpy.argsort(merged_positions.vehicle_ids, kind="stable")
+        self._positions = merged_positions.take(order)
+        self._dirty = numpy.concatenate(
+            [self._dirty, numpy.ones(len(new_positions), dtype=numpy.bool_)]
+        )[order]
+
+    def is_flush_due(self) -> bool:
+        """
+        Return whether `flush_interval` has elapsed since the last flush.
+        """
+        elapsed_time = time.monotonic() - self._last_flush_time
+        return elapsed_time >= self.flush_interval.total_seconds()
+
+    def flush(self, db: Session, force: bool = False) -> None:
+        """
+        Write the changed positions to the database if the flush is due.
+
+        Parameters:
+        - `force`: Flush even if `flush_interval` has not elapsed yet.
+        """
+        if not force and not self.is_flush_due():
+            return
+
+        vehicles_to_save = self._positions.take(self._dirty).to_dicts()
+        logger.info(f"Salvando {len(vehicles_to_save)} veículos na base de dados...")
+        vehicle_repository.upsert_vehicles(db=db, vehicles=vehicles_to_save)
+
+        self._dirty[:] = False
+        self._last_flush_time = time.monotonic()
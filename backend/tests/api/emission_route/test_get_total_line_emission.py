@@ -0,0 +1,57 @@
+from app.schemas import LineEmissionResponse, VehicleType
+from fastapi import status
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from tests.factories.models import LineFactory, LineStopFactory, StopFactory
+from tests.factories.schemas import MyclimateCarbonEmissionFactory
+from tests.helpers import MyclimateHelper
+
+ENDPOINT_URL = "/emissions/lines/total"
+
+
+def test_successful_response(client: TestClient):
+    """
+    GIVEN  a line with stops in database
+    WHEN   the `/emissions/lines/total` endpoint is called with its name
+    THEN   a response with status `HTTP_200_OK` should be returned, with the
+           emission of the whole line
+    """
+    # GIVEN
+    MyclimateHelper.mock_carbon_emission(
+        distance=None,
+        vehicle_type=VehicleType.BUS,
+        response=MyclimateCarbonEmissionFactory.build(),
+    )
+    line = LineFactory.create_sync()
+    LineStopFactory.create_sync(
+        line=line, stop=StopFactory.create_sync(), stop_order=1, distance_traveled=0
+    )
+    LineStopFactory.create_sync(
+        line=line, stop=StopFactory.create_sync(), stop_order=2, distance_traveled=5
+    )
+
+    # WHEN
+    response = client.get(ENDPOINT_URL, params={"line_number": line.name})
+
+    # THEN
+    assert response.status_code == status.HTTP_200_OK, response.json()
+    emissions = TypeAdapter(list[LineEmissionResponse]).validate_python(
+        response.json()
+    )
+    assert len(emissions) == 1
+    assert emissions[0].line.id == line.id
+    assert emissions[0].distance == 5
+
+
+def test_line_not_found(client: TestClient):
+    """
+    GIVEN  no lines in database
+    WHEN   the `/emissions/lines/total` endpoint is called
+    THEN   a response with status `HTTP_404_NOT_FOUND` should be returned
+    """
+    # WHEN
+    response = client.get(ENDPOINT_URL, params={"line_number": "8055-51"})
+
+    # THEN
+    assert response.status_code == status.HTTP_404_NOT_FOUND
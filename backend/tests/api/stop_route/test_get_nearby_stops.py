@@ -0,0 +1,73 @@
+from app.schemas import NearbyStop
+from fastapi import status
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from tests.factories.models import LineFactory, LineStopFactory, StopFactory
+
+ENDPOINT_URL = "/stops/nearby"
+
+
+def test_successful_response(client: TestClient):
+    """
+    GIVEN  some stops in database
+    WHEN   the GET `/stops/nearby` endpoint is called
+    THEN   the closest stops should be returned, sorted by distance
+    """
+    # GIVEN
+    far_stop = StopFactory.create_sync(latitude=-23.60, longitude=-46.60)
+    close_stop = StopFactory.create_sync(latitude=-23.551, longitude=-46.631)
+    StopFactory.create_sync(latitude=10, longitude=10)
+
+    # WHEN
+    response = client.get(
+        ENDPOINT_URL, params={"lat": -23.55, "lon": -46.63, "limit": 2}
+    )
+
+    # THEN
+    assert response.status_code == status.HTTP_200_OK, response.json()
+    stops = TypeAdapter(list[NearbyStop]).validate_python(response.json())
+    assert [stop.id for stop in stops] == [close_stop.id, far_stop.id]
+    assert stops[0].distance < stops[1].distance
+
+
+def test_radius_and_line(client: TestClient):
+    """
+    GIVEN  some stops in database, only some of them in a line
+    WHEN   the GET `/stops/nearby` endpoint is called with a radius and a line
+    THEN   only the stops of the line inside the radius should be returned
+    """
+    # GIVEN
+    line = LineFactory.create_sync()
+    line_stop = StopFactory.create_sync(latitude=-23.552, longitude=-46.632)
+    StopFactory.create_sync(latitude=-23.5501, longitude=-46.6301)
+    far_line_stop = StopFactory.create_sync(latitude=-23.70, longitude=-46.70)
+    LineStopFactory.create_sync(line=line, stop=line_stop, stop_order=1)
+    LineStopFactory.create_sync(line=line, stop=far_line_stop, stop_order=2)
+
+    # WHEN
+    response = client.get(
+        ENDPOINT_URL,
+        params={"lat": -23.55, "lon": -46.63, "radius": 1, "line_id": line.id},
+    )
+
+    # THEN
+    assert response.status_code == status.HTTP_200_OK, response.json()
+    stops = TypeAdapter(list[NearbyStop]).validate_python(response.json())
+    assert [stop.id for stop in stops] == [line_stop.id]
+
+
+def test_invalid_coordinates(client: TestClient):
+    """
+    GIVEN  an invalid latitude
+    WHEN   the GET `/stops/nearby` endpoint is called
+    THEN   a response with status `HTTP_422_UNPROCESSABLE_ENTITY` should be returned
+    """
+    # GIVEN
+    params = {"lat": 100, "lon": 0}
+
+    # WHEN
+    response = client.get(ENDPOINT_URL, params=params)
+
+    # THEN
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -15,3 +15,22 @@ def test_health_check(client: TestClient):
 
     # THEN
     assert response.status_code == status.HTTP_200_OK
+
+
+def test_caches_metrics(client: TestClient):
+    """
+    GIVEN
+    WHEN   the caches metrics endpoint is called
+    THEN   the metrics of the MyClimate cache should be returned
+    """
+    # WHEN
+    response = client.get("/metrics/caches")
+
+    # THEN
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["myclimate"] == {
+        "size": 0,
+        "hits": 0,
+        "backend_hits": 0,
+        "misses": 0,
+    }
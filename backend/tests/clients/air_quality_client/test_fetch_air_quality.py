@@ -0,0 +1,163 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+import responses
+from app.clients import air_quality_client
+from app.clients.air_quality_client import (
+    AIR_QUALITY_API_URL,
+    air_quality_cache,
+    fetch_air_quality,
+)
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import CacheEntryModel
+from pytest_mock import MockerFixture
+from responses import matchers
+
+AIR_QUALITY_RESPONSE = {"indexes": [{"code": "uaqi", "aqi": 70}]}
+
+
+@pytest.fixture(autouse=True)
+def api_key(mocker: MockerFixture):
+    """
+    Configure a Google API key.
+    """
+    mocker.patch.object(settings, "GOOGLE_API_KEY", "key")
+
+
+def mock_air_quality() -> responses.BaseResponse:
+    """
+    Mock the current conditions endpoint.
+    """
+    return responses.post(
+        AIR_QUALITY_API_URL,
+        match=[matchers.query_param_matcher({"key": "key"})],
+        json=AIR_QUALITY_RESPONSE,
+    )
+
+
+def mock_now(mocker: MockerFixture, moment: datetime) -> None:
+    """
+    Mock the current moment seen by the client.
+    """
+    mocked_datetime = mocker.patch(f"{air_quality_client.__name__}.datetime")
+    mocked_datetime.now.return_value = moment
+
+
+def test_nearby_coordinates():
+    """
+    GIVEN  the air quality of some coordinates
+    WHEN   the `fetch_air_quality` is called with coordinates a few meters away
+    THEN   the reading of their grid cell should be returned without calling
+           the API
+    """
+    # GIVEN
+    endpoint_mock = mock_air_quality()
+    fetch_air_quality(-23.5614, -46.6559)
+
+    # WHEN
+    returned_reading = fetch_air_quality(-23.5618, -46.6555)
+
+    # THEN
+    assert returned_reading == AIR_QUALITY_RESPONSE
+    assert endpoint_mock.call_count == 1
+    assert air_quality_cache.metrics.hits == 1
+
+
+def test_cell_center():
+    """
+    GIVEN  coordinates inside a grid cell
+    WHEN   the `fetch_air_quality` is called
+    THEN   the air quality of the center of the cell should be requested
+    """
+    # GIVEN
+    endpoint_mock = mock_air_quality()
+
+    # WHEN
+    fetch_air_quality(-23.5614, -46.6559)
+
+    # THEN
+    assert endpoint_mock.calls[0].request.body is not None
+    location = json.loads(endpoint_mock.calls[0].request.body)["location"]
+    assert location == pytest.approx(
+        {"latitude": -23.5629272, "longitude": -46.6534424}
+    )
+
+
+def test_distant_coordinates():
+    """
+    GIVEN  the air quality of some coordinates
+    WHEN   the `fetch_air_quality` is called with coordinates in another cell
+    THEN   the API should be called again
+    """
+    # GIVEN
+    endpoint_mock = mock_air_quality()
+    fetch_air_quality(-23.5614, -46.6559)
+
+    # WHEN
+    fetch_air_quality(-23.5505, -46.6333)
+
+    # THEN
+    assert endpoint_mock.call_count == 2
+
+
+def test_new_hour(mocker: MockerFixture):
+    """
+    GIVEN  the air quality of some coordinates in a previous hour
+    WHEN   the `fetch_air_quality` is called with the same coordinates
+    THEN   the API should be called again
+    """
+    # GIVEN
+    endpoint_mock = mock_air_quality()
+    mock_now(mocker, datetime(2025, 1, 6, 10, 59, tzinfo=timezone.utc))
+    fetch_air_quality(-23.5614, -46.6559)
+    mock_now(mocker, datetime(2025, 1, 6, 11, 0, tzinfo=timezone.utc))
+
+    # WHEN
+    fetch_air_quality(-23.5614, -46.6559)
+
+    # THEN
+    assert endpoint_mock.call_count == 2
+
+
+def test_single_stored_reading(mocker: MockerFixture):
+    """
+    GIVEN  the air quality of a grid cell in a previous hour
+    WHEN   the `fetch_air_quality` requests it again in a new hour
+    THEN   the stored reading of the cell should be replaced
+    """
+    # GIVEN
+    mock_air_quality()
+    mock_now(mocker, datetime(2025, 1, 6, 10, 59, tzinfo=timezone.utc))
+    fetch_air_quality(-23.5614, -46.6559)
+    mock_now(mocker, datetime(2025, 1, 6, 11, 0, tzinfo=timezone.utc))
+
+    # WHEN
+    fetch_air_quality(-23.5614, -46.6559)
+
+    # THEN
+    session = SessionLocal()
+    assert (
+        session.query(CacheEntryModel).filter_by(namespace="air_quality").count() == 1
+    )
+
+
+def test_stored_reading():
+    """
+    GIVEN  the air quality of some coordinates forgotten by the memory cache
+    WHEN   the `fetch_air_quality` is called with the same coordinates
+    THEN   the reading stored in the database should be returned
+    """
+    # GIVEN
+    endpoint_mock = mock_air_quality()
+    fetch_air_quality(-23.5614, -46.6559)
+    air_quality_cache.clear()
+
+    # WHEN
+    returned_reading = fetch_air_quality(-23.5614, -46.6559)
+
+    # THEN
+    assert returned_reading == AIR_QUALITY_RESPONSE
+    assert endpoint_mock.call_count == 1
+    assert air_quality_cache.metrics.backend_hits == 1
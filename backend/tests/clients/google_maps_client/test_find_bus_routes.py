@@ -0,0 +1,160 @@
+from datetime import datetime
+
+import pytest
+import responses
+from app.clients import google_maps_client
+from app.clients.google_maps_client import (
+    GOOGLE_ROUTES_API_URL,
+    find_bus_routes,
+    get_cache_window,
+    routes_cache,
+)
+from app.constants import SAO_PAULO_ZONE
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import CacheEntryModel
+from fastapi import status
+from pytest_mock import MockerFixture
+from requests.exceptions import HTTPError
+
+GOOGLE_RESPONSE = {"routes": [{"polyline": {"encodedPolyline": "abc"}}]}
+
+
+def mock_now(mocker: MockerFixture, moment: datetime) -> None:
+    """
+    Mock the current moment seen by the client.
+    """
+    mocked_datetime = mocker.patch(f"{google_maps_client.__name__}.datetime")
+    mocked_datetime.now.return_value = moment
+
+
+def test_cached_routes(mocker: MockerFixture):
+    """
+    GIVEN  bus routes already computed by Google in the current window
+    WHEN   the `find_bus_routes` is called with the same addresses typed
+           differently
+    THEN   the cached routes should be returned without calling Google
+    """
+    # GIVEN
+    mock_now(mocker, datetime(2025, 1, 6, 7, 1, tzinfo=SAO_PAULO_ZONE))
+    endpoint_mock = responses.post(GOOGLE_ROUTES_API_URL, json=GOOGLE_RESPONSE)
+    find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+
+    # WHEN
+    returned_routes = find_bus_routes("  av paulista 1000", "PRACA DA SE")
+
+    # THEN
+    assert returned_routes == GOOGLE_RESPONSE
+    assert endpoint_mock.call_count == 1
+    assert routes_cache.metrics.hits == 1
+
+
+def test_new_window(mocker: MockerFixture):
+    """
+    GIVEN  bus routes computed by Google in a previous window
+    WHEN   the `find_bus_routes` is called with the same addresses
+    THEN   the routes should be computed again
+    """
+    # GIVEN
+    mock_now(mocker, datetime(2025, 1, 6, 7, 1, tzinfo=SAO_PAULO_ZONE))
+    endpoint_mock = responses.post(GOOGLE_ROUTES_API_URL, json=GOOGLE_RESPONSE)
+    find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+    mock_now(mocker, datetime(2025, 1, 6, 7, 20, tzinfo=SAO_PAULO_ZONE))
+
+    # WHEN
+    find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+
+    # THEN
+    assert endpoint_mock.call_count == 2
+
+
+def test_single_stored_value(mocker: MockerFixture):
+    """
+    GIVEN  bus routes computed by Google in a previous window
+    WHEN   the `find_bus_routes` computes them again in a new window
+    THEN   the stored value of the addresses should be replaced
+    """
+    # GIVEN
+    mock_now(mocker, datetime(2025, 1, 6, 7, 1, tzinfo=SAO_PAULO_ZONE))
+    responses.post(GOOGLE_ROUTES_API_URL, json=GOOGLE_RESPONSE)
+    find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+    mock_now(mocker, datetime(2025, 1, 6, 12, 0, tzinfo=SAO_PAULO_ZONE))
+
+    # WHEN
+    find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+
+    # THEN
+    session = SessionLocal()
+    assert (
+        session.query(CacheEntryModel).filter_by(namespace="google_routes").count() == 1
+    )
+
+
+def test_stored_routes():
+    """
+    GIVEN  bus routes computed by Google and forgotten by the memory cache
+    WHEN   the `find_bus_routes` is called with the same addresses
+    THEN   the routes stored in the database should be returned
+    """
+    # GIVEN
+    endpoint_mock = responses.post(GOOGLE_ROUTES_API_URL, json=GOOGLE_RESPONSE)
+    find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+    routes_cache.clear()
+
+    # WHEN
+    returned_routes = find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+
+    # THEN
+    assert returned_routes == GOOGLE_RESPONSE
+    assert endpoint_mock.call_count == 1
+    assert routes_cache.metrics.backend_hits == 1
+
+
+def test_error_not_cached():
+    """
+    GIVEN  an error of the Google API
+    WHEN   the `find_bus_routes` is called twice with the same addresses
+    THEN   the error should be raised and Google should be called both times
+    """
+    # GIVEN
+    endpoint_mock = responses.post(
+        GOOGLE_ROUTES_API_URL, status=status.HTTP_500_INTERNAL_SERVER_ERROR, json={}
+    )
+
+    # WHEN
+    # THEN
+    for _ in range(2):
+        with pytest.raises(HTTPError):
+            find_bus_routes("Av. Paulista, 1000", "Praça da Sé")
+    assert endpoint_mock.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "moment,expected_start,expected_minutes",
+    [
+        (
+            datetime(2025, 1, 6, 8, 40, tzinfo=SAO_PAULO_ZONE),
+            datetime(2025, 1, 6, 8, 30, tzinfo=SAO_PAULO_ZONE),
+            settings.GOOGLE_ROUTES_CACHE_PEAK_TTL_MINUTES,
+        ),
+        (
+            datetime(2025, 1, 6, 13, 40, tzinfo=SAO_PAULO_ZONE),
+            datetime(2025, 1, 6, 13, 0, tzinfo=SAO_PAULO_ZONE),
+            settings.GOOGLE_ROUTES_CACHE_OFF_PEAK_TTL_MINUTES,
+        ),
+    ],
+)
+def test_cache_window(
+    moment: datetime, expected_start: datetime, expected_minutes: int
+):
+    """
+    GIVEN  a moment in a peak or in an off-peak hour
+    WHEN   the `get_cache_window` is called
+    THEN   the window of the moment should be returned with the TTL of its hour
+    """
+    # WHEN
+    start, duration = get_cache_window(moment)
+
+    # THEN
+    assert start == expected_start
+    assert duration.total_seconds() == expected_minutes * 60
@@ -1,15 +1,22 @@
+import json
 import math
 import random
 
 import pytest
+import responses
 from app.clients.myclimate_client import (
+    BULK_CARBON_EMISSION_URL,
+    BUS_FUEL_CONSUMPTION,
     MAXIMUM_ACCEPTED_DISTANCE,
     MINIMUM_ACCEPTED_DISTANCE,
     bulk_calculate_carbon_emission,
 )
+from app.core.config import settings
 from app.exceptions import MyclimateError
 from app.schemas import VehicleType
 from fastapi import status
+from pytest_mock import MockerFixture
+from requests import PreparedRequest
 
 from tests.factories.schemas import (
     MyclimateBulkCarbonEmissionFactory,
@@ -144,3 +151,106 @@ def test_exception():
     with pytest.raises(MyclimateError):
         bulk_calculate_carbon_emission(distances=[3], vehicle_type=VehicleType.BUS)
     assert endpoint_mock.call_count > 0
+
+
+def test_cached_distances():
+    """
+    GIVEN  some distances already priced by the Myclimate API
+    WHEN   the `bulk_calculate_carbon_emission` is called with them and a new one
+    THEN   only the new distance should be sent to the API
+    """
+    # GIVEN
+    multiplier = 2
+    endpoint_mock = MyclimateHelper.mock_simplified_bulk_carbon_emission(
+        multiplier=multiplier
+    )
+    bulk_calculate_carbon_emission(distances=[3, 5], vehicle_type=VehicleType.BUS)
+
+    # WHEN
+    returned_emissions = bulk_calculate_carbon_emission(
+        distances=[5, 7, 3.0001], vehicle_type=VehicleType.BUS
+    )
+
+    # THEN
+    assert endpoint_mock.call_count == 2
+    assert json.loads(endpoint_mock.calls[-1].request.body)["trips"] == [
+        {
+            "fuel_type": "diesel",
+            "fuel_consumption": BUS_FUEL_CONSUMPTION,
+            "km": 7,
+            "id": 1,
+        }
+    ]
+    assert returned_emissions == [10, 14, 6]
+
+
+def test_chunks(mocker: MockerFixture):
+    """
+    GIVEN  more distances than the bulk chunk size
+    WHEN   the `bulk_calculate_carbon_emission` is called
+    THEN   the distances should be sent in chunks and the emissions should be
+           returned in the order of the distances
+    """
+    # GIVEN
+    mocker.patch.object(settings, "MYCLIMATE_BULK_CHUNK_SIZE", 2)
+    distances = [5, 1, 4, 2, 3]
+    multiplier = 2
+    endpoint_mock = MyclimateHelper.mock_simplified_bulk_carbon_emission(
+        multiplier=multiplier
+    )
+
+    # WHEN
+    returned_emissions = bulk_calculate_carbon_emission(
+        distances=distances, vehicle_type=VehicleType.BUS
+    )
+
+    # THEN
+    assert endpoint_mock.call_count == 3
+    for call in endpoint_mock.calls:
+        assert len(json.loads(call.request.body)["trips"]) <= 2
+    assert returned_emissions == [distance * multiplier for distance in distances]
+
+
+def test_failed_chunk(mocker: MockerFixture):
+    """
+    GIVEN  a chunk of distances which always fails in the Myclimate API
+    WHEN   the `bulk_calculate_carbon_emission` is called
+    THEN   only the failed chunk should be retried, a `MyclimateError` should be
+           raised and the emissions of the other chunks should be cached
+    """
+    # GIVEN
+    mocker.patch.object(settings, "MYCLIMATE_BULK_CHUNK_SIZE", 1)
+    failed_distance = 5
+
+    def request_callback(request: PreparedRequest) -> tuple[int, dict, str]:
+        assert request.body is not None
+        [trip] = json.loads(request.body)["trips"]
+        if trip["km"] == failed_distance:
+            return status.HTTP_503_SERVICE_UNAVAILABLE, {}, "{}"
+        return (
+            status.HTTP_200_OK,
+            {},
+            json.dumps({"trips": [{"id": trip["id"], "kg": trip["km"] * 2}]}),
+        )
+
+    endpoint_mock = responses.add_callback(
+        method=responses.POST, url=BULK_CARBON_EMISSION_URL, callback=request_callback
+    )
+
+    # WHEN
+    # THEN
+    with pytest.raises(MyclimateError):
+        bulk_calculate_carbon_emission(
+            distances=[3, failed_distance], vehicle_type=VehicleType.BUS
+        )
+    sent_distances = [
+        json.loads(call.request.body)["trips"][0]["km"] for call in endpoint_mock.calls
+    ]
+    assert sent_distances.count(3) == 1
+    assert sent_distances.count(failed_distance) == 3
+
+    endpoint_mock.calls.reset()
+    assert bulk_calculate_carbon_emission(
+        distances=[3], vehicle_type=VehicleType.BUS
+    ) == [6]
+    assert endpoint_mock.call_count == 0
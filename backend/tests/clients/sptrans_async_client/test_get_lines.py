@@ -0,0 +1,35 @@
+import httpx
+import pytest
+from app.clients.sptrans_async_client import get_lines
+
+from tests.factories.schemas import SPTransLineFactory
+from tests.helpers import SPTransHelper
+
+
+@pytest.mark.asyncio
+async def test_response():
+    """
+    GIVEN  a list of lines to be returned by the SPTrans API
+    WHEN   the `get_lines` coroutine is awaited
+    THEN   the related lines should be returned and the credentials should be
+           sent as cookies
+    """
+    # GIVEN
+    expected_lines = SPTransLineFactory.batch(size=2)
+    pattern = "test"
+    endpoint_mock = SPTransHelper.mock_get_lines(
+        response=expected_lines, pattern=pattern
+    )
+
+    # WHEN
+    returned_lines = await get_lines(
+        credentials=httpx.Cookies(SPTransHelper.CREDENTIALS_COOKIES),
+        pattern=pattern,
+    )
+
+    # THEN
+    assert returned_lines == expected_lines
+    assert endpoint_mock.call_count == 1
+    request = endpoint_mock.calls[0].request
+    assert request.params == {"termosBusca": pattern}
+    assert request.headers["Cookie"] == "credentials=test"
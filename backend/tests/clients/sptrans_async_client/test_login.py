@@ -0,0 +1,19 @@
+import pytest
+from app.clients.sptrans_async_client import login
+
+from tests.helpers import SPTransHelper
+
+
+@pytest.mark.asyncio
+async def test_response():
+    """
+    GIVEN  default credentials to be returned
+    WHEN   the `login` coroutine is awaited
+    THEN   the expected credentials should be returned
+    """
+    # GIVEN
+    # WHEN
+    returned_credentials = await login()
+
+    # THEN
+    assert dict(returned_credentials) == SPTransHelper.CREDENTIALS_COOKIES
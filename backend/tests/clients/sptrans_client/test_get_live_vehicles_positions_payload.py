@@ -0,0 +1,28 @@
+import json
+
+from app.clients.sptrans_client import get_live_vehicles_positions_payload
+
+from tests.factories.schemas import SPTransLinesVehiclesResponseFactory
+from tests.helpers import SPTransHelper
+
+
+def test_response():
+    """
+    GIVEN  a list of vehicles to be returned by the SPTrans API
+    WHEN   the `get_live_vehicles_positions_payload` is called
+    THEN   the raw payload should be returned
+    """
+    # GIVEN
+    expected_lines_vehicles = SPTransLinesVehiclesResponseFactory.build()
+    endpoint_mock = SPTransHelper.mock_get_vehicles_positions(
+        response=expected_lines_vehicles
+    )
+
+    # WHEN
+    payload = get_live_vehicles_positions_payload(credentials=SPTransHelper.COOKIE_JAR)
+
+    # THEN
+    assert json.loads(payload) == expected_lines_vehicles.model_dump(
+        by_alias=True, mode="json"
+    )
+    assert endpoint_mock.call_count == 1
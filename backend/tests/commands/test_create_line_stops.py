@@ -1,11 +1,9 @@
 import logging
 
-from app.commands.create_line_stops import (
-    create_line_stops,
-    load_line_stops,
-    load_shapes,
-    load_trips,
-)
+import numpy
+import pytest
+from app.commands.create_line_stops import create_line_stops, match_stops_to_shape
+from app.commands.gtfs_loader import load_line_stops, load_shapes, load_trips
 from app.core.database import SessionLocal
 from app.models import LineDirection, LineStopModel
 from app.schemas import SPTransLineStop, SPTransShape
@@ -13,6 +11,7 @@ from pytest import LogCaptureFixture
 from pytest_mock import MockFixture
 
 from tests.factories.models import LineFactory, LineStopFactory, StopFactory
+from tests.helpers import GTFSHelper
 
 LOAD_SHAPES_LOCATION = f"{load_shapes.__module__}.{load_shapes.__name__}"
 LOAD_TRIPS_LOCATION = f"{load_trips.__module__}.{load_trips.__name__}"
@@ -35,24 +34,28 @@ def test_create_line_stops(mocker: MockFixture):
     trip_id = f"{line.name}-{get_code(line.direction)}"
     stop = StopFactory.create_sync()
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={})
-    mocked_shapes = mocker.patch(LOAD_SHAPES_LOCATION, return_value={})
+    mocked_shapes = mocker.patch(
+        LOAD_SHAPES_LOCATION, return_value=GTFSHelper.build_shapes({})
+    )
 
     first_stop_order = 1
     second_stop_order = 18
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=first_stop_order,
-                trip_id=trip_id,
-            ),
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=second_stop_order,
-                trip_id=trip_id,
-            ),
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=first_stop_order,
+                    trip_id=trip_id,
+                ),
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=second_stop_order,
+                    trip_id=trip_id,
+                ),
+            ]
+        ),
     )
 
     # WHEN
@@ -89,17 +92,21 @@ def test_update_line_stops(mocker: MockFixture):
         f"{target_line_stop.line.name}-{get_code(target_line_stop.line.direction)}"
     )
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={})
-    mocked_shapes = mocker.patch(LOAD_SHAPES_LOCATION, return_value={})
+    mocked_shapes = mocker.patch(
+        LOAD_SHAPES_LOCATION, return_value=GTFSHelper.build_shapes({})
+    )
 
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=target_line_stop.stop_id,
-                trip_id=trip_id,
-                stop_order=target_line_stop.stop_order,
-            ),
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=target_line_stop.stop_id,
+                    trip_id=trip_id,
+                    stop_order=target_line_stop.stop_order,
+                ),
+            ]
+        ),
     )
 
     # WHEN
@@ -136,17 +143,21 @@ def test_distance_line_without_shape(
     trip_id = f"{line.name}-{get_code(line.direction)}"
     stop = StopFactory.create_sync()
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={})
-    mocked_shapes = mocker.patch(LOAD_SHAPES_LOCATION, return_value={})
+    mocked_shapes = mocker.patch(
+        LOAD_SHAPES_LOCATION, return_value=GTFSHelper.build_shapes({})
+    )
 
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=1,
-                trip_id=trip_id,
-            ),
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=1,
+                    trip_id=trip_id,
+                ),
+            ]
+        ),
     )
     caplog.clear()
 
@@ -179,17 +190,21 @@ def test_distance_shape_without_data(mocker: MockFixture, caplog: LogCaptureFixt
     stop = StopFactory.create_sync()
     shape_id = "test"
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={trip_id: shape_id})
-    mocked_shapes = mocker.patch(LOAD_SHAPES_LOCATION, return_value={})
+    mocked_shapes = mocker.patch(
+        LOAD_SHAPES_LOCATION, return_value=GTFSHelper.build_shapes({})
+    )
 
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=1,
-                trip_id=trip_id,
-            ),
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=1,
+                    trip_id=trip_id,
+                ),
+            ]
+        ),
     )
 
     # WHEN
@@ -224,33 +239,37 @@ def test_distance(mocker: MockFixture):
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={trip_id: shape_id})
     mocked_shapes = mocker.patch(
         LOAD_SHAPES_LOCATION,
-        return_value={
-            shape_id: [
-                SPTransShape(
-                    sequence=1,
-                    distance=expected_distance - 1,
-                    latitude=stop.latitude - 1,
-                    longitude=stop.longitude - 1,
-                ),
-                SPTransShape(
-                    sequence=2,
-                    distance=expected_distance,
-                    latitude=stop.latitude,
-                    longitude=stop.longitude,
-                ),
-            ]
-        },
+        return_value=GTFSHelper.build_shapes(
+            {
+                shape_id: [
+                    SPTransShape(
+                        sequence=1,
+                        distance=expected_distance - 1,
+                        latitude=stop.latitude - 1,
+                        longitude=stop.longitude - 1,
+                    ),
+                    SPTransShape(
+                        sequence=2,
+                        distance=expected_distance,
+                        latitude=stop.latitude,
+                        longitude=stop.longitude,
+                    ),
+                ]
+            }
+        ),
     )
 
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=2,
-                trip_id=trip_id,
-            ),
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=2,
+                    trip_id=trip_id,
+                ),
+            ]
+        ),
     )
 
     # WHEN
@@ -281,27 +300,31 @@ def test_distance_first_stop(mocker: MockFixture):
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={trip_id: shape_id})
     mocked_shapes = mocker.patch(
         LOAD_SHAPES_LOCATION,
-        return_value={
-            shape_id: [
-                SPTransShape(
-                    sequence=1,
-                    distance=1,
-                    latitude=stop.latitude,
-                    longitude=stop.longitude,
-                ),
-            ]
-        },
+        return_value=GTFSHelper.build_shapes(
+            {
+                shape_id: [
+                    SPTransShape(
+                        sequence=1,
+                        distance=1,
+                        latitude=stop.latitude,
+                        longitude=stop.longitude,
+                    ),
+                ]
+            }
+        ),
     )
 
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=1,
-                trip_id=trip_id,
-            ),
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=1,
+                    trip_id=trip_id,
+                ),
+            ]
+        ),
     )
 
     # WHEN
@@ -331,13 +354,15 @@ def test_shapes_interval(mocker: MockFixture):
     stop = StopFactory.create_sync()
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=2,
-                trip_id=trip_id,
-            )
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=2,
+                    trip_id=trip_id,
+                )
+            ]
+        ),
     )
 
     shapes_interval = 5
@@ -346,25 +371,27 @@ def test_shapes_interval(mocker: MockFixture):
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={trip_id: shape_id})
     mocked_shapes = mocker.patch(
         LOAD_SHAPES_LOCATION,
-        return_value={
-            shape_id: [
-                SPTransShape(
-                    sequence=i,
-                    distance=expected_distance,
-                    latitude=stop.latitude + 1,
-                    longitude=stop.longitude + 1,
-                )
-                for i in range(shapes_interval)
-            ]
-            + [
-                SPTransShape(
-                    sequence=shapes_interval,
-                    distance=expected_distance + 1,
-                    latitude=stop.latitude,
-                    longitude=stop.longitude,
-                )
-            ]
-        },
+        return_value=GTFSHelper.build_shapes(
+            {
+                shape_id: [
+                    SPTransShape(
+                        sequence=i,
+                        distance=expected_distance,
+                        latitude=stop.latitude + 1,
+                        longitude=stop.longitude + 1,
+                    )
+                    for i in range(shapes_interval)
+                ]
+                + [
+                    SPTransShape(
+                        sequence=shapes_interval,
+                        distance=expected_distance + 1,
+                        latitude=stop.latitude,
+                        longitude=stop.longitude,
+                    )
+                ]
+            }
+        ),
     )
 
     # WHEN
@@ -394,13 +421,15 @@ def test_distance_tolerance(mocker: MockFixture):
     stop = StopFactory.create_sync()
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=2,
-                trip_id=trip_id,
-            )
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=2,
+                    trip_id=trip_id,
+                )
+            ]
+        ),
     )
 
     num_distant_objects = 5
@@ -409,25 +438,27 @@ def test_distance_tolerance(mocker: MockFixture):
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={trip_id: shape_id})
     mocked_shapes = mocker.patch(
         LOAD_SHAPES_LOCATION,
-        return_value={
-            shape_id: [
-                SPTransShape(
-                    sequence=i,
-                    distance=expected_distance - 1,
-                    latitude=stop.latitude + 1,
-                    longitude=stop.longitude + 1,
-                )
-                for i in range(num_distant_objects)
-            ]
-            + [
-                SPTransShape(
-                    sequence=num_distant_objects,
-                    distance=expected_distance,
-                    latitude=stop.latitude,
-                    longitude=stop.longitude,
-                )
-            ]
-        },
+        return_value=GTFSHelper.build_shapes(
+            {
+                shape_id: [
+                    SPTransShape(
+                        sequence=i,
+                        distance=expected_distance - 1,
+                        latitude=stop.latitude + 1,
+                        longitude=stop.longitude + 1,
+                    )
+                    for i in range(num_distant_objects)
+                ]
+                + [
+                    SPTransShape(
+                        sequence=num_distant_objects,
+                        distance=expected_distance,
+                        latitude=stop.latitude,
+                        longitude=stop.longitude,
+                    )
+                ]
+            }
+        ),
     )
 
     # WHEN
@@ -460,31 +491,35 @@ def test_distance_duplicate_stops(mocker: MockFixture):
     distances = [1, 2, 3]
     mocked_line_stops = mocker.patch(
         LOAD_LINE_STOPS_LOCATION,
-        return_value=[
-            SPTransLineStop(
-                stop_id=stop.id,
-                stop_order=i + 2,
-                trip_id=trip_id,
-            )
-            for i, stop in enumerate(stops)
-        ],
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=i + 2,
+                    trip_id=trip_id,
+                )
+                for i, stop in enumerate(stops)
+            ]
+        ),
     )
 
     shape_id = "test"
     mocked_trips = mocker.patch(LOAD_TRIPS_LOCATION, return_value={trip_id: shape_id})
     mocked_shapes = mocker.patch(
         LOAD_SHAPES_LOCATION,
-        return_value={
-            shape_id: [
-                SPTransShape(
-                    sequence=i,
-                    distance=distance,
-                    latitude=stop.latitude,
-                    longitude=stop.longitude,
-                )
-                for i, (stop, distance) in enumerate(zip(stops, distances))
-            ]
-        },
+        return_value=GTFSHelper.build_shapes(
+            {
+                shape_id: [
+                    SPTransShape(
+                        sequence=i,
+                        distance=distance,
+                        latitude=stop.latitude,
+                        longitude=stop.longitude,
+                    )
+                    for i, (stop, distance) in enumerate(zip(stops, distances))
+                ]
+            }
+        ),
     )
 
     # WHEN
@@ -499,3 +534,186 @@ def test_distance_duplicate_stops(mocker: MockFixture):
     for i, distance in enumerate(distances):
         line_stop = session.query(LineStopModel).filter_by(stop_order=i + 2).one()
         assert line_stop.distance_traveled == distance
+
+
+def test_match_stops_to_shape_segments():
+    """
+    GIVEN  a straight shape with few points and stops between them
+    WHEN   the `match_stops_to_shape` is called
+    THEN   the stops should be projected onto the segments and the distances
+           should be interpolated
+    """
+    # GIVEN
+    shape_coordinates = numpy.array([[0.0, 0.0], [0.0, 0.01], [0.0, 0.02]])
+    shape_distances = numpy.array([0.0, 1.0, 2.0])
+    stops_coordinates = numpy.array([[0.0001, 0.0025], [-0.0001, 0.015]])
+
+    # WHEN
+    distances, errors = match_stops_to_shape(
+        shape_coordinates=shape_coordinates,
+        shape_distances=shape_distances,
+        stops_coordinates=stops_coordinates,
+        shapes_interval=30,
+        distance_tolerance=0.3,
+    )
+
+    # THEN
+    assert distances.tolist() == pytest.approx([0.25, 1.5])
+    assert errors.tolist() == pytest.approx([0.0111, 0.0111], abs=1e-3)
+
+
+def test_match_stops_to_shape_never_goes_back():
+    """
+    GIVEN  a shape that goes and comes back through the same street and stops
+           on both ways
+    WHEN   the `match_stops_to_shape` is called
+    THEN   each stop should be matched ahead of the previous one
+    """
+    # GIVEN
+    shape_coordinates = numpy.array([[0.0, 0.0], [0.0, 0.02], [0.0, 0.0]])
+    shape_distances = numpy.array([0.0, 2.0, 4.0])
+    stops_coordinates = numpy.array([[0.0, 0.005], [0.0, 0.02], [0.0, 0.005]])
+
+    # WHEN
+    distances, _ = match_stops_to_shape(
+        shape_coordinates=shape_coordinates,
+        shape_distances=shape_distances,
+        stops_coordinates=stops_coordinates,
+        shapes_interval=30,
+        distance_tolerance=0.3,
+    )
+
+    # THEN
+    assert distances.tolist() == pytest.approx([0.5, 2.0, 3.5])
+
+
+def test_processes(mocker: MockFixture):
+    """
+    GIVEN  some lines with shapes
+    WHEN   the `create_line_stops` is called with more than one process
+    THEN   the line stops of all the lines should be created with the same
+           distances as in a single process
+    """
+    # GIVEN
+    session = SessionLocal()
+    lines = LineFactory.create_batch_sync(size=3)
+    stops = StopFactory.create_batch_sync(size=3, latitude=-23.5)
+    shapes = {
+        line.name: [
+            SPTransShape(
+                sequence=i,
+                distance=i + line_index,
+                latitude=stop.latitude,
+                longitude=stop.longitude,
+            )
+            for i, stop in enumerate(stops)
+        ]
+        for line_index, line in enumerate(lines)
+    }
+    mocker.patch(
+        LOAD_TRIPS_LOCATION,
+        return_value={
+            f"{line.name}-{get_code(line.direction)}": line.name for line in lines
+        },
+    )
+    mocker.patch(LOAD_SHAPES_LOCATION, return_value=GTFSHelper.build_shapes(shapes))
+    mocker.patch(
+        LOAD_LINE_STOPS_LOCATION,
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id,
+                    stop_order=i + 2,
+                    trip_id=f"{line.name}-{get_code(line.direction)}",
+                )
+                for line in lines
+                for i, stop in enumerate(stops)
+            ]
+        ),
+    )
+
+    # WHEN
+    create_line_stops(processes=2)
+
+    # THEN
+    assert session.query(LineStopModel).count() == len(lines) * len(stops)
+    for line_index, line in enumerate(lines):
+        line_stops = (
+            session.query(LineStopModel)
+            .filter_by(line_id=line.id)
+            .order_by(LineStopModel.stop_order)
+            .all()
+        )
+        assert [line_stop.stop_id for line_stop in line_stops] == [
+            stop.id for stop in stops
+        ]
+        assert [line_stop.distance_traveled for line_stop in line_stops] == [
+            i + line_index for i in range(len(stops))
+        ]
+
+
+def test_incremental(mocker: MockFixture):
+    """
+    GIVEN  line stops already created from the static data
+    WHEN   the static data changes and the `create_line_stops` is called with
+           `incremental`
+    THEN   only the line stops of the changed trips should be replaced and the
+           line stops of the removed trips should be deleted
+    """
+    # GIVEN
+    session = SessionLocal()
+    unchanged_line, changed_line, removed_line = LineFactory.create_batch_sync(size=3)
+    stops = StopFactory.create_batch_sync(size=3)
+    trip_ids = {
+        line.id: f"{line.name}-{get_code(line.direction)}"
+        for line in [unchanged_line, changed_line, removed_line]
+    }
+    mocker.patch(LOAD_TRIPS_LOCATION, return_value={})
+    mocker.patch(LOAD_SHAPES_LOCATION, return_value=GTFSHelper.build_shapes({}))
+    mocked_line_stops = mocker.patch(
+        LOAD_LINE_STOPS_LOCATION,
+        return_value=GTFSHelper.build_line_stops(
+            [
+                SPTransLineStop(
+                    stop_id=stop.id, stop_order=i + 1, trip_id=trip_ids[line.id]
+                )
+                for line in [unchanged_line, changed_line, removed_line]
+                for i, stop in enumerate(stops)
+            ]
+        ),
+    )
+    create_line_stops()
+
+    session.query(LineStopModel).filter_by(line_id=unchanged_line.id).update(
+        {"distance_traveled": 99}
+    )
+    session.commit()
+    mocked_line_stops.return_value = GTFSHelper.build_line_stops(
+        [
+            SPTransLineStop(
+                stop_id=stop.id, stop_order=i + 1, trip_id=trip_ids[unchanged_line.id]
+            )
+            for i, stop in enumerate(stops)
+        ]
+        + [
+            SPTransLineStop(
+                stop_id=stops[0].id, stop_order=1, trip_id=trip_ids[changed_line.id]
+            )
+        ]
+    )
+
+    # WHEN
+    create_line_stops(incremental=True)
+
+    # THEN
+    session = SessionLocal()
+    unchanged_line_stops = (
+        session.query(LineStopModel).filter_by(line_id=unchanged_line.id).all()
+    )
+    assert len(unchanged_line_stops) == len(stops)
+    assert all(line_stop.distance_traveled == 99 for line_stop in unchanged_line_stops)
+    changed_line_stops = (
+        session.query(LineStopModel).filter_by(line_id=changed_line.id).all()
+    )
+    assert [line_stop.stop_id for line_stop in changed_line_stops] == [stops[0].id]
+    assert session.query(LineStopModel).filter_by(line_id=removed_line.id).count() == 0
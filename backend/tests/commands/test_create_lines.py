@@ -1,7 +1,13 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
 import pytest
-from app.commands.create_lines import create_lines
+import responses
+from app.clients.sptrans_client import LINES_LOOK_UP_URL
+from app.commands.create_lines import create_lines, look_up_lines
 from app.core.database import SessionLocal
 from app.models import LineDirection, LineModel
+from fastapi import status
 
 from tests.factories.schemas import SPTransLineFactory
 from tests.helpers import SPTransHelper
@@ -110,3 +116,88 @@ def test_existing_line_without_api_data():
     # THEN
     session = SessionLocal()
     assert session.query(LineModel).count() == 1
+
+
+def test_look_up_retries_and_failures():
+    """
+    GIVEN  a pattern whose look up always fails and another one that fails once
+    WHEN   the `look_up_lines` is called
+    THEN   the failed pattern should have no lines, the other one should have
+           its lines and the retries should be accounted
+    """
+    # GIVEN
+    line = SPTransLineFactory.build()
+    for _ in range(4):
+        responses.get(LINES_LOOK_UP_URL, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    SPTransHelper.mock_get_lines(response=[line])
+
+    # WHEN
+    with patch("asyncio.sleep", new=AsyncMock()):
+        patterns_lines, report = asyncio.run(
+            look_up_lines(
+                patterns=["failed", "retried"],
+                max_concurrency=1,
+                max_requests_per_second=0,
+            )
+        )
+
+    # THEN
+    assert patterns_lines == [[], [line]]
+    assert report.failed_patterns == ["failed"]
+    assert report.empty_patterns == []
+    assert report.retries == 3
+
+
+def test_look_up_invalid_response():
+    """
+    GIVEN  a pattern whose look up returns an invalid response
+    WHEN   the `look_up_lines` is called
+    THEN   the pattern should be accounted as failed, without aborting the
+           other look ups
+    """
+    # GIVEN
+    line = SPTransLineFactory.build()
+    for _ in range(3):
+        responses.get(LINES_LOOK_UP_URL, json=[{"cl": "invalid"}])
+    SPTransHelper.mock_get_lines(response=[line])
+
+    # WHEN
+    with patch("asyncio.sleep", new=AsyncMock()):
+        patterns_lines, report = asyncio.run(
+            look_up_lines(
+                patterns=["invalid", "valid"],
+                max_concurrency=1,
+                max_requests_per_second=0,
+            )
+        )
+
+    # THEN
+    assert patterns_lines == [[], [line]]
+    assert report.failed_patterns == ["invalid"]
+    assert report.empty_patterns == []
+
+
+def test_create_lines_incremental():
+    """
+    GIVEN  lines already created from the static data
+    WHEN   the `create_lines` is called with `incremental`
+    THEN   only the patterns without lines in the previous import should be
+           looked up again
+    """
+    # GIVEN
+    line = SPTransLineFactory.build(name="1012-21")
+    found_response = SPTransHelper.mock_get_lines(
+        response=[line], pattern=line.base_name
+    )
+    empty_response = SPTransHelper.mock_get_lines(response=[], pattern=None)
+    create_lines(max_rows=100)
+    found_calls, empty_calls = found_response.call_count, empty_response.call_count
+
+    # WHEN
+    create_lines(max_rows=100, incremental=True)
+
+    # THEN
+    assert found_response.call_count == found_calls
+    assert empty_response.call_count == 2 * empty_calls
+    session = SessionLocal()
+    assert session.query(LineModel).filter_by(id=line.id).count() == 1
@@ -1,6 +1,13 @@
+import pandas as pd
 from app.commands.create_stops import create_stops
+from app.commands.gtfs_loader import load_stops
 from app.core.database import SessionLocal
 from app.models import StopModel
+from pytest_mock import MockFixture
+
+from tests.factories.models import StopFactory, UserRouteFactory
+
+LOAD_STOPS_LOCATION = f"{load_stops.__module__}.{load_stops.__name__}"
 
 
 def test_create_stops():
@@ -45,3 +52,48 @@ def test_update_stops():
     assert stop.address == ""
     assert stop.latitude == -23.546498
     assert stop.longitude == -46.691141
+
+
+def test_create_stops_incremental(mocker: MockFixture):
+    """
+    GIVEN  stops already created from the static data
+    WHEN   the static data changes and the `create_stops` is called with
+           `incremental`
+    THEN   only the changed stops should be saved and the removed stops should
+           be deleted, except the ones of user routes
+    """
+    # GIVEN
+    columns = ["id", "name", "address", "latitude", "longitude"]
+    unchanged, changed, removed, used = (
+        (1, "Parada 1", "", -23.5, -46.6),
+        (2, "Parada 2", "", -23.6, -46.7),
+        (3, "Parada 3", "", -23.7, -46.8),
+        (4, "Parada 4", "", -23.8, -46.9),
+    )
+    created = (5, "Parada 5", "Ref.", -23.9, -47.0)
+    mocked_stops = mocker.patch(
+        LOAD_STOPS_LOCATION,
+        return_value=pd.DataFrame([unchanged, changed, removed, used], columns=columns),
+    )
+    used_stop = StopFactory.create_sync(**dict(zip(columns, used)))
+    UserRouteFactory.create_sync(departure_stop=used_stop)
+    create_stops()
+
+    session = SessionLocal()
+    session.query(StopModel).filter_by(id=unchanged[0]).one().name = "manual"
+    session.commit()
+    mocked_stops.return_value = pd.DataFrame(
+        [unchanged, (2, "Parada 2 nova", "", -23.6, -46.7), created], columns=columns
+    )
+
+    # WHEN
+    create_stops(incremental=True)
+
+    # THEN
+    session = SessionLocal()
+    stop_names = {stop.id: stop.name for stop in session.query(StopModel).all()}
+    assert stop_names[unchanged[0]] == "manual"
+    assert stop_names[changed[0]] == "Parada 2 nova"
+    assert stop_names[created[0]] == "Parada 5"
+    assert removed[0] not in stop_names
+    assert used[0] in stop_names
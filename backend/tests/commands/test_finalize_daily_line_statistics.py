@@ -0,0 +1,77 @@
+import math
+from datetime import datetime, timedelta
+
+import responses
+from app.commands.finalize_daily_line_statistics import (
+    finalize_daily_line_statistics,
+)
+from app.constants import SAO_PAULO_ZONE
+from app.core.database import SessionLocal
+from app.models import DailyLineStatisticsModel
+
+from tests.factories.models import DailyLineStatisticsFactory
+from tests.helpers import MyclimateHelper
+
+
+def test_finalize_past_statistics():
+    """
+    GIVEN  daily line statistics of yesterday and of today in database
+    WHEN   the `finalize_daily_line_statistics` function is called
+    THEN   only the emissions of yesterday should be stored
+    """
+    # GIVEN
+    session = SessionLocal()
+    today = datetime.now(tz=SAO_PAULO_ZONE).date()
+    yesterday_statistics = DailyLineStatisticsFactory.create_sync(
+        date=today - timedelta(days=1)
+    )
+    today_statistics = DailyLineStatisticsFactory.create_sync(date=today)
+    multiplier = 2
+    MyclimateHelper.mock_simplified_bulk_carbon_emission(multiplier=multiplier)
+
+    # WHEN
+    finalized = finalize_daily_line_statistics(db=session)
+
+    # THEN
+    assert finalized == 1
+    session.expire_all()
+    stored_yesterday = session.get(
+        DailyLineStatisticsModel,
+        (yesterday_statistics.line_id, yesterday_statistics.date),
+    )
+    assert stored_yesterday is not None and stored_yesterday.emission is not None
+    assert math.isclose(
+        stored_yesterday.emission,
+        yesterday_statistics.distance_traveled * multiplier,
+        abs_tol=1e-2,
+    )
+    stored_today = session.get(
+        DailyLineStatisticsModel, (today_statistics.line_id, today_statistics.date)
+    )
+    assert stored_today is not None and stored_today.emission is None
+
+
+def test_already_finalized():
+    """
+    GIVEN  daily line statistics in database whose emissions are stored
+    WHEN   the `finalize_daily_line_statistics` function is called
+    THEN   MyClimate should not be called and the emissions should be kept
+    """
+    # GIVEN
+    session = SessionLocal()
+    today = datetime.now(tz=SAO_PAULO_ZONE).date()
+    statistics = DailyLineStatisticsFactory.create_sync(
+        date=today - timedelta(days=3), emission=12
+    )
+
+    # WHEN
+    finalized = finalize_daily_line_statistics(db=session)
+
+    # THEN
+    assert finalized == 0
+    assert len(responses.calls) == 0
+    session.expire_all()
+    stored = session.get(
+        DailyLineStatisticsModel, (statistics.line_id, statistics.date)
+    )
+    assert stored is not None and stored.emission == 12
@@ -0,0 +1,183 @@
+import logging
+import os
+
+import numpy
+import pandas as pd
+import pytest
+from app.commands.gtfs_loader import (
+    load_line_stops,
+    load_shapes,
+    load_stops,
+    load_trips,
+)
+from app.core.config import settings
+from pytest import LogCaptureFixture
+from pytest_mock import MockFixture
+
+
+def test_load_shapes(tmp_path):
+    """
+    GIVEN  a shapes file with the points out of order
+    WHEN   the `load_shapes` is called
+    THEN   the points should be grouped by shape and sorted by sequence, with
+           the distances in km
+    """
+    # GIVEN
+    file_path = tmp_path / "shapes.txt"
+    file_path.write_text(
+        "shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence,shape_dist_traveled\n"
+        "B,-23.1,-46.1,2,500\n"
+        "A,-23.5,-46.5,2,1000\n"
+        "B,-23.0,-46.0,1,0\n"
+        "A,-23.4,-46.4,1,0\n"
+        "A,-23.6,-46.6,3,2500\n"
+    )
+
+    # WHEN
+    shapes = load_shapes(str(file_path))
+
+    # THEN
+    assert len(shapes) == 2
+    assert "A" in shapes and "C" not in shapes
+    assert shapes.get("C") is None
+
+    shape = shapes.get("A")
+    assert shape is not None
+    assert shape["sequence"].tolist() == [1, 2, 3]
+    assert shape["distance"].tolist() == [0, 1, 2.5]
+    assert shape["coordinates"].tolist() == [
+        [-23.4, -46.4],
+        [-23.5, -46.5],
+        [-23.6, -46.6],
+    ]
+    # The groups are views of the columns
+    assert numpy.shares_memory(shape["coordinates"], shapes.columns["coordinates"])
+
+
+def test_load_line_stops(tmp_path):
+    """
+    GIVEN  a stop times file with some trips
+    WHEN   the `load_line_stops` is called
+    THEN   the stops should be grouped by trip and sorted by stop order
+    """
+    # GIVEN
+    file_path = tmp_path / "stop_times.txt"
+    file_path.write_text(
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+        "1012-10-0,07:00:00,07:00:00,30,2\n"
+        "1012-10-0,07:00:00,07:00:00,10,1\n"
+        "1012-10-1,07:00:00,07:00:00,20,1\n"
+        "1012-10-0,07:00:00,07:00:00,20,3\n"
+    )
+
+    # WHEN
+    line_stops = load_line_stops(str(file_path))
+
+    # THEN
+    trips = {
+        trip_id: (columns["stop_id"].tolist(), columns["stop_order"].tolist())
+        for trip_id, columns in line_stops
+    }
+    assert trips == {
+        "1012-10-0": ([10, 30, 20], [1, 2, 3]),
+        "1012-10-1": ([20], [1]),
+    }
+
+
+def test_load_trips(tmp_path, caplog: LogCaptureFixture):
+    """
+    GIVEN  a trips file with a repeated trip
+    WHEN   the `load_trips` is called
+    THEN   the first shape of each trip should be returned and the repeated
+           trip should be logged
+    """
+    # GIVEN
+    file_path = tmp_path / "trips.txt"
+    file_path.write_text(
+        "route_id,service_id,trip_id,trip_headsign,direction_id,shape_id\n"
+        "1012-10,USD,1012-10-0,Term. Jd. Britania,0,84609\n"
+        "1012-10,USD,1012-10-1,Jd. Monte Belo,1,84610\n"
+        "1012-10,USD, 1012-10-0,Term. Jd. Britania,0,84611\n"
+    )
+
+    # WHEN
+    with caplog.at_level(logging.WARNING):
+        trips = load_trips(str(file_path))
+
+    # THEN
+    assert trips == {"1012-10-0": "84609", "1012-10-1": "84610"}
+    assert "Trip 1012-10-0 tem multiples shapes" in caplog.text
+
+
+@pytest.fixture
+def snapshots_path(tmp_path, mocker: MockFixture) -> str:
+    path = str(tmp_path / "snapshots")
+    mocker.patch.object(settings, "ENABLE_GTFS_SNAPSHOTS", True)
+    mocker.patch.object(settings, "GTFS_SNAPSHOTS_PATH", path)
+    return path
+
+
+def test_load_snapshot(tmp_path, snapshots_path: str, mocker: MockFixture):
+    """
+    GIVEN  a stop times file already loaded once
+    WHEN   the `load_line_stops` is called again
+    THEN   the stops should be memory-mapped from the snapshot, without
+           parsing the file again
+    """
+    # GIVEN
+    file_path = tmp_path / "stop_times.txt"
+    file_path.write_text(
+        "trip_id,stop_id,stop_sequence\n"
+        "1012-10-0,30,2\n"
+        "1012-10-0,10,1\n"
+        "1012-10-1,20,1\n"
+    )
+    first_line_stops = load_line_stops(str(file_path))
+    read_csv = mocker.spy(pd, "read_csv")
+
+    # WHEN
+    line_stops = load_line_stops(str(file_path))
+
+    # THEN
+    read_csv.assert_not_called()
+    assert len(os.listdir(snapshots_path)) == 1
+    assert line_stops.keys.tolist() == first_line_stops.keys.tolist()
+    stop_ids = line_stops.get("1012-10-0")["stop_id"]  # type: ignore[index]
+    assert stop_ids.tolist() == [10, 30]
+    assert not stop_ids.flags.writeable
+
+
+def test_load_snapshot_file_changed(tmp_path, snapshots_path: str):
+    """
+    GIVEN  a stops file already loaded once
+    WHEN   the file changes and the `load_stops` is called again
+    THEN   the new stops should be loaded and the old snapshot removed
+    """
+    # GIVEN
+    file_path = tmp_path / "stops.txt"
+    header = "stop_id,stop_name,stop_desc,stop_lat,stop_lon\n"
+    file_path.write_text(header + "1,Parada 1,,-23.5,-46.6\n")
+    load_stops(str(file_path))
+    file_path.write_text(header + "1,Parada 1,,-23.5,-46.6\n2,Parada 2,Ref.,-23,-46\n")
+
+    # WHEN
+    stops = load_stops(str(file_path))
+
+    # THEN
+    assert stops.to_dict("records") == [
+        {
+            "id": 1,
+            "name": "Parada 1",
+            "address": "",
+            "latitude": -23.5,
+            "longitude": -46.6,
+        },
+        {
+            "id": 2,
+            "name": "Parada 2",
+            "address": "Ref.",
+            "latitude": -23,
+            "longitude": -46,
+        },
+    ]
+    assert len(os.listdir(snapshots_path)) == 1
@@ -7,6 +7,7 @@ from app.commands.update_daily_line_statistics import (
 )
 from app.core.database import SessionLocal
 from app.models import VehicleModel
+from app.services.vehicle_position_service import VehiclePositions
 from geodistpy import geodist
 
 from tests.factories.models import LineFactory, VehicleFactory
@@ -33,7 +34,9 @@ def test_create_vehicles():
     ]
 
     # WHEN
-    returned_response = update_vehicle_positions(lines_vehicles=line_vehicles)
+    returned_response = update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     session = SessionLocal()
@@ -60,7 +63,9 @@ def test_vehicles_without_existing_line():
     line_vehicles = [SPTransLineVehiclesResponseFactory.build(vehicles=vehicles)]
 
     # WHEN
-    update_vehicle_positions(lines_vehicles=line_vehicles)
+    update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     session = SessionLocal()
@@ -86,7 +91,9 @@ def test_duplicate_vehicle_same_line():
     ]
 
     # WHEN
-    update_vehicle_positions(lines_vehicles=line_vehicles)
+    update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     assert session.query(VehicleModel).count() == 1
@@ -122,7 +129,9 @@ def test_duplicate_vehicle_different_lines():
     ]
 
     # WHEN
-    update_vehicle_positions(lines_vehicles=line_vehicles)
+    update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     assert session.query(VehicleModel).count() == 1
@@ -198,7 +207,9 @@ def test_update_vehicles_and_return_distance():
     ]
 
     # WHEN
-    returned_response = update_vehicle_positions(lines_vehicles=line_vehicles)
+    returned_response = update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     session = SessionLocal()
@@ -250,7 +261,9 @@ def test_update_vehicles_with_same_updated_at():
     ]
 
     # WHEN
-    returned_response = update_vehicle_positions(lines_vehicles=line_vehicles)
+    returned_response = update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     assert returned_response == {}
@@ -281,7 +294,9 @@ def test_maximum_elapsed_time_to_update():
     ]
 
     # WHEN
-    returned_response = update_vehicle_positions(lines_vehicles=line_vehicles)
+    returned_response = update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     assert returned_response == {}
@@ -317,7 +332,9 @@ def test_update_vehicle_different_line():
     ]
 
     # WHEN
-    returned_response = update_vehicle_positions(lines_vehicles=line_vehicles)
+    returned_response = update_vehicle_positions(
+        positions=VehiclePositions.from_lines_vehicles(line_vehicles)
+    )
 
     # THEN
     assert returned_response == {}
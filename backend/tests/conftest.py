@@ -1,15 +1,22 @@
 import inspect
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from unittest.mock import patch
 
 import pytest
+import pytest_asyncio
 import responses
-from app.core.database import Base, engine
+from app.core.cache import caches
+from app.core.database import AsyncSessionLocal, Base, engine
 from app.main import app
+from app.repositories.line_repository import line_id_cache
+from app.services.emission_factor_service import emission_model
+from app.services.geocoding_service import address_index_cache
+from app.services.stop_index_service import stop_index_cache
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from tests.factories import models
-from tests.helpers import LoginHelper, SPTransHelper
+from tests.helpers import HTTPXHelper, LoginHelper, SPTransHelper
 
 
 @pytest.fixture(scope="function")
@@ -25,6 +32,15 @@ def client() -> Generator[TestClient, None, None]:
     app.dependency_overrides.clear()
 
 
+@pytest_asyncio.fixture
+async def async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Fixture that creates an async database session.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 @pytest.fixture(autouse=True)
 def setup_before_and_after_tests():
     """
@@ -32,6 +48,12 @@ def setup_before_and_after_tests():
     """
     # Before each test
     Base.metadata.create_all(bind=engine)
+    line_id_cache.clear()
+    stop_index_cache.clear()
+    address_index_cache.clear()
+    emission_model.clear()
+    for cache in caches.values():
+        cache.clear()
     responses.start()
     SPTransHelper.mock_login()
     from app.core.database import SessionLocal
@@ -43,6 +65,11 @@ def setup_before_and_after_tests():
 
     mocked = patch("time.sleep", return_value=None)
     mocked.start()
+    mocked_async_client = patch(
+        "app.clients.sptrans_async_client.get_client",
+        side_effect=HTTPXHelper.build_async_client,
+    )
+    mocked_async_client.start()
 
     yield
 
@@ -50,3 +77,4 @@ def setup_before_and_after_tests():
     Base.metadata.drop_all(bind=engine)
     responses.reset()
     mocked.stop()
+    mocked_async_client.stop()
@@ -11,3 +11,4 @@ class DailyLineStatisticsFactory(SQLAlchemyFactory[DailyLineStatisticsModel]):
     __set_as_default_factory_for_type__ = True
 
     distance_traveled = Use(lambda: random.uniform(1, 100))
+    emission = None
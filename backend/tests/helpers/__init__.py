@@ -1,4 +1,6 @@
 # flake8: noqa: F401
+from tests.helpers.http import HTTPXHelper
 from tests.helpers.login import LoginHelper
 from tests.helpers.myclimate import MyclimateHelper
+from tests.helpers.gtfs import GTFSHelper
 from tests.helpers.sptrans import SPTransHelper
@@ -0,0 +1,41 @@
+from typing import Sequence
+
+import pandas as pd
+from app.commands.gtfs_loader import GroupedColumns, shapes_from_frame
+from app.schemas import SPTransLineStop, SPTransShape
+
+
+class GTFSHelper:
+    """
+    Helper to build the data returned by the GTFS loaders.
+    """
+
+    @staticmethod
+    def build_shapes(shapes: dict[str, Sequence[SPTransShape]]) -> GroupedColumns:
+        """
+        Build the return value of `load_shapes` with the given shape points.
+        """
+        return shapes_from_frame(
+            pd.DataFrame(
+                [
+                    {"shape_id": shape_id, **point.model_dump()}
+                    for shape_id, points in shapes.items()
+                    for point in points
+                ],
+                columns=["shape_id", "latitude", "longitude", "sequence", "distance"],
+            )
+        )
+
+    @staticmethod
+    def build_line_stops(line_stops: Sequence[SPTransLineStop]) -> GroupedColumns:
+        """
+        Build the return value of `load_line_stops` with the given line stops.
+        """
+        return GroupedColumns.from_frame(
+            pd.DataFrame(
+                [line_stop.model_dump() for line_stop in line_stops],
+                columns=["trip_id", "stop_id", "stop_order"],
+            ).astype({"stop_id": "int64", "stop_order": "int64"}),
+            key="trip_id",
+            order_by="stop_order",
+        )
@@ -0,0 +1,39 @@
+import httpx
+import requests
+
+
+class HTTPXHelper:
+    """
+    Helper to mock external calls made with `httpx`, by forwarding them to
+    `requests`, so the `responses` mocks serve both clients.
+    """
+
+    @staticmethod
+    def forward_to_responses(request: httpx.Request) -> httpx.Response:
+        """
+        Send the `httpx` request through `requests` and convert the response.
+        """
+        response = requests.request(
+            method=request.method,
+            url=str(request.url),
+            headers=dict(request.headers),
+            data=request.content,
+        )
+        headers = dict(response.headers)
+        # `requests` already decoded the content
+        headers.pop("Content-Encoding", None)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=response.content,
+            request=request,
+        )
+
+    @staticmethod
+    def build_async_client() -> httpx.AsyncClient:
+        """
+        Build an async client whose calls are served by the `responses` mocks.
+        """
+        return httpx.AsyncClient(
+            transport=httpx.MockTransport(HTTPXHelper.forward_to_responses)
+        )
@@ -0,0 +1,100 @@
+import pytest
+from app.core.database import SessionLocal
+from app.models import LineDirection, LineModel, LineStopModel
+from app.repositories.bulk_repository import bulk_upsert
+
+from tests.factories.models import LineFactory, LineStopFactory, StopFactory
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
+def test_create_and_update(batch_size: int):
+    """
+    GIVEN  an existing line and rows for the existing line and new lines
+    WHEN   the `bulk_upsert` function is called
+    THEN   the existing line should be updated and the new lines created
+    """
+    # GIVEN
+    session = SessionLocal()
+    existing_line = LineFactory.create_sync(direction=LineDirection.MAIN)
+    rows = [
+        {
+            "id": line_id,
+            "name": f"line-{line_id}",
+            "direction": LineDirection.SECONDARY,
+            "description": None,
+        }
+        for line_id in [existing_line.id, existing_line.id + 1, existing_line.id + 2]
+    ]
+
+    # WHEN
+    processed_rows = bulk_upsert(
+        db=session,
+        model=LineModel,
+        rows=iter(rows),
+        index_elements=["id"],
+        batch_size=batch_size,
+    )
+
+    # THEN
+    session = SessionLocal()
+    assert processed_rows == len(rows)
+    assert session.query(LineModel).count() == len(rows)
+    for row in rows:
+        db_line = session.query(LineModel).filter_by(id=row["id"]).one()
+        assert db_line.name == row["name"]
+        assert db_line.direction == LineDirection.SECONDARY
+
+
+def test_update_columns():
+    """
+    GIVEN  an existing line stop and a row with the same unique constraint
+    WHEN   the `bulk_upsert` function is called with `update_columns`
+    THEN   only the given columns should be updated and the id should be kept
+    """
+    # GIVEN
+    session = SessionLocal()
+    line_stop = LineStopFactory.create_sync(distance_traveled=1)
+    other_stop = StopFactory.create_sync()
+    original_id = line_stop.id
+    original_stop_id = line_stop.stop_id
+
+    # WHEN
+    bulk_upsert(
+        db=session,
+        model=LineStopModel,
+        rows=[
+            {
+                "line_id": line_stop.line_id,
+                "stop_order": line_stop.stop_order,
+                "stop_id": other_stop.id,
+                "distance_traveled": 5,
+            }
+        ],
+        index_elements=["line_id", "stop_order"],
+        update_columns=["distance_traveled"],
+    )
+
+    # THEN
+    session = SessionLocal()
+    db_line_stop = session.query(LineStopModel).one()
+    assert db_line_stop.id == original_id
+    assert db_line_stop.stop_id == original_stop_id
+    assert db_line_stop.distance_traveled == 5
+
+
+def test_no_rows():
+    """
+    GIVEN  no rows
+    WHEN   the `bulk_upsert` function is called
+    THEN   nothing should be processed
+    """
+    # GIVEN
+    session = SessionLocal()
+
+    # WHEN
+    processed_rows = bulk_upsert(
+        db=session, model=LineModel, rows=[], index_elements=["id"]
+    )
+
+    # THEN
+    assert processed_rows == 0
@@ -0,0 +1,136 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core.cache import LRUCache
+from app.core.database import SessionLocal
+from app.models import CacheEntryModel
+from app.repositories.cache_entry_repository import (
+    DatabaseCacheBackend,
+    save_entries,
+)
+from pytest_mock import MockerFixture
+
+
+def test_values_shared_between_processes():
+    """
+    GIVEN  a value cached by another process
+    WHEN   the value is looked up
+    THEN   the value should be read from the database and kept in memory
+    """
+    # GIVEN
+    LRUCache[str, float](
+        name="other_process", max_size=10, backend=DatabaseCacheBackend("test")
+    ).set("key", 1.5)
+    cache = LRUCache[str, float](
+        name="test", max_size=10, backend=DatabaseCacheBackend("test")
+    )
+
+    # WHEN
+    first_value = cache.get("key")
+    second_value = cache.get("key")
+
+    # THEN
+    assert first_value == second_value == 1.5
+    assert cache.metrics.backend_hits == 1
+    assert cache.metrics.hits == 1
+    assert cache.get("other") is None
+    assert cache.metrics.misses == 1
+
+
+def test_expired_values():
+    """
+    GIVEN  a value stored in the database
+    WHEN   the value is looked up after the ttl
+    THEN   the value should be missing
+    """
+    # GIVEN
+    DatabaseCacheBackend("test").set_many({"key": 1.5}, ttl=None)
+    cache = LRUCache[str, float](
+        name="test", max_size=10, ttl=timedelta(0), backend=DatabaseCacheBackend("test")
+    )
+
+    # WHEN
+    value = cache.get("key")
+
+    # THEN
+    assert value is None
+    assert cache.metrics.misses == 1
+
+
+def test_values_keep_their_age(mocker: MockerFixture):
+    """
+    GIVEN  a value stored in the database almost `ttl` ago
+    WHEN   the value is looked up again after the rest of the ttl
+    THEN   the value kept in memory should have expired with the stored one
+    """
+    # GIVEN
+    session = SessionLocal()
+    save_entries(session, "test", {"key": 1.5})
+    session.query(CacheEntryModel).filter_by(key="key").update(
+        {"created_at": datetime.now(timezone.utc) - timedelta(hours=23)}
+    )
+    session.commit()
+    cache = LRUCache[str, float](
+        name="test",
+        max_size=10,
+        ttl=timedelta(days=1),
+        backend=DatabaseCacheBackend("test"),
+    )
+    assert cache.get("key") == 1.5
+
+    # WHEN
+    mocker.patch("time.monotonic", return_value=time.monotonic() + 2 * 60 * 60)
+    cache.get("key")
+
+    # THEN
+    assert cache.metrics.hits == 0
+    assert cache.metrics.backend_hits == 2
+
+
+def test_purge_expired_values(mocker: MockerFixture):
+    """
+    GIVEN  values stored in the database before and after the ttl
+    WHEN   new values are cached
+    THEN   only the expired values of the namespace should be deleted
+    """
+    # GIVEN
+    session = SessionLocal()
+    save_entries(session, "test", {"expired": 1, "recent": 2})
+    save_entries(session, "other", {"expired": 3})
+    session.query(CacheEntryModel).filter_by(key="expired").update(
+        {"created_at": datetime.now(timezone.utc) - timedelta(days=2)}
+    )
+    session.commit()
+    cache = LRUCache[str, float](
+        name="test",
+        max_size=10,
+        ttl=timedelta(days=1),
+        backend=DatabaseCacheBackend("test"),
+    )
+
+    # WHEN
+    cache.set("new", 4)
+
+    # THEN
+    stored = {
+        (entry.namespace, entry.key) for entry in session.query(CacheEntryModel).all()
+    }
+    assert stored == {("test", "recent"), ("test", "new"), ("other", "expired")}
+
+
+def test_purge_throttled():
+    """
+    GIVEN  a backend which already deleted the expired values
+    WHEN   values that are already expired are cached again
+    THEN   they should be kept until the next purge interval
+    """
+    # GIVEN
+    session = SessionLocal()
+    backend = DatabaseCacheBackend("test")
+    backend.set_many({"first": 1}, ttl=timedelta(0))
+
+    # WHEN
+    backend.set_many({"second": 2}, ttl=timedelta(0))
+
+    # THEN
+    assert session.query(CacheEntryModel).filter_by(namespace="test").count() == 2
@@ -35,7 +35,7 @@ def test_sum():
 
     # THEN
     assert len(results) == len(expected_sums)
-    for current_date, distance_sum in results:
+    for current_date, distance_sum, _ in results:
         assert current_date in expected_sums
         assert math.isclose(distance_sum, expected_sums[current_date], abs_tol=1e-3)
 
@@ -56,3 +56,27 @@ def test_order():
     # THEN
     assert len(results) > 1
     assert all(results[i][0] <= results[i + 1][0] for i in range(len(results) - 1))
+
+
+def test_partially_finalized_emission():
+    """
+    GIVEN  a date with finalized daily line statistics and a date with a
+           statistics not finalized yet
+    WHEN   the `get_daily_statistics` function is called
+    THEN   the emission sum should only be returned for the finalized date
+    """
+    # GIVEN
+    session = SessionLocal()
+    finalized_date = date(year=2025, month=11, day=20)
+    partial_date = finalized_date + timedelta(days=1)
+    DailyLineStatisticsFactory.create_sync(date=finalized_date, emission=1)
+    DailyLineStatisticsFactory.create_sync(date=finalized_date, emission=2)
+    DailyLineStatisticsFactory.create_sync(date=partial_date, emission=1)
+    DailyLineStatisticsFactory.create_sync(date=partial_date)
+
+    # WHEN
+    results = get_daily_statistics(db=session).all()
+
+    # THEN
+    emissions = {current_date: emission for current_date, _, emission in results}
+    assert emissions == {finalized_date: 3, partial_date: None}
@@ -1,7 +1,12 @@
+from datetime import date
+
+import pytest
 from app.core.database import SessionLocal
 from app.repositories.daily_line_statistics_repository import (
     get_ordered_daily_line_statistics,
+    get_ordered_daily_line_statistics_async,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from tests.factories.models import DailyLineStatisticsFactory
 
@@ -26,3 +31,29 @@ def test_order():
         results[i].distance_traveled >= results[i + 1].distance_traveled
         for i in range(len(results) - 1)
     )
+
+
+@pytest.mark.asyncio
+async def test_async_page(async_session: AsyncSession):
+    """
+    GIVEN  some daily line statistics of a date in database
+    WHEN   the `get_ordered_daily_line_statistics_async` function is called
+    THEN   the requested page should be returned, sorted by
+           `distance_traveled` and with the lines loaded, with the total count
+    """
+    # GIVEN
+    target_date = date(year=2025, month=11, day=20)
+    statistics = DailyLineStatisticsFactory.create_batch_sync(size=5, date=target_date)
+    DailyLineStatisticsFactory.create_sync(date=date(year=2025, month=11, day=21))
+    statistics.sort(key=lambda statistic: statistic.distance_traveled, reverse=True)
+
+    # WHEN
+    results, total_count = await get_ordered_daily_line_statistics_async(
+        db=async_session, date=target_date, page=2, page_size=2
+    )
+
+    # THEN
+    assert total_count == len(statistics)
+    assert [result.line.id for result in results] == [
+        statistic.line_id for statistic in statistics[2:4]
+    ]
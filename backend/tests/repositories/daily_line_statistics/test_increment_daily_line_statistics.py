@@ -0,0 +1,51 @@
+import math
+from datetime import date
+
+from app.core.database import SessionLocal
+from app.models import DailyLineStatisticsModel
+from app.repositories.daily_line_statistics_repository import (
+    increment_daily_line_statistics,
+)
+
+from tests.factories.models import DailyLineStatisticsFactory, LineFactory
+
+
+def test_increment():
+    """
+    GIVEN  a daily line statistics in database and deltas for its line and
+           for a new line
+    WHEN   the `increment_daily_line_statistics` function is called twice
+    THEN   the deltas should be added to the existing statistics and the
+           missing statistics should be created
+    """
+    # GIVEN
+    session = SessionLocal()
+    target_date = date(year=2025, month=11, day=20)
+    existing_statistics = DailyLineStatisticsFactory.create_sync(date=target_date)
+    existing_line_id = existing_statistics.line_id
+    existing_distance = existing_statistics.distance_traveled
+    new_line = LineFactory.create_sync()
+    deltas = [
+        {"line_id": existing_line_id, "date": target_date, "distance_traveled": 2},
+        {"line_id": new_line.id, "date": target_date, "distance_traveled": 3},
+    ]
+
+    # WHEN
+    increment_daily_line_statistics(db=session, statistics=deltas)
+    increment_daily_line_statistics(db=session, statistics=deltas)
+
+    # THEN
+    session = SessionLocal()
+    assert session.query(DailyLineStatisticsModel).count() == 2
+    db_existing_statistics = (
+        session.query(DailyLineStatisticsModel)
+        .filter_by(line_id=existing_line_id)
+        .one()
+    )
+    assert math.isclose(
+        db_existing_statistics.distance_traveled, existing_distance + 4, abs_tol=1e-6
+    )
+    db_new_statistics = (
+        session.query(DailyLineStatisticsModel).filter_by(line_id=new_line.id).one()
+    )
+    assert math.isclose(db_new_statistics.distance_traveled, 6, abs_tol=1e-6)
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from app.core.database import SessionLocal
+from app.repositories.line_repository import LineIdCache
+from pytest_mock import MockerFixture
+
+from tests.factories.models import LineFactory
+
+
+def test_contains():
+    """
+    GIVEN  a line in database
+    WHEN   the `contains` method is called
+    THEN   only the existing line should be found
+    """
+    # GIVEN
+    session = SessionLocal()
+    line = LineFactory.create_sync()
+    cache = LineIdCache()
+
+    # WHEN
+    # THEN
+    assert cache.contains(db=session, line_id=line.id)
+    assert not cache.contains(db=session, line_id=line.id + 1)
+
+
+def test_refresh_on_unknown_line():
+    """
+    GIVEN  a loaded cache and a line created afterwards
+    WHEN   the `contains` method is called with the new line
+    THEN   the cache should be reloaded and the line should be found
+    """
+    # GIVEN
+    session = SessionLocal()
+    cache = LineIdCache(minimum_refresh_interval=timedelta(0))
+    cache.refresh(db=session)
+    line = LineFactory.create_sync()
+
+    # WHEN
+    # THEN
+    assert cache.contains(db=session, line_id=line.id)
+
+
+def test_minimum_refresh_interval(mocker: MockerFixture):
+    """
+    GIVEN  a recently loaded cache
+    WHEN   the `contains` method is called many times with unknown lines
+    THEN   the database should not be queried again
+    """
+    # GIVEN
+    session = SessionLocal()
+    cache = LineIdCache(minimum_refresh_interval=timedelta(hours=1))
+    cache.refresh(db=session)
+    refresh = mocker.spy(cache, "refresh")
+
+    # WHEN
+    for line_id in range(10):
+        cache.contains(db=session, line_id=line_id)
+
+    # THEN
+    refresh.assert_not_called()
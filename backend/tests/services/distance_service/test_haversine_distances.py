@@ -0,0 +1,54 @@
+import math
+
+import numpy
+from app.services.distance_service import haversine_distances
+from geodistpy import geodist
+
+
+def test_single_target():
+    """
+    GIVEN  some points and a single target
+    WHEN   the `haversine_distances` function is called
+    THEN   the distance of each point to the target should be returned
+    """
+    # GIVEN
+    generator = numpy.random.default_rng(seed=1)
+    points = numpy.column_stack(
+        (generator.uniform(-80, 80, size=10), generator.uniform(-180, 180, size=10))
+    )
+    target = numpy.array([-23.55, -46.63])
+
+    # WHEN
+    distances = haversine_distances(points, target)
+
+    # THEN
+    assert distances.shape == (10,)
+    for point, distance in zip(points, distances):
+        # The sphere differs from the ellipsoid by less than 0.5%
+        expected_distance = geodist(tuple(point), tuple(target), metric="km")
+        assert math.isclose(distance, expected_distance, rel_tol=5e-3)
+
+
+def test_many_targets():
+    """
+    GIVEN  some points and many targets
+    WHEN   the `haversine_distances` function is called with broadcast shapes
+    THEN   the matrix with the distance of each target to each point should be
+           returned
+    """
+    # GIVEN
+    points = numpy.array([[0.0, 0.0], [0.0, 1.0], [1.0, 0.0]])
+    targets = numpy.array([[0.0, 0.0], [1.0, 1.0]])
+
+    # WHEN
+    distances = haversine_distances(points[numpy.newaxis], targets[:, None])
+
+    # THEN
+    assert distances.shape == (2, 3)
+    assert distances[0, 0] == 0
+    for target_index, target in enumerate(targets):
+        for point_index, point in enumerate(points):
+            assert math.isclose(
+                distances[target_index, point_index],
+                haversine_distances(point, target),
+            )
@@ -0,0 +1,137 @@
+import os
+
+import pytest
+from app.constants import BACKEND_PATH
+from app.core.config import settings
+from app.schemas import MyclimateCarbonEmission, VehicleType
+from app.services.emission_factor_service import (
+    EmissionModel,
+    calculate_carbon_emission,
+    emission_model,
+    get_emission_factors_path,
+)
+from pytest_mock import MockFixture
+
+from tests.helpers import MyclimateHelper
+
+
+@pytest.fixture(autouse=True)
+def emission_factors_path(tmp_path, mocker: MockFixture) -> str:
+    path = str(tmp_path / "emission_factors.json")
+    mocker.patch.object(settings, "EMISSION_FACTORS_PATH", path)
+    return path
+
+
+def test_estimate_emissions():
+    """
+    GIVEN  emission factors calibrated with MyClimate
+    WHEN   the emissions of some distances are estimated
+    THEN   the emissions should be proportional to the distances
+    """
+    # GIVEN
+    multiplier = 0.6
+    MyclimateHelper.mock_simplified_bulk_carbon_emission(multiplier=multiplier)
+    emission_model.recalibrate()
+
+    # WHEN
+    emissions = emission_model.estimate_emissions([0, 2.5, 100, -1], VehicleType.BUS)
+
+    # THEN
+    assert emissions is not None
+    assert emissions.tolist() == pytest.approx([0, 1.5, 60, 0])
+
+
+def test_missing_emission_factors():
+    """
+    GIVEN  no stored emission factors
+    WHEN   the emissions of some distances are estimated
+    THEN   None should be returned, without calibrating the factors
+    """
+    # GIVEN
+    mocked_bulk = MyclimateHelper.mock_simplified_bulk_carbon_emission()
+
+    # WHEN
+    emissions = emission_model.estimate_emissions([10], VehicleType.BUS)
+
+    # THEN
+    assert emissions is None
+    assert mocked_bulk.call_count == 0
+
+
+def test_stored_emission_factors(emission_factors_path: str):
+    """
+    GIVEN  emission factors already calibrated by another process
+    WHEN   the emissions are estimated
+    THEN   the stored factors should be used, without calls to MyClimate
+    """
+    # GIVEN
+    mocked_bulk = MyclimateHelper.mock_simplified_bulk_carbon_emission(multiplier=2)
+    EmissionModel().recalibrate()
+    calls = mocked_bulk.call_count
+
+    # WHEN
+    emissions = emission_model.estimate_emissions([3], VehicleType.CAR)
+
+    # THEN
+    assert emissions is not None
+    assert emissions.tolist() == pytest.approx([6])
+    assert mocked_bulk.call_count == calls
+
+
+def test_calculate_carbon_emission_local(mocker: MockFixture):
+    """
+    GIVEN  the local emission model enabled
+    WHEN   the `calculate_carbon_emission` is called
+    THEN   the emission should be estimated without a call per distance
+    """
+    # GIVEN
+    mocker.patch.object(settings, "ENABLE_LOCAL_EMISSION_MODEL", True)
+    MyclimateHelper.mock_simplified_bulk_carbon_emission(multiplier=0.5)
+    emission_model.recalibrate()
+    mocked_single = MyclimateHelper.mock_carbon_emission_error()
+
+    # WHEN
+    emission = calculate_carbon_emission(distance=8, vehicle_type=VehicleType.BUS)
+
+    # THEN
+    assert emission == pytest.approx(4)
+    assert mocked_single.call_count == 0
+
+
+def test_calculate_carbon_emission_without_factors(mocker: MockFixture):
+    """
+    GIVEN  the local emission model enabled, but no stored emission factors
+    WHEN   the `calculate_carbon_emission` is called
+    THEN   the emission should be calculated by MyClimate
+    """
+    # GIVEN
+    mocker.patch.object(settings, "ENABLE_LOCAL_EMISSION_MODEL", True)
+    mocked_bulk = MyclimateHelper.mock_simplified_bulk_carbon_emission()
+    MyclimateHelper.mock_carbon_emission(
+        distance=8,
+        vehicle_type=VehicleType.BUS,
+        response=MyclimateCarbonEmission(kg=3),
+    )
+
+    # WHEN
+    emission = calculate_carbon_emission(distance=8, vehicle_type=VehicleType.BUS)
+
+    # THEN
+    assert emission == 3
+    assert mocked_bulk.call_count == 0
+
+
+def test_relative_emission_factors_path(mocker: MockFixture):
+    """
+    GIVEN  a relative `EMISSION_FACTORS_PATH`
+    WHEN   the `get_emission_factors_path` is called
+    THEN   the path should be resolved against the backend directory
+    """
+    # GIVEN
+    mocker.patch.object(settings, "EMISSION_FACTORS_PATH", ".emission_factors.json")
+
+    # WHEN
+    path = get_emission_factors_path()
+
+    # THEN
+    assert path == os.path.join(BACKEND_PATH, ".emission_factors.json")
@@ -1,25 +1,28 @@
+import pytest
 import math
+import threading
 
-from app.core.database import SessionLocal
 from app.schemas import VehicleType
+from app.services import distance_service
 from app.services.emission_service import (
     AVERAGE_PASSENGERS_PER_BUS,
     calculate_emission_stops,
 )
+from pytest_mock import MockerFixture
 
 from tests.factories.models import LineFactory, LineStopFactory
 from tests.factories.schemas import MyclimateCarbonEmissionFactory
 from tests.helpers import MyclimateHelper
 
 
-def test_car_emission():
+@pytest.mark.asyncio
+async def test_car_emission():
     """
     GIVEN  a vehicle type CAR
     WHEN   the `calculate_emission_stops` function is called
     THEN   the emission for the actual distance should be returned
     """
     # GIVEN
-    session = SessionLocal()
     vehicle_type = VehicleType.CAR
     line = LineFactory.create_sync()
     first_line_stop = LineStopFactory.create_sync(
@@ -36,8 +39,7 @@ def test_car_emission():
     )
 
     # WHEN
-    result = calculate_emission_stops(
-        db=session,
+    result = await calculate_emission_stops(
         vehicle_type=vehicle_type,
         line_id=line.id,
         stop_id_a=first_line_stop.stop_id,
@@ -50,14 +52,14 @@ def test_car_emission():
     )
 
 
-def test_bus_emission():
+@pytest.mark.asyncio
+async def test_bus_emission():
     """
     GIVEN  a vehicle type BUS
     WHEN   the `calculate_emission_stops` function is called
     THEN   the emission for distance should be divided by `AVERAGE_PASSENGERS_PER_BUS`
     """
     # GIVEN
-    session = SessionLocal()
     vehicle_type = VehicleType.BUS
     line = LineFactory.create_sync()
     first_line_stop = LineStopFactory.create_sync(
@@ -74,8 +76,7 @@ def test_bus_emission():
     )
 
     # WHEN
-    result = calculate_emission_stops(
-        db=session,
+    result = await calculate_emission_stops(
         vehicle_type=vehicle_type,
         line_id=line.id,
         stop_id_a=first_line_stop.stop_id,
@@ -88,3 +89,40 @@ def test_bus_emission():
         emission_response.emission / AVERAGE_PASSENGERS_PER_BUS,
         abs_tol=1e-2,
     )
+
+
+@pytest.mark.asyncio
+async def test_distance_off_event_loop(mocker: MockerFixture):
+    """
+    GIVEN  two stops of a line
+    WHEN   the `calculate_emission_stops` function is called
+    THEN   the distance (which may rebuild the stop index) should be calculated
+           outside of the event loop thread
+    """
+    # GIVEN
+    threads: list[int] = []
+
+    def calculate_distance_between_stops(**kwargs) -> float:
+        threads.append(threading.get_ident())
+        return 10
+
+    mocker.patch.object(
+        distance_service,
+        "calculate_distance_between_stops",
+        side_effect=calculate_distance_between_stops,
+    )
+    MyclimateHelper.mock_carbon_emission(
+        distance=None,
+        vehicle_type=VehicleType.CAR,
+        response=MyclimateCarbonEmissionFactory.build(),
+    )
+
+    # WHEN
+    result = await calculate_emission_stops(
+        vehicle_type=VehicleType.CAR, line_id=1, stop_id_a=1, stop_id_b=2
+    )
+
+    # THEN
+    assert result.distance_km == 10
+    assert threads != [threading.get_ident()]
+    assert len(threads) == 1
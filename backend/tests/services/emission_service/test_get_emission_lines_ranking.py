@@ -1,9 +1,12 @@
+import asyncio
 import math
 from datetime import date
 
 import pytest
-from app.core.database import SessionLocal
+import responses
+from app.repositories import daily_line_statistics_repository
 from app.services.emission_service import get_emission_lines_ranking
+from pytest_mock import MockerFixture
 
 from tests.factories.models import DailyLineStatisticsFactory
 from tests.helpers import MyclimateHelper
@@ -17,7 +20,8 @@ from tests.helpers import MyclimateHelper
         (5, 3, 4, (1, 0), 2),  # empty range
     ],
 )
-def test_pagination(
+@pytest.mark.asyncio
+async def test_pagination(
     num_objects: int,
     page: int,
     page_size: int,
@@ -30,7 +34,6 @@ def test_pagination(
     THEN   the results should be paginated
     """
     # GIVEN
-    session = SessionLocal()
     target_date = date(year=2025, month=11, day=20)
     daily_lines_statistics = DailyLineStatisticsFactory.create_batch_sync(
         size=num_objects,
@@ -43,8 +46,7 @@ def test_pagination(
     MyclimateHelper.mock_simplified_bulk_carbon_emission()
 
     # WHEN
-    results = get_emission_lines_ranking(
-        db=session,
+    results = await get_emission_lines_ranking(
         date=target_date,
         page=page,
         page_size=page_size,
@@ -58,14 +60,14 @@ def test_pagination(
     assert results.pagination.page_count == expected_page_count
 
 
-def test_emission():
+@pytest.mark.asyncio
+async def test_emission():
     """
     GIVEN  a daily line statistics in database and a target date
     WHEN   the `get_emission_lines_ranking` function is called
     THEN   the distance should be transformed to carbon emission
     """
     # GIVEN
-    session = SessionLocal()
     target_date = date(year=2025, month=11, day=20)
     daily_line_statistics = DailyLineStatisticsFactory.create_sync(date=target_date)
     expected_emission = 3
@@ -74,8 +76,7 @@ def test_emission():
     )
 
     # WHEN
-    results = get_emission_lines_ranking(
-        db=session,
+    results = await get_emission_lines_ranking(
         date=target_date,
         page=1,
         page_size=1,
@@ -92,3 +93,125 @@ def test_emission():
         daily_line_statistics.distance_traveled,
         abs_tol=1e-2,
     )
+
+
+@pytest.mark.asyncio
+async def test_stored_emission():
+    """
+    GIVEN  a finalized daily line statistics in database, with its emission
+    WHEN   the `get_emission_lines_ranking` function is called
+    THEN   the stored emission should be returned without calling MyClimate
+    """
+    # GIVEN
+    target_date = date(year=2025, month=11, day=20)
+    daily_line_statistics = DailyLineStatisticsFactory.create_sync(
+        date=target_date, emission=42
+    )
+
+    # WHEN
+    results = await get_emission_lines_ranking(
+        date=target_date,
+        page=1,
+        page_size=1,
+    )
+
+    # THEN
+    assert len(responses.calls) == 0
+    [returned_line_emission] = results.lines_emissions
+    assert returned_line_emission.emission == 42
+    assert returned_line_emission.line.id == daily_line_statistics.line_id
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls(mocker: MockerFixture):
+    """
+    GIVEN  a daily line statistics in database
+    WHEN   the `get_emission_lines_ranking` function is called concurrently with
+           the same arguments
+    THEN   the database and MyClimate should be queried once and the result
+           should be shared
+    """
+    # GIVEN
+    target_date = date(year=2025, month=11, day=20)
+    DailyLineStatisticsFactory.create_sync(date=target_date)
+    endpoint_mock = MyclimateHelper.mock_simplified_bulk_carbon_emission()
+
+    started = asyncio.Event()
+    released = asyncio.Event()
+    original_function = (
+        daily_line_statistics_repository.get_ordered_daily_line_statistics_async
+    )
+
+    async def blocking_function(**kwargs):
+        started.set()
+        await released.wait()
+        return await original_function(**kwargs)
+
+    repository_mock = mocker.patch.object(
+        daily_line_statistics_repository,
+        "get_ordered_daily_line_statistics_async",
+        side_effect=blocking_function,
+    )
+
+    async def get_ranking():
+        return await get_emission_lines_ranking(date=target_date, page=1, page_size=10)
+
+    async def release():
+        await started.wait()
+        released.set()
+
+    # WHEN
+    results = await asyncio.gather(get_ranking(), get_ranking(), release())
+
+    # THEN
+    assert repository_mock.call_count == 1
+    assert endpoint_mock.call_count == 1
+    assert results[0] is results[1]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_first_call(mocker: MockerFixture):
+    """
+    GIVEN  a call of the `get_emission_lines_ranking` function in flight
+    WHEN   the first caller is cancelled while another one waits for the same
+           arguments
+    THEN   the other caller should still receive the result
+    """
+    # GIVEN
+    target_date = date(year=2025, month=11, day=20)
+    DailyLineStatisticsFactory.create_sync(date=target_date)
+    MyclimateHelper.mock_simplified_bulk_carbon_emission()
+
+    started = asyncio.Event()
+    released = asyncio.Event()
+    original_function = (
+        daily_line_statistics_repository.get_ordered_daily_line_statistics_async
+    )
+
+    async def blocking_function(**kwargs):
+        started.set()
+        await released.wait()
+        return await original_function(**kwargs)
+
+    mocker.patch.object(
+        daily_line_statistics_repository,
+        "get_ordered_daily_line_statistics_async",
+        side_effect=blocking_function,
+    )
+    first_call = asyncio.ensure_future(
+        get_emission_lines_ranking(date=target_date, page=1, page_size=10)
+    )
+    await started.wait()
+    second_call = asyncio.ensure_future(
+        get_emission_lines_ranking(date=target_date, page=1, page_size=10)
+    )
+
+    # WHEN
+    first_call.cancel()
+    released.set()
+
+    # THEN
+    result = await second_call
+    assert len(result.lines_emissions) == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first_call
@@ -2,11 +2,12 @@ import math
 from datetime import date, datetime, timedelta
 
 import pytest
-import sqlalchemy
+import responses
 from app.constants import SAO_PAULO_ZONE
-from app.core.database import SessionLocal
 from app.exceptions import ValidationError
-from app.repositories.daily_line_statistics_repository import get_daily_statistics
+from app.repositories.daily_line_statistics_repository import (
+    get_daily_statistics_async,
+)
 from app.services.emission_service import get_emission_statistics
 from pytest_mock import MockerFixture
 
@@ -14,25 +15,24 @@ from tests.factories.models import DailyLineStatisticsFactory
 from tests.helpers import MyclimateHelper
 
 REPOSITORY_FUNCTION = (
-    f"{get_daily_statistics.__module__}.{get_daily_statistics.__name__}"
+    f"{get_daily_statistics_async.__module__}.{get_daily_statistics_async.__name__}"
 )
 
 
-def test_invalid_start_date():
+@pytest.mark.asyncio
+async def test_invalid_start_date():
     """
     GIVEN  a `start_date` in the future
     WHEN   the `get_emission_statistics` function is called
     THEN   a `ValidationError` should be raised
     """
     # GIVEN
-    session = SessionLocal()
     today = datetime.now(tz=SAO_PAULO_ZONE).date()
 
     # WHEN
     # THEN
     with pytest.raises(ValidationError):
-        get_emission_statistics(
-            db=session,
+        await get_emission_statistics(
             start_date=today + timedelta(days=1),
             days_range=1,
         )
@@ -45,7 +45,8 @@ def test_invalid_start_date():
         (date(year=2025, month=10, day=31), 1, date(year=2025, month=10, day=31)),
     ],
 )
-def test_date_range_conversion(
+@pytest.mark.asyncio
+async def test_date_range_conversion(
     mocker: MockerFixture,
     start_date: date,
     days_range: int,
@@ -57,16 +58,10 @@ def test_date_range_conversion(
     THEN   the correct date range is sent to the repository function
     """
     # GIVEN
-    session = SessionLocal()
-    mocked = mocker.patch(
-        REPOSITORY_FUNCTION,
-        return_value=session.query(sqlalchemy.false()).filter(sqlalchemy.false()),
-        # empty query
-    )
+    mocked = mocker.patch(REPOSITORY_FUNCTION, return_value=[])
 
     # WHEN
-    get_emission_statistics(
-        db=session,
+    await get_emission_statistics(
         start_date=start_date,
         days_range=days_range,
     )
@@ -75,18 +70,18 @@ def test_date_range_conversion(
     mocked.assert_called_with(
         minimum_date=start_date,
         maximum_date=expected_end_date,
-        db=session,
+        db=mocker.ANY,
     )
 
 
-def test_emission():
+@pytest.mark.asyncio
+async def test_emission():
     """
     GIVEN  a daily line statistics in database
     WHEN   the `get_emission_statistics` function is called
     THEN   the distance should be transformed to carbon emission
     """
     # GIVEN
-    session = SessionLocal()
     target_date = date(year=2025, month=11, day=20)
     daily_line_statistics = DailyLineStatisticsFactory.create_sync(date=target_date)
     expected_emission = 6
@@ -95,8 +90,7 @@ def test_emission():
     )
 
     # WHEN
-    results = get_emission_statistics(
-        db=session,
+    results = await get_emission_statistics(
         start_date=target_date,
         days_range=1,
     )
@@ -112,3 +106,28 @@ def test_emission():
         daily_line_statistics.distance_traveled,
         abs_tol=1e-2,
     )
+
+
+@pytest.mark.asyncio
+async def test_stored_emission():
+    """
+    GIVEN  finalized daily line statistics of a date in database
+    WHEN   the `get_emission_statistics` function is called
+    THEN   the sum of the stored emissions should be returned without calling
+           MyClimate
+    """
+    # GIVEN
+    target_date = date(year=2025, month=11, day=20)
+    DailyLineStatisticsFactory.create_sync(date=target_date, emission=4)
+    DailyLineStatisticsFactory.create_sync(date=target_date, emission=5)
+
+    # WHEN
+    results = await get_emission_statistics(
+        start_date=target_date,
+        days_range=1,
+    )
+
+    # THEN
+    assert len(responses.calls) == 0
+    [returned_line_emission] = results
+    assert math.isclose(returned_line_emission.total_emission, 9, abs_tol=1e-2)
@@ -0,0 +1,138 @@
+import pytest
+import responses
+from app.core.database import SessionLocal
+from app.clients.google_maps_client import GOOGLE_GEOCODING_API_URL
+from app.services.geocoding_service import geocode_address, geocoding_cache
+
+from tests.factories.models import StopFactory
+
+GEOCODING_RESPONSE = {
+    "results": [{"geometry": {"location": {"lat": -23.5505, "lng": -46.6333}}}]
+}
+
+
+def test_stop_address():
+    """
+    GIVEN  a stop whose address is similar to the searched one
+    WHEN   the `geocode_address` is called
+    THEN   the coordinates of the stop should be returned without calling the
+           Google API
+    """
+    # GIVEN
+    session = SessionLocal()
+    stop = StopFactory.create_sync(
+        name="Parada Paulista", address="Av. Paulista, 1578 - Bela Vista"
+    )
+
+    # WHEN
+    coordinates = geocode_address(session, "av paulista 1578 bela vista")
+
+    # THEN
+    assert coordinates == {"latitude": stop.latitude, "longitude": stop.longitude}
+    assert len(responses.calls) == 0
+
+
+def test_remote_fallback():
+    """
+    GIVEN  no stop with an address similar to the searched one
+    WHEN   the `geocode_address` is called twice
+    THEN   the coordinates should be searched in the Google API only once
+    """
+    # GIVEN
+    session = SessionLocal()
+    StopFactory.create_sync(name="Parada Paulista", address="Av. Paulista, 1578")
+    endpoint_mock = responses.get(GOOGLE_GEOCODING_API_URL, json=GEOCODING_RESPONSE)
+
+    # WHEN
+    coordinates = geocode_address(session, "Praça da Sé")
+    cached_coordinates = geocode_address(session, "praca da se")
+
+    # THEN
+    assert coordinates == {"latitude": -23.5505, "longitude": -46.6333}
+    assert cached_coordinates == coordinates
+    assert endpoint_mock.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "address",
+    ["Rua Augusta, 500", "Rua Augusta", "Rua Augusta, 1500, 2"],
+)
+def test_near_miss_stop_address(address: str):
+    """
+    GIVEN  a stop on the searched street, but at another number
+    WHEN   the `geocode_address` is called with the street and another number
+           or without a number
+    THEN   the stop should not match and the Google API should be called
+    """
+    # GIVEN
+    session = SessionLocal()
+    StopFactory.create_sync(name="Parada Augusta", address="Rua Augusta, 1500")
+    endpoint_mock = responses.get(GOOGLE_GEOCODING_API_URL, json=GEOCODING_RESPONSE)
+
+    # WHEN
+    coordinates = geocode_address(session, address)
+
+    # THEN
+    assert coordinates == {"latitude": -23.5505, "longitude": -46.6333}
+    assert endpoint_mock.call_count == 1
+
+
+def test_stop_name():
+    """
+    GIVEN  a stop whose name is the searched address, without a number
+    WHEN   the `geocode_address` is called
+    THEN   the coordinates of the stop should be returned without calling the
+           Google API
+    """
+    # GIVEN
+    session = SessionLocal()
+    stop = StopFactory.create_sync(
+        name="Terminal Parque Dom Pedro II", address="Av. do Estado, 2"
+    )
+
+    # WHEN
+    coordinates = geocode_address(session, "terminal parque dom pedro ii")
+
+    # THEN
+    assert coordinates == {"latitude": stop.latitude, "longitude": stop.longitude}
+    assert len(responses.calls) == 0
+
+
+def test_stored_coordinates():
+    """
+    GIVEN  an address geocoded by the Google API and forgotten by the memory
+           cache
+    WHEN   the `geocode_address` is called with the same address
+    THEN   the coordinates stored in the database should be returned
+    """
+    # GIVEN
+    session = SessionLocal()
+    endpoint_mock = responses.get(GOOGLE_GEOCODING_API_URL, json=GEOCODING_RESPONSE)
+    geocode_address(session, "Praça da Sé")
+    geocoding_cache.clear()
+
+    # WHEN
+    coordinates = geocode_address(session, "Praça da Sé")
+
+    # THEN
+    assert coordinates == {"latitude": -23.5505, "longitude": -46.6333}
+    assert endpoint_mock.call_count == 1
+    assert geocoding_cache.metrics.backend_hits == 1
+
+
+def test_not_found():
+    """
+    GIVEN  an address unknown by the Google API
+    WHEN   the `geocode_address` is called
+    THEN   None should be returned and nothing should be cached
+    """
+    # GIVEN
+    session = SessionLocal()
+    responses.get(GOOGLE_GEOCODING_API_URL, json={"results": []})
+
+    # WHEN
+    coordinates = geocode_address(session, "Endereço inexistente")
+
+    # THEN
+    assert coordinates is None
+    assert len(geocoding_cache) == 0
@@ -0,0 +1,194 @@
+import threading
+
+import pytest
+import responses
+from app.clients import google_maps_client
+from app.core.config import settings
+from app.schemas import VehicleType
+from app.schemas.air_quality import AirQualityResponse
+from app.services import air_quality_service, emission_factor_service
+from app.services.route_comparison_service import RouteComparisonService
+from pytest_mock import MockerFixture
+
+from tests.helpers import MyclimateHelper
+
+FIND_BUS_ROUTES = (
+    f"{google_maps_client.__name__}.{google_maps_client.find_bus_routes.__name__}"
+)
+GET_AIR_QUALITY = (
+    f"{air_quality_service.__name__}."
+    f"{air_quality_service.get_air_quality_by_coords.__name__}"
+)
+BULK_CALCULATE_CARBON_EMISSION = (
+    f"{emission_factor_service.__name__}."
+    f"{emission_factor_service.bulk_calculate_carbon_emission.__name__}"
+)
+
+
+def build_google_route(line_names: list[str], distance_meters: int) -> dict:
+    """
+    Build a Google route made of one bus step of each line.
+    """
+    return {
+        "polyline": {"encodedPolyline": "abc"},
+        "legs": [
+            {
+                "startLocation": {"latLng": {"latitude": -23.5, "longitude": -46.6}},
+                "endLocation": {"latLng": {"latitude": -23.6, "longitude": -46.7}},
+                "steps": [
+                    {
+                        "distanceMeters": distance_meters,
+                        "travelMode": "TRANSIT",
+                        "transitDetails": {"transitLine": {"nameShort": line_name}},
+                    }
+                    for line_name in line_names
+                ],
+            }
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_calculate_bus_route_emissions(mocker: MockerFixture):
+    """
+    GIVEN  Google routes between an origin and a destination, two of them
+           using the same lines
+    WHEN   the `calculate_bus_route_emissions` method is called
+    THEN   the air quality of both ends should be returned and the emissions
+           of the unique routes should be calculated with a single bulk call
+    """
+    # GIVEN
+    mocker.patch(
+        FIND_BUS_ROUTES,
+        return_value={
+            "routes": [
+                build_google_route(["8000-10", "8022-10"], distance_meters=3000),
+                build_google_route(["8022-10", "8000-10"], distance_meters=2000),
+                build_google_route(["875A-10"], distance_meters=2500),
+            ]
+        },
+    )
+    air_quality = AirQualityResponse(health_recommendation="Bom")
+    mocked_air_quality = mocker.patch(GET_AIR_QUALITY, return_value=air_quality)
+    multiplier = 2
+    MyclimateHelper.mock_simplified_bulk_carbon_emission(multiplier=multiplier)
+
+    # WHEN
+    result = await RouteComparisonService().calculate_bus_route_emissions(
+        "origem", "destino"
+    )
+
+    # THEN
+    assert len(responses.calls) == 1
+    assert mocked_air_quality.call_count == 2
+    assert result["origin_air_quality"] == air_quality
+    assert result["destination_air_quality"] == air_quality
+    assert [route["description"] for route in result["routes"]] == [
+        "Rota via 875A-10",
+        "Rota via 8000-10, 8022-10",
+    ]
+    assert [route["emission_kg_co2"] for route in result["routes"]] == [
+        2.5 * multiplier,
+        6 * multiplier,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_emission_error(mocker: MockerFixture):
+    """
+    GIVEN  Google routes and an error when calculating their emissions
+    WHEN   the `calculate_bus_route_emissions` method is called
+    THEN   the routes should be returned with an emission of -1
+    """
+    # GIVEN
+    mocker.patch.object(settings, "ENABLE_MYCLIMATE_FALLBACK", False)
+    mocker.patch(
+        FIND_BUS_ROUTES,
+        return_value={"routes": [build_google_route(["8000-10"], 1000)]},
+    )
+    mocker.patch(GET_AIR_QUALITY, return_value=None)
+    mocker.patch(BULK_CALCULATE_CARBON_EMISSION, side_effect=Exception("erro"))
+
+    # WHEN
+    result = await RouteComparisonService().calculate_bus_route_emissions(
+        "origem", "destino"
+    )
+
+    # THEN
+    assert [route["emission_kg_co2"] for route in result["routes"]] == [-1]
+
+
+@pytest.mark.asyncio
+async def test_emission_error_fallback(mocker: MockerFixture):
+    """
+    GIVEN  Google routes, an error when calculating their emissions and the
+           MyClimate fallback enabled
+    WHEN   the `calculate_bus_route_emissions` method is called
+    THEN   the routes should be returned with the fallback emissions
+    """
+    # GIVEN
+    mocker.patch.object(settings, "ENABLE_MYCLIMATE_FALLBACK", True)
+    mocker.patch(
+        FIND_BUS_ROUTES,
+        return_value={
+            "routes": [
+                build_google_route(["8000-10"], 1000),
+                build_google_route(["875A-10"], 2000),
+            ]
+        },
+    )
+    mocker.patch(GET_AIR_QUALITY, return_value=None)
+    mocker.patch(BULK_CALCULATE_CARBON_EMISSION, side_effect=Exception("erro"))
+
+    # WHEN
+    result = await RouteComparisonService().calculate_bus_route_emissions(
+        "origem", "destino"
+    )
+
+    # THEN
+    assert [route["emission_kg_co2"] for route in result["routes"]] == [
+        round(emission, 2)
+        for emission in emission_factor_service.calculate_fallback_emissions(
+            distances=[1, 2], vehicle_type=VehicleType.BUS
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups(mocker: MockerFixture):
+    """
+    GIVEN  Google routes between an origin and a destination
+    WHEN   the `calculate_bus_route_emissions` method is called
+    THEN   the air quality lookups should run concurrently with the
+           calculation of the emissions
+    """
+    # GIVEN
+    mocker.patch(
+        FIND_BUS_ROUTES,
+        return_value={"routes": [build_google_route(["8000-10"], 1000)]},
+    )
+    emissions_started = threading.Event()
+
+    def get_air_quality(*args) -> AirQualityResponse:
+        # Only returns if the emissions are calculated at the same time
+        assert emissions_started.wait(timeout=5)
+        return AirQualityResponse()
+
+    def bulk_calculate_carbon_emission(distances, **kwargs) -> list[float]:
+        emissions_started.set()
+        return [1 for _ in distances]
+
+    mocker.patch(GET_AIR_QUALITY, side_effect=get_air_quality)
+    mocker.patch(
+        BULK_CALCULATE_CARBON_EMISSION, side_effect=bulk_calculate_carbon_emission
+    )
+
+    # WHEN
+    result = await RouteComparisonService().calculate_bus_route_emissions(
+        "origem", "destino"
+    )
+
+    # THEN
+    assert result["origin_air_quality"] == AirQualityResponse()
+    assert result["destination_air_quality"] == AirQualityResponse()
+    assert [route["emission_kg_co2"] for route in result["routes"]] == [1]
@@ -6,6 +6,7 @@ from app.schemas import EmissionResponse, VehicleType
 from app.services.emission_service import calculate_emission_stops
 from app.services.route_service import create_route
 from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from tests.factories.models import LineFactory, StopFactory, UserFactory
 
@@ -14,7 +15,8 @@ EMISSION_SERVICE = (
 )
 
 
-def test_create_route(mocker: MockerFixture):
+@pytest.mark.asyncio
+async def test_create_route(mocker: MockerFixture, async_session: AsyncSession):
     """
     GIVEN  an existing user, line and stops and data to create a route
     WHEN   the `create_route` function is called
@@ -41,8 +43,8 @@ def test_create_route(mocker: MockerFixture):
     mocked.side_effect = side_effect
 
     # WHEN
-    returned_route = create_route(
-        db=session,
+    returned_route = await create_route(
+        db=async_session,
         user_id=user.id,
         line_id=line.id,
         departure_stop_id=departure_stop.id,
@@ -57,7 +59,8 @@ def test_create_route(mocker: MockerFixture):
     assert returned_route.emission_saving == car_emission - bus_emission
 
 
-def test_non_existing_line():
+@pytest.mark.asyncio
+async def test_non_existing_line(async_session: AsyncSession):
     """
     GIVEN  a non existing line to create a route
     WHEN   the `create_route` function is called
@@ -73,8 +76,8 @@ def test_non_existing_line():
     # WHEN
     # THEN
     with pytest.raises(NotFoundError):
-        create_route(
-            db=session,
+        await create_route(
+            db=async_session,
             user_id=user.id,
             line_id=0,
             departure_stop_id=departure_stop.id,
@@ -84,7 +87,8 @@ def test_non_existing_line():
     assert session.query(UserRouteModel).count() == 0
 
 
-def test_non_existing_departure_stop():
+@pytest.mark.asyncio
+async def test_non_existing_departure_stop(async_session: AsyncSession):
     """
     GIVEN  a non existing departure stop to create a route
     WHEN   the `create_route` function is called
@@ -100,8 +104,8 @@ def test_non_existing_departure_stop():
     # WHEN
     # THEN
     with pytest.raises(NotFoundError):
-        create_route(
-            db=session,
+        await create_route(
+            db=async_session,
             user_id=user.id,
             line_id=line.id,
             departure_stop_id=0,
@@ -111,7 +115,8 @@ def test_non_existing_departure_stop():
     assert session.query(UserRouteModel).count() == 0
 
 
-def test_non_existing_arrival_stop():
+@pytest.mark.asyncio
+async def test_non_existing_arrival_stop(async_session: AsyncSession):
     """
     GIVEN  a non existing arrival stop to create a route
     WHEN   the `create_route` function is called
@@ -127,8 +132,8 @@ def test_non_existing_arrival_stop():
     # WHEN
     # THEN
     with pytest.raises(NotFoundError):
-        create_route(
-            db=session,
+        await create_route(
+            db=async_session,
             user_id=user.id,
             line_id=line.id,
             departure_stop_id=departure_stop.id,
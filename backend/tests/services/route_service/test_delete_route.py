@@ -3,11 +3,13 @@ from app.core.database import SessionLocal
 from app.exceptions import ForbiddenError
 from app.models import UserRouteModel
 from app.services.route_service import delete_route
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from tests.factories.models import UserFactory, UserRouteFactory
 
 
-def test_deletion():
+@pytest.mark.asyncio
+async def test_deletion(async_session: AsyncSession):
     """
     GIVEN  a user route from the correct user
     WHEN   the `delete_route` function is called
@@ -19,13 +21,16 @@ def test_deletion():
     user_route = UserRouteFactory.create_sync()
 
     # WHEN
-    delete_route(db=session, user_id=user_route.user_id, route_id=user_route.id)
+    await delete_route(
+        db=async_session, user_id=user_route.user_id, route_id=user_route.id
+    )
 
     # THEN
     assert session.query(UserRouteModel).count() == 0
 
 
-def test_forbidden_deletion():
+@pytest.mark.asyncio
+async def test_forbidden_deletion(async_session: AsyncSession):
     """
     GIVEN  a user route from a different user
     WHEN   the `delete_route` function is called
@@ -41,6 +46,8 @@ def test_forbidden_deletion():
     # WHEN
     # THEN
     with pytest.raises(expected_exception=ForbiddenError):
-        delete_route(db=session, user_id=other_user.id, route_id=user_route.id)
+        await delete_route(
+            db=async_session, user_id=other_user.id, route_id=user_route.id
+        )
 
     assert session.query(UserRouteModel).count() == 1
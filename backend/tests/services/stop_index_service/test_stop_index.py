@@ -0,0 +1,130 @@
+import math
+
+import numpy
+import pytest
+from app.services.distance_service import EARTH_RADIUS
+from app.services.stop_index_service import StopIndex
+
+TARGET = (-23.55, -46.63)
+
+
+def haversine(latitude: float, longitude: float) -> float:
+    """
+    Great-circle distance (in km) between the given point and `TARGET`.
+    """
+    latitude_a, longitude_a, latitude_b, longitude_b = map(
+        math.radians, (latitude, longitude, *TARGET)
+    )
+    a = (
+        math.sin((latitude_b - latitude_a) / 2) ** 2
+        + math.cos(latitude_a)
+        * math.cos(latitude_b)
+        * math.sin((longitude_b - longitude_a) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+@pytest.fixture
+def stops() -> dict[int, tuple[float, float]]:
+    generator = numpy.random.default_rng(seed=42)
+    return {
+        stop_id: (
+            float(generator.uniform(-23.7, -23.4)),
+            float(generator.uniform(-46.8, -46.5)),
+        )
+        for stop_id in range(1, 201)
+    }
+
+
+def build_index(
+    stops: dict[int, tuple[float, float]], line_stops: list[tuple[int, int]]
+) -> StopIndex:
+    return StopIndex(
+        stop_ids=numpy.array(list(stops), dtype=numpy.int64),
+        latitudes=numpy.array([point[0] for point in stops.values()]),
+        longitudes=numpy.array([point[1] for point in stops.values()]),
+        line_ids=numpy.array([line_stop[0] for line_stop in line_stops]),
+        line_stop_ids=numpy.array([line_stop[1] for line_stop in line_stops]),
+    )
+
+
+def test_nearest(stops: dict[int, tuple[float, float]]):
+    """
+    GIVEN  an index with some stops
+    WHEN   the `nearest` method is called
+    THEN   the closest stops and their distances should be returned, sorted by
+           distance
+    """
+    # GIVEN
+    index = build_index(stops, line_stops=[])
+    expected_stops = sorted(stops, key=lambda stop_id: haversine(*stops[stop_id]))
+
+    # WHEN
+    results = index.nearest(*TARGET, k=5)
+
+    # THEN
+    assert [stop_id for stop_id, _ in results] == expected_stops[:5]
+    for stop_id, distance in results:
+        assert math.isclose(distance, haversine(*stops[stop_id]), abs_tol=1e-6)
+
+
+def test_nearest_line(stops: dict[int, tuple[float, float]]):
+    """
+    GIVEN  an index with some stops and lines
+    WHEN   the `nearest` method is called for a line
+    THEN   only the stops of the line should be considered
+    """
+    # GIVEN
+    line_stop_ids = [3, 50, 70, 50, 120]
+    index = build_index(
+        stops,
+        line_stops=[(1, stop_id) for stop_id in line_stop_ids]
+        + [(2, stop_id) for stop_id in stops],
+    )
+    expected_stops = sorted(
+        set(line_stop_ids), key=lambda stop_id: haversine(*stops[stop_id])
+    )
+
+    # WHEN
+    results = index.nearest(*TARGET, k=10, line_id=1)
+
+    # THEN
+    assert [stop_id for stop_id, _ in results] == expected_stops
+    assert index.nearest(*TARGET, line_id=3) == []
+
+
+def test_within_radius(stops: dict[int, tuple[float, float]]):
+    """
+    GIVEN  an index with some stops
+    WHEN   the `within_radius` method is called
+    THEN   all the stops inside the radius should be returned, sorted by distance
+    """
+    # GIVEN
+    radius = 5
+    index = build_index(stops, line_stops=[])
+    expected_stops = sorted(
+        (stop_id for stop_id in stops if haversine(*stops[stop_id]) <= radius),
+        key=lambda stop_id: haversine(*stops[stop_id]),
+    )
+
+    # WHEN
+    results = index.within_radius(*TARGET, radius=radius)
+
+    # THEN
+    assert len(expected_stops) > 0
+    assert [stop_id for stop_id, _ in results] == expected_stops
+
+
+def test_empty_index():
+    """
+    GIVEN  an index without stops
+    WHEN   the queries are called
+    THEN   empty lists should be returned
+    """
+    # GIVEN
+    index = build_index({}, line_stops=[])
+
+    # WHEN
+    # THEN
+    assert index.nearest(*TARGET, k=3) == []
+    assert index.within_radius(*TARGET, radius=10) == []
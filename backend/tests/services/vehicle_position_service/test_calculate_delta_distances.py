@@ -0,0 +1,138 @@
+import math
+from datetime import datetime, timedelta
+
+import numpy
+from app.services.vehicle_position_service import (
+    VehiclePositions,
+    calculate_delta_distances,
+    match_previous_positions,
+)
+from geodistpy import geodist
+
+from tests.factories.schemas import (
+    SPTransLineVehiclesResponseFactory,
+    SPTransVehicleFactory,
+)
+
+MAXIMUM_ELAPSED_TIME = timedelta(minutes=10)
+
+
+def build_positions(line_id: int, vehicles: list) -> VehiclePositions:
+    return VehiclePositions.from_lines_vehicles(
+        [SPTransLineVehiclesResponseFactory.build(line_id=line_id, vehicles=vehicles)]
+    )
+
+
+def test_group_distances_by_line():
+    """
+    GIVEN  previous and current positions of vehicles from two lines
+    WHEN   the `calculate_delta_distances` function is called
+    THEN   the traveled distances should be summed for each line
+    """
+    # GIVEN
+    updated_at = datetime(year=2025, month=11, day=20, hour=10)
+    old_vehicles = SPTransVehicleFactory.batch(size=3, updated_at=updated_at)
+    new_vehicles = [
+        SPTransVehicleFactory.build(
+            id=vehicle.id, updated_at=updated_at + timedelta(minutes=1)
+        )
+        for vehicle in old_vehicles
+    ]
+    previous = VehiclePositions.from_lines_vehicles(
+        [
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=1, vehicles=old_vehicles[:2]
+            ),
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=2, vehicles=old_vehicles[2:]
+            ),
+        ]
+    )
+    # The current snapshot comes in a different order
+    current = VehiclePositions.from_lines_vehicles(
+        [
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=2, vehicles=new_vehicles[2:]
+            ),
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=1, vehicles=new_vehicles[:2][::-1]
+            ),
+        ]
+    )
+    expected_distances = [
+        geodist(
+            (old.latitude, old.longitude), (new.latitude, new.longitude), metric="km"
+        )
+        for old, new in zip(old_vehicles, new_vehicles)
+    ]
+
+    # WHEN
+    previous_indexes = match_previous_positions(current=current, previous=previous)
+    delta_distances = calculate_delta_distances(
+        current=current,
+        previous=previous,
+        previous_indexes=previous_indexes,
+        maximum_elapsed_time=MAXIMUM_ELAPSED_TIME,
+    )
+
+    # THEN
+    assert previous_indexes.tolist() == [2, 1, 0]
+    assert delta_distances.keys() == {1, 2}
+    assert math.isclose(delta_distances[1], sum(expected_distances[:2]), abs_tol=1e-6)
+    assert math.isclose(delta_distances[2], expected_distances[2], abs_tol=1e-6)
+
+
+def test_ignore_vehicles_without_valid_previous_position():
+    """
+    GIVEN  vehicles that are new, were not updated, took too long to update or
+           changed their line
+    WHEN   the `calculate_delta_distances` function is called
+    THEN   an empty dict should be returned
+    """
+    # GIVEN
+    updated_at = datetime(year=2025, month=11, day=20, hour=10)
+    old_vehicles = SPTransVehicleFactory.batch(size=3, updated_at=updated_at)
+    previous = build_positions(line_id=1, vehicles=old_vehicles)
+
+    not_updated, too_late, new_line = old_vehicles
+    current = VehiclePositions.from_lines_vehicles(
+        [
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=1,
+                vehicles=[
+                    SPTransVehicleFactory.build(),
+                    SPTransVehicleFactory.build(
+                        id=not_updated.id, updated_at=updated_at
+                    ),
+                    SPTransVehicleFactory.build(
+                        id=too_late.id,
+                        updated_at=updated_at
+                        + MAXIMUM_ELAPSED_TIME
+                        + timedelta(minutes=1),
+                    ),
+                ],
+            ),
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=2,
+                vehicles=[
+                    SPTransVehicleFactory.build(
+                        id=new_line.id, updated_at=updated_at + timedelta(minutes=1)
+                    )
+                ],
+            ),
+        ]
+    )
+
+    # WHEN
+    previous_indexes = match_previous_positions(current=current, previous=previous)
+    delta_distances = calculate_delta_distances(
+        current=current,
+        previous=previous,
+        previous_indexes=previous_indexes,
+        maximum_elapsed_time=MAXIMUM_ELAPSED_TIME,
+    )
+
+    # THEN
+    assert previous_indexes[0] == -1
+    assert numpy.all(previous_indexes[1:] >= 0)
+    assert delta_distances == {}
@@ -0,0 +1,44 @@
+from app.services.vehicle_position_service import (
+    VehiclePositions,
+    deduplicate_positions,
+)
+
+from tests.factories.schemas import (
+    SPTransLineVehiclesResponseFactory,
+    SPTransVehicleFactory,
+)
+
+
+def test_keep_first_occurrence():
+    """
+    GIVEN  a snapshot where a vehicle appears twice in the same line and once
+           in another line
+    WHEN   the `deduplicate_positions` function is called
+    THEN   only the first occurrence of the vehicle should be kept, preserving
+           the order of the other vehicles
+    """
+    # GIVEN
+    duplicate_vehicle = SPTransVehicleFactory.build()
+    other_vehicles = SPTransVehicleFactory.batch(size=2)
+    positions = VehiclePositions.from_lines_vehicles(
+        [
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=1,
+                vehicles=[other_vehicles[0], duplicate_vehicle, duplicate_vehicle],
+            ),
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=2, vehicles=[duplicate_vehicle, other_vehicles[1]]
+            ),
+        ]
+    )
+
+    # WHEN
+    deduplicated_positions = deduplicate_positions(positions)
+
+    # THEN
+    assert deduplicated_positions.vehicle_ids.tolist() == [
+        other_vehicles[0].id,
+        duplicate_vehicle.id,
+        other_vehicles[1].id,
+    ]
+    assert deduplicated_positions.line_ids.tolist() == [1, 1, 2]
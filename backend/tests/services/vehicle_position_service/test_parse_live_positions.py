@@ -0,0 +1,56 @@
+import json
+from dataclasses import fields
+
+import numpy
+from app.schemas import SPTransLinesVehiclesResponse
+from app.services.vehicle_position_service import (
+    VehiclePositions,
+    parse_live_positions,
+)
+
+from tests.factories.schemas import SPTransLinesVehiclesResponseFactory
+
+
+def test_same_result_as_response_models():
+    """
+    GIVEN  an Olho Vivo payload with some lines and vehicles
+    WHEN   the `parse_live_positions` function is called
+    THEN   the snapshot should be the same one built from the response models
+           and the line names should be returned
+    """
+    # GIVEN
+    response = SPTransLinesVehiclesResponseFactory.build()
+    payload = json.dumps(response.model_dump(by_alias=True, mode="json")).encode()
+    expected_positions = VehiclePositions.from_lines_vehicles(
+        SPTransLinesVehiclesResponse(**json.loads(payload)).lines_vehicles
+    )
+
+    # WHEN
+    positions, line_names = parse_live_positions(payload)
+
+    # THEN
+    for field in fields(VehiclePositions):
+        assert numpy.array_equal(
+            getattr(positions, field.name), getattr(expected_positions, field.name)
+        )
+    assert line_names == {
+        line_vehicles.line_id: line_vehicles.line_name
+        for line_vehicles in response.lines_vehicles
+    }
+
+
+def test_empty_payload():
+    """
+    GIVEN  an Olho Vivo payload without data
+    WHEN   the `parse_live_positions` function is called
+    THEN   an empty snapshot should be returned
+    """
+    # GIVEN
+    payload = b"null"
+
+    # WHEN
+    positions, line_names = parse_live_positions(payload)
+
+    # THEN
+    assert len(positions) == 0
+    assert line_names == {}
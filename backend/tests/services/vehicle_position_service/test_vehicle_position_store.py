@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from app.core.database import SessionLocal
+from app.models import VehicleModel
+from app.repositories import vehicle_repository
+from app.services.vehicle_position_service import (
+    VehiclePositions,
+    VehiclePositionStore,
+)
+from pytest_mock import MockerFixture
+
+from tests.factories.models import LineFactory, VehicleFactory
+from tests.factories.schemas import (
+    SPTransLineVehiclesResponseFactory,
+    SPTransVehicleFactory,
+)
+
+
+def test_warm_up():
+    """
+    GIVEN  some vehicles in database
+    WHEN   the `warm_up` method is called
+    THEN   the store should serve their positions sorted by vehicle id
+    """
+    # GIVEN
+    session = SessionLocal()
+    line = LineFactory.create_sync()
+    vehicles = VehicleFactory.create_batch_sync(size=3, line_id=line.id)
+    store = VehiclePositionStore()
+
+    # WHEN
+    store.warm_up(db=session)
+
+    # THEN
+    assert len(store) == len(vehicles)
+    assert store.positions.vehicle_ids.tolist() == sorted(
+        vehicle.id for vehicle in vehicles
+    )
+
+
+def test_flush_only_changed_vehicles():
+    """
+    GIVEN  a warmed up store and a snapshot with an existing vehicle and a new one
+    WHEN   the `update` and `flush` methods are called
+    THEN   the existing vehicle should be updated, the new one should be created
+           and the unchanged vehicle should be left untouched
+    """
+    # GIVEN
+    session = SessionLocal()
+    line = LineFactory.create_sync()
+    changed_vehicle, unchanged_vehicle = VehicleFactory.create_batch_sync(
+        size=2, line_id=line.id
+    )
+    store = VehiclePositionStore(flush_interval=timedelta(0))
+    store.warm_up(db=session)
+
+    new_positions = [
+        SPTransVehicleFactory.build(
+            id=changed_vehicle.id,
+            updated_at=changed_vehicle.updated_at + timedelta(minutes=1),
+        ),
+        SPTransVehicleFactory.build(),
+    ]
+    positions = VehiclePositions.from_lines_vehicles(
+        [
+            SPTransLineVehiclesResponseFactory.build(
+                line_id=line.id, vehicles=new_positions
+            )
+        ]
+    )
+    unchanged_vehicle_data = unchanged_vehicle.dict()
+
+    # WHEN
+    store.update(positions)
+    store.flush(db=session)
+
+    # THEN
+    session = SessionLocal()
+    assert session.query(VehicleModel).count() == 3
+    for new_position in new_positions:
+        db_vehicle = session.query(VehicleModel).filter_by(id=new_position.id).one()
+        assert db_vehicle.latitude == new_position.latitude
+        assert db_vehicle.longitude == new_position.longitude
+        assert db_vehicle.updated_at == new_position.updated_at
+
+    db_unchanged_vehicle = (
+        session.query(VehicleModel).filter_by(id=unchanged_vehicle.id).one()
+    )
+    assert db_unchanged_vehicle.dict() == unchanged_vehicle_data
+
+
+def test_flush_not_due():
+    """
+    GIVEN  a store with a long flush interval and a new vehicle in memory
+    WHEN   the `flush` method is called without `force`
+    THEN   nothing should be written until the flush is forced
+    """
+    # GIVEN
+    session = SessionLocal()
+    line = LineFactory.create_sync()
+    store = VehiclePositionStore(flush_interval=timedelta(hours=1))
+    store.warm_up(db=session)
+    store.update(
+        VehiclePositions.from_lines_vehicles(
+            [SPTransLineVehiclesResponseFactory.build(line_id=line.id)]
+        )
+    )
+
+    # WHEN
+    store.flush(db=session)
+
+    # THEN
+    assert session.query(VehicleModel).count() == 0
+
+    store.flush(db=session, force=True)
+    assert session.query(VehicleModel).count() == len(store)
+
+
+def test_flush_repeated_snapshot(mocker: MockerFixture):
+    """
+    GIVEN  a store which already flushed a snapshot
+    WHEN   the same snapshot is received again and flushed
+    THEN   no vehicle should be written
+    """
+    # GIVEN
+    session = SessionLocal()
+    line = LineFactory.create_sync()
+    store = VehiclePositionStore(flush_interval=timedelta(0))
+    store.warm_up(db=session)
+    lines_vehicles = [SPTransLineVehiclesResponseFactory.build(line_id=line.id)]
+    store.update(VehiclePositions.from_lines_vehicles(lines_vehicles))
+    store.flush(db=session)
+    mocked_upsert = mocker.spy(vehicle_repository, "upsert_vehicles")
+
+    # WHEN
+    store.update(VehiclePositions.from_lines_vehicles(lines_vehicles))
+    store.flush(db=session)
+
+    # THEN
+    assert mocked_upsert.call_count == 1
+    assert list(mocked_upsert.call_args.kwargs["vehicles"]) == []